@@ -0,0 +1,233 @@
+"""
+Stand-in for system.lib.minescript, so BerryCake runs outside the game.
+
+Every BerryCake module imports system.lib.minescript at import time.
+install(game) registers a module backed by a FakeGame under that name
+(and a do-nothing keyboard module when the real one is unavailable).
+Call it before importing anything from berrycake_utils.
+
+FakeGame answers block queries from a synthworld.Terrain and simulates
+a player that walks, sprints, jumps and falls on it. Every call can
+sleep for a fixed latency to mimic the real MineScript round trip.
+"""
+import math
+import re
+import sys
+import time
+import types
+from collections import Counter, namedtuple
+
+from synthworld import AIR
+
+# walking / sprinting speed in blocks per second
+WALK_SPEED = 4.317
+SPRINT_SPEED = 5.612
+# physics sub-step in seconds
+PHYSICS_STEP = 0.05
+
+PlayerInfo = namedtuple('PlayerInfo', 'name position yaw pitch')
+WorldInfo = namedtuple('WorldInfo', 'name address dimension')
+
+# blocks the simulated player can walk through (solid for everything else)
+_WALK_THROUGH = {AIR, 'minecraft:water', 'minecraft:short_grass', 'minecraft:tall_grass', 'minecraft:torch'}
+
+_FILL = re.compile(r'/?fill (-?\d+) (-?\d+) (-?\d+) (-?\d+) (-?\d+) (-?\d+) (\S+)')
+_SETBLOCK = re.compile(r'/?setblock (-?\d+) (-?\d+) (-?\d+) (\S+)')
+
+
+class FakeGame:
+    """
+    A tiny Minecraft: terrain, block edits and one player.
+
+    GOAL:
+        - Let the benchmarks drive the real BerryCake code paths
+          (scanning, pathing, walking) without a running game.
+        - Count every MineScript call and add configurable latency.
+
+    HOW IT WORKS:
+        - Block queries read edits first (from /fill and /setblock), then
+          the terrain.
+        - The player moves in real time: every call that reads the player
+          integrates the pressed keys since the previous call in
+          PHYSICS_STEP sub-steps. Walking into a solid block stops the
+          player unless jump is held and the block can be stepped onto;
+          with nothing underneath the player drops.
+    """
+
+    def __init__(self, terrain, spawn=None, latency=0.0):
+        """
+        Args:
+            terrain (synthworld.Terrain): Block source.
+            spawn (tuple): (x, z) column the player starts on (default 0, 0).
+            latency (float): Seconds every MineScript call sleeps.
+        """
+        self.terrain = terrain
+        self.latency = latency
+        self.world_name = 'BenchWorld'  # what world_info() names the world (warm start cache key)
+        self.calls = Counter()
+        self.edits = {}
+        self.messages = []
+        self.pressed = set()
+        self.yaw = 0.0
+        self.pitch = 0.0
+        sx, sz = spawn if spawn is not None else (0, 0)
+        self.teleport(terrain.standing_cell(sx, sz))
+
+    def teleport(self, cell):
+        self.position = [cell[0] + 0.5, float(cell[1]), cell[2] + 0.5]
+        self._last_step = time.perf_counter()
+
+    def block(self, x, y, z):
+        block = self.edits.get((x, y, z))
+        return block if block is not None else self.terrain.block(x, y, z)
+
+    def _rpc(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    # ---------------------------------------------------
+    # PLAYER PHYSICS
+    # ---------------------------------------------------
+
+    def _solid(self, x, y, z):
+        return self.block(x, y, z) not in _WALK_THROUGH
+
+    def _step(self):
+        now = time.perf_counter()
+        elapsed = now - self._last_step
+        self._last_step = now
+        while elapsed > 1e-9:
+            dt = min(PHYSICS_STEP, elapsed)
+            elapsed -= dt
+            self._move(dt)
+
+    def _move(self, dt):
+        x, y, z = self.position
+        feet = int(math.floor(y))
+        if 'forward' in self.pressed:
+            speed = SPRINT_SPEED if 'sprint' in self.pressed else WALK_SPEED
+            rad = math.radians(self.yaw)
+            nx = x - math.sin(rad) * speed * dt
+            nz = z + math.cos(rad) * speed * dt
+            bx, bz = math.floor(nx), math.floor(nz)
+            if (bx, bz) != (math.floor(x), math.floor(z)) and self._solid(bx, feet, bz):
+                if 'jump' in self.pressed and not self._solid(bx, feet + 1, bz) and not self._solid(bx, feet + 2, bz):
+                    feet += 1
+                else:
+                    nx, nz = x, z
+            x, z = nx, nz
+        bx, bz = math.floor(x), math.floor(z)
+        while feet > -64 and not self._solid(bx, feet - 1, bz):
+            feet -= 1
+        self.position = [x, float(feet), z]
+
+    # ---------------------------------------------------
+    # MINESCRIPT API
+    # ---------------------------------------------------
+
+    def getblock(self, x, y, z):
+        self._rpc('getblock')
+        return self.block(int(x), int(y), int(z))
+
+    def getblocklist(self, coords):
+        self._rpc('getblocklist')
+        block = self.block
+        return [block(int(c[0]), int(c[1]), int(c[2])) for c in coords]
+
+    def execute(self, command):
+        self._rpc('execute')
+        match = _FILL.match(command)
+        if match:
+            *bounds, block_type = match.groups()
+            x0, y0, z0, x1, y1, z1 = map(int, bounds)
+            for x in range(min(x0, x1), max(x0, x1) + 1):
+                for y in range(min(y0, y1), max(y0, y1) + 1):
+                    for z in range(min(z0, z1), max(z0, z1) + 1):
+                        self.edits[(x, y, z)] = block_type
+            return
+        match = _SETBLOCK.match(command)
+        if match:
+            *coords, block_type = match.groups()
+            self.edits[tuple(map(int, coords))] = block_type
+
+    def echo(self, *args, **kwargs):
+        self._rpc('echo')
+        self.messages.append(' '.join(str(a) for a in args))
+
+    def player(self):
+        self._rpc('player')
+        self._step()
+        return PlayerInfo('BenchPlayer', list(self.position), self.yaw, self.pitch)
+
+    def player_position(self):
+        self._rpc('player_position')
+        self._step()
+        return list(self.position)
+
+    def player_orientation(self):
+        self._rpc('player_orientation')
+        return (self.yaw, self.pitch)
+
+    def player_set_orientation(self, yaw, pitch):
+        self._rpc('player_set_orientation')
+        self._step()
+        self.yaw, self.pitch = yaw, pitch
+
+    def player_look_at(self, x, y, z):
+        self._rpc('player_look_at')
+
+    def get_entities(self, *args, **kwargs):
+        self._rpc('get_entities')
+        return []
+
+    def world_info(self):
+        self._rpc('world_info')
+        return WorldInfo(self.world_name, None, 'minecraft:overworld')
+
+    def _press(self, key):
+        def press(down):
+            self._rpc(f'player_press_{key}')
+            self._step()
+            if down:
+                self.pressed.add(key)
+            else:
+                self.pressed.discard(key)
+        return press
+
+    def module(self):
+        """A module object exposing the MineScript functions above."""
+        module = types.ModuleType('system.lib.minescript')
+        for name in ('getblock', 'getblocklist', 'execute', 'echo', 'player', 'player_position',
+                     'player_orientation', 'player_set_orientation', 'player_look_at', 'get_entities',
+                     'world_info'):
+            setattr(module, name, getattr(self, name))
+        for key in ('forward', 'backward', 'left', 'right', 'jump', 'sprint', 'sneak', 'attack', 'use'):
+            setattr(module, f'player_press_{key}', self._press(key))
+        module.game = self
+        return module
+
+
+def install(game):
+    """
+    Register game (a FakeGame, or anything with a module() method such as
+    replay.TraceReplay) as system.lib.minescript. Modules keep the module
+    they imported, so install once and swap game.terrain / teleport() instead.
+
+    Returns:
+        module: the fake minescript module.
+    """
+    module = game.module()
+    system = sys.modules.setdefault('system', types.ModuleType('system'))
+    lib = sys.modules.setdefault('system.lib', types.ModuleType('system.lib'))
+    system.lib = lib
+    lib.minescript = module
+    sys.modules['system.lib.minescript'] = module
+
+    try:
+        import keyboard  # noqa: F401 - real module when it can load
+    except ImportError:
+        keyboard = types.ModuleType('keyboard')
+        keyboard.is_pressed = lambda key: False
+        sys.modules['keyboard'] = keyboard
+    return module
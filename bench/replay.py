@@ -0,0 +1,197 @@
+"""
+Replay a recorded MineScript session (see berrycake_utils/tracing.py).
+
+TraceReplay stands in for system.lib.minescript and answers every call
+with what the game answered when the trace was recorded, so the same
+session can be run again offline, profiled, and compared across engine
+versions on identical inputs.
+
+    python bench/replay.py session.bct.gz                  # as fast as possible
+    python bench/replay.py session.bct.gz --speed 1        # recorded timing
+    python bench/replay.py session.bct.gz --speed 4 --out replay_results.json
+
+The runner rebuilds the WorldDB from the settings in the trace, calls
+run() until the trace is used up and writes cycle timings, METRICS and
+how well the calls matched the recording as JSON.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import types
+from collections import Counter, deque
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import fakeminescript
+from berrycake_utils.tracing import TRACED_FUNCTIONS, call_signature, read_trace
+
+# recorded calls searched for one with the same arguments before falling back to the oldest
+LOOKAHEAD = 64
+
+
+# functions whose answer depends on the arguments: never answered from a different call
+ARGUMENT_KEYED = {'getblock', 'getblocklist'}
+
+
+class TraceExhausted(Exception):
+    """The code asked for a call the trace has no more answers for."""
+
+
+class TraceDiverged(TraceExhausted):
+    """The code asked for blocks the recorded session never asked for."""
+
+
+def decode(value):
+    """Inverse of tracing.encode(): recorded objects come back as attribute namespaces."""
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    if isinstance(value, dict):
+        if '__obj__' in value:
+            return types.SimpleNamespace(**{k: decode(v) for k, v in value['__obj__'].items()})
+        return {k: decode(v) for k, v in value.items()}
+    return value
+
+
+class TraceReplay:
+    """
+    MineScript backend that plays a trace back.
+
+    GOAL:
+        - Give the code the exact answers of the recorded session, in the
+          same order, whatever the machine's speed.
+        - Replay at recorded speed, faster, or without waiting at all.
+
+    HOW IT WORKS:
+        - Recorded calls are queued per function. A call takes the first
+          queued entry (within LOOKAHEAD) with the same argument signature,
+          which keeps threads that interleave differently in line; with no
+          match it takes the oldest entry and counts a divergence. Block
+          queries (ARGUMENT_KEYED) search the whole queue and raise
+          TraceDiverged instead, since another call's blocks would be wrong.
+        - Steps with a time budget (chunk streaming, the verifier) follow
+          the wall clock, so away from speed 1 they may split their calls
+          differently; matching by signature absorbs that.
+        - speed > 0 holds each answer back until its recorded time / speed
+          since the first call; speed 0 answers immediately.
+        - Only functions that existed while recording are offered, so
+          hasattr() checks take the same branch.
+    """
+
+    def __init__(self, path, speed=0.0):
+        """
+        Args:
+            path (str): Trace written by tracing.TraceRecorder.
+            speed (float): Playback speed (1 = recorded timing, 0 = no waiting).
+        """
+        self.header, calls = read_trace(path)
+        self.speed = speed
+        self.queues = {}
+        for t, name, signature, result in calls:
+            self.queues.setdefault(name, deque()).append((t, signature, result))
+        self.total = len(calls)
+        self.replayed = 0
+        self.divergences = Counter()
+        self.exhausted = Counter()
+        self._start = None
+
+    def call(self, name, args, kwargs):
+        queue = self.queues.get(name)
+        if not queue:
+            self.exhausted[name] += 1
+            raise TraceExhausted(name)
+        signature = call_signature(args, kwargs)
+        keyed = name in ARGUMENT_KEYED
+        index = 0
+        for i in range(len(queue) if keyed else min(LOOKAHEAD, len(queue))):
+            if queue[i][1] == signature:
+                index = i
+                break
+        else:
+            self.divergences[name] += 1
+            if keyed:
+                raise TraceDiverged(f'{name}{signature}')
+        t, _, result = queue[index]
+        del queue[index]
+        self.replayed += 1
+
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now - (t / self.speed if self.speed > 0 else 0.0)
+        if self.speed > 0:
+            wait = self._start + t / self.speed - now
+            if wait > 0:
+                time.sleep(wait)
+
+        if isinstance(result, dict) and '__error__' in result:
+            raise RuntimeError(f'recorded {name} failure: {result["__error__"]}')
+        return decode(result)
+
+    def remaining(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    def module(self):
+        """A module object exposing the recorded MineScript functions."""
+        module = types.ModuleType('system.lib.minescript')
+        for name in self.header.get('functions', TRACED_FUNCTIONS):
+            setattr(module, name, lambda *args, _name=name, **kwargs: self.call(_name, args, kwargs))
+        module.replay = self
+        return module
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a recorded BerryCake session.')
+    parser.add_argument('trace')
+    parser.add_argument('--speed', type=float, default=0.0, help='1 = recorded timing, 0 = as fast as possible')
+    parser.add_argument('--cycles', type=int, default=0, help='stop after this many run() cycles (0 = whole trace)')
+    parser.add_argument('--out', default='replay_results.json')
+    args = parser.parse_args(argv)
+
+    replay = TraceReplay(args.trace, speed=args.speed)
+    fakeminescript.install(replay)
+    from berrycake_utils.metrics import METRICS
+    from berrycake_utils.worlddb import WorldDB
+    METRICS.enable()
+
+    settings = dict(replay.header.get('meta', {}).get('worlddb', {}))
+    world = None
+    cycles = 0
+    stopped_by = 'cycles'
+    start = time.perf_counter()
+    try:
+        world = WorldDB(track_events=False, **settings)
+        while not args.cycles or cycles < args.cycles:
+            world.run()
+            cycles += 1
+    except TraceDiverged as e:
+        stopped_by = f'diverged ({e})'
+    except TraceExhausted as e:
+        stopped_by = f'trace exhausted ({e})'
+    finally:
+        if world is not None:
+            world.chunk_streamer.stop()
+    elapsed = time.perf_counter() - start
+
+    report = {
+        'trace': args.trace,
+        'speed': args.speed,
+        'cycles': cycles,
+        'seconds': elapsed,
+        'stopped_by': stopped_by,
+        'calls': {'recorded': replay.total, 'replayed': replay.replayed, 'remaining': replay.remaining(),
+                  'divergences': dict(replay.divergences)},
+        'chunks_loaded': len(world.world_db) if world is not None else 0,
+        'metrics': METRICS.snapshot(),
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'{cycles} cycles in {elapsed:.2f} s, {replay.replayed}/{replay.total} calls replayed, '
+          f'{sum(replay.divergences.values())} divergences ({stopped_by}); results written to {args.out}')
+    return report
+
+
+if __name__ == '__main__':
+    main()
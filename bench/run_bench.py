@@ -0,0 +1,420 @@
+"""
+Offline benchmark suite for BerryCake.
+
+Runs the hot paths against the fake MineScript backend (fakeminescript.py)
+on a seeded synthetic world (synthworld.py) and writes the results as JSON.
+
+    python bench/run_bench.py                       # every benchmark, hills, seed 0
+    python bench/run_bench.py --terrain caves --latency 0.002
+    python bench/run_bench.py --only find_path_maze,walker --repeat 5
+    python bench/run_bench.py --compare old.json    # flag regressions against an earlier run
+
+Every benchmark reports wall time (best / mean / all repeats), the
+MineScript calls it made and its own numbers (nodes, blocks, path length...).
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import fakeminescript
+from synthworld import Terrain, KINDS
+
+# chunks per side of the world the world-level benchmarks work on
+WORLD_CHUNKS = 6
+# relative slowdown that --compare reports as a regression
+REGRESSION_THRESHOLD = 0.15
+
+
+class BenchContext:
+    """Shared state for the benchmarks: the fake game, a loaded WorldDB, structures."""
+
+    def __init__(self, terrain_kind, seed, latency):
+        self.terrain = Terrain(terrain_kind, seed)
+        self.game = fakeminescript.FakeGame(self.terrain, spawn=(8, 8), latency=latency)
+        fakeminescript.install(self.game)
+        from berrycake_utils.metrics import METRICS
+        METRICS.enable()  # find_path reports its node counts here
+        self.tmpdir = tempfile.mkdtemp(prefix='berrycake_bench_')
+
+        # structures for the pathfinding benchmarks, inside the loaded area
+        self.maze_entrance, self.maze_exit = self.terrain.maze(-40, -40, 15, seed=seed)
+        self.walled_goal = self.terrain.enclose(30, -30)
+        self._world = None
+
+    def new_world(self, **kwargs):
+        from berrycake_utils.worlddb import WorldDB
+        options = dict(world_center=self.game.position, render_distance=WORLD_CHUNKS, stream=False,
+                       track_events=False, verify_rpc_rate=0)
+        options.update(kwargs)
+        world = WorldDB(**options)
+        # METRICS is on for the node counts; keep the HUD / log files out of the package
+        world.metrics_exporter.hud_path = None
+        world.metrics_exporter.log_path = os.path.join(self.tmpdir, 'metrics.jsonl')
+        return world
+
+    def world(self):
+        """WorldDB with every chunk around spawn loaded (built once)."""
+        if self._world is None:
+            world = self.new_world()
+            world.generate_chunk_origins()
+            world.generate_world()
+            self._world = world
+        return self._world
+
+
+# ---------------------------------------------------
+# BENCHMARKS - each returns a dict of extra numbers
+# ---------------------------------------------------
+
+def _scan(ctx, adaptive):
+    world = ctx.new_world(adaptive_scan=adaptive, render_distance=4)
+    world.generate_chunk_origins()
+    world.generate_world()
+    stats = world.scan_stats
+    return {'chunks': stats['chunks'],
+            'fetched_per_chunk': stats['fetched_blocks'] / max(1, stats['chunks'])}
+
+
+def bench_scan_adaptive(ctx):
+    return _scan(ctx, True)
+
+
+def bench_scan_full(ctx):
+    return _scan(ctx, False)
+
+
+def bench_flattend(ctx):
+    return {'blocks': len(ctx.world().flattend())}
+
+
+def bench_filter_top_blocks(ctx):
+    world = ctx.world()
+    return {'columns': len(world.filter_top_blocks(world.world_db))}
+
+
+def bench_save_json(ctx):
+    path = os.path.join(ctx.tmpdir, 'world_data.json')
+    ctx.world().save_to_json(path)
+    return {'bytes': os.path.getsize(path)}
+
+
+def bench_load_json(ctx):
+    path = os.path.join(ctx.tmpdir, 'world_data.json')
+    if not os.path.exists(path):
+        ctx.world().save_to_json(path)
+    world = ctx.new_world()
+    world.load_from_json(path)
+    return {'chunks': len(world.world_db)}
+
+
+def _find_path(ctx, start, goal):
+    from berrycake_utils.metrics import METRICS
+    from berrycake_utils.pathfinder import find_path
+    nodes = METRICS.counters.get('path.nodes', 0)
+    path = find_path(start, goal, ctx.world().world_view())
+    return {'found': bool(path), 'nodes': METRICS.counters.get('path.nodes', 0) - nodes,
+            'path_length': len(path)}
+
+
+def bench_find_path_easy(ctx):
+    return _find_path(ctx, ctx.terrain.standing_cell(-30, 20), ctx.terrain.standing_cell(35, 30))
+
+
+def bench_find_path_maze(ctx):
+    return _find_path(ctx, ctx.maze_entrance, ctx.maze_exit)
+
+
+def bench_find_path_unreachable(ctx):
+    return _find_path(ctx, ctx.terrain.standing_cell(8, 8), ctx.walled_goal)
+
+
+def _ring_targets(ctx, count=24, radius=36):
+    """Standing cells on a circle around spawn (the candidates of the nearest-target benchmarks)."""
+    return [ctx.terrain.standing_cell(8 + int(radius * math.cos(2 * math.pi * i / count)),
+                                      8 + int(radius * math.sin(2 * math.pi * i / count)))
+            for i in range(count)]
+
+
+def bench_find_nearest_each(ctx):
+    # one find_path per candidate, the way it had to be done before find_path_to_nearest
+    from berrycake_utils.metrics import METRICS
+    from berrycake_utils.pathfinder import find_path
+    nodes = METRICS.counters.get('path.nodes', 0)
+    view = ctx.world().world_view()
+    paths = [find_path(ctx.terrain.standing_cell(8, 8), target, view) for target in _ring_targets(ctx)]
+    best = min((path for path in paths if path), key=len, default=[])
+    return {'found': bool(best), 'nodes': METRICS.counters.get('path.nodes', 0) - nodes, 'path_length': len(best)}
+
+
+def bench_find_nearest_multi(ctx):
+    from berrycake_utils.metrics import METRICS
+    from berrycake_utils.pathfinder import find_path_to_nearest
+    nodes = METRICS.counters.get('path.nodes', 0)
+    target, path = find_path_to_nearest(ctx.terrain.standing_cell(8, 8), _ring_targets(ctx),
+                                        ctx.world().world_view(), reach=0)
+    return {'found': bool(path), 'nodes': METRICS.counters.get('path.nodes', 0) - nodes, 'path_length': len(path)}
+
+
+def _trip_starts(ctx, count=20, seed=1):
+    rng = random.Random(seed)
+    return [ctx.terrain.standing_cell(rng.randint(-40, 40), rng.randint(-40, 40)) for _ in range(count)]
+
+
+def _trip_goal(ctx):
+    return ctx.terrain.standing_cell(30, 30)
+
+
+def bench_trips_find_path(ctx):
+    # every trip to the same destination searches again
+    from berrycake_utils.pathfinder import find_path
+    view = ctx.world().world_view()
+    paths = [find_path(start, _trip_goal(ctx), view) for start in _trip_starts(ctx)]
+    return {'trips': len(paths), 'found': sum(1 for path in paths if path)}
+
+
+def bench_flow_field_build(ctx):
+    field = ctx.world().add_destination('bench', _trip_goal(ctx), reach=0)
+    return {'cells': len(field), 'nodes': field.stats['nodes']}
+
+
+def bench_trips_flow_field(ctx):
+    world = ctx.world()
+    if 'bench' not in world.flow_fields:
+        world.add_destination('bench', _trip_goal(ctx), reach=0)
+    field = world.destination('bench')
+    paths = [field.path_from(start) for start in _trip_starts(ctx)]
+    return {'trips': len(paths), 'found': sum(1 for path in paths if path)}
+
+
+def bench_flow_field_repair(ctx):
+    """Two blocks placed on the route from one trip start and removed again, repairing the field each time."""
+    world = ctx.world()
+    if 'bench' not in world.flow_fields:
+        world.add_destination('bench', _trip_goal(ctx), reach=0)
+    field = world.destination('bench')
+    path = field.path_from(_trip_starts(ctx)[0])
+    x, y, z = path[len(path) // 2]
+    view = world.world_view()
+    old = [view.get((x, y, z), 'minecraft:air'), view.get((x, y + 1, z), 'minecraft:air')]
+    world.set_block((x, y, z), 'minecraft:stone')
+    world.set_block((x, y + 1, z), 'minecraft:stone')
+    repaired = field.stats['cells_repaired']
+    world.destination('bench')
+    world.set_block((x, y, z), old[0])
+    world.set_block((x, y + 1, z), old[1])
+    world.destination('bench')
+    return {'cells': len(field), 'cells_repaired': field.stats['cells_repaired'] - repaired}
+
+
+def _first_path(ctx, warm):
+    """Seconds from creating a streaming WorldDB to its first planned path across the loaded area."""
+    from berrycake_utils.metrics import METRICS
+    cache_dir = os.path.join(ctx.tmpdir, 'cache')
+    if warm and not os.path.exists(cache_dir):
+        _first_path(ctx, False)  # fills the cache
+    elif not warm and os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    ctx.game.teleport(ctx.terrain.standing_cell(8, 8))
+    goal = ctx.terrain.standing_cell(40, 40)
+    world = ctx.new_world(stream=True, warm_start=cache_dir, launched_at=time.time(), verify_rpc_rate=2.0)
+    try:
+        while 'first_path' not in world.startup:
+            world.run()
+            view = world.world_view()
+            if view.chunk_at(goal) is not None and view.chunk_at(ctx.game.position) is not None:
+                world.plan_route(goal)
+    finally:
+        world.chunk_streamer.stop()
+        world.close_cache()
+    return {'first_path_s': world.startup['first_path'], 'first_chunk_s': world.startup.get('first_chunk'),
+            'preloaded_chunks': METRICS.gauges.get('startup.preloaded_chunks', 0)}
+
+
+def bench_first_path_cold(ctx):
+    return _first_path(ctx, False)
+
+
+def bench_first_path_warm(ctx):
+    return _first_path(ctx, True)
+
+
+def _settle(world, cycles=500):
+    for _ in range(cycles):
+        world.run()
+        if not world.missing_chunks() and not world.chunk_streamer.pending():
+            return
+
+
+def _revisit(ctx, **options):
+    """Walk 8 chunks away and come back; return_s is the time until every chunk is loaded again."""
+    home = ctx.terrain.standing_cell(8, 8)
+    ctx.game.teleport(home)
+    world = ctx.new_world(render_distance=6, **options)
+    try:
+        _settle(world)
+        ctx.game.teleport(ctx.terrain.standing_cell(8 + 16 * 8, 8))
+        _settle(world)
+        ctx.game.teleport(home)
+        before = ctx.game.calls['getblocklist']
+        start = time.perf_counter()
+        _settle(world)
+        seconds = time.perf_counter() - start
+    finally:
+        world.chunk_cache.close()
+    return {'return_s': seconds, 'return_scan_calls': ctx.game.calls['getblocklist'] - before,
+            'restored': world.chunk_cache.stats['restored'], 'retained': world.chunk_cache.stats['retained']}
+
+
+def bench_revisit_evicted(ctx):
+    # the behaviour before ChunkCache: everything past the render distance is dropped
+    return _revisit(ctx, max_chunks=0, unload_margin=0)
+
+
+def bench_revisit_spilled(ctx):
+    return _revisit(ctx, max_chunks=0, spill=os.path.join(ctx.tmpdir, 'spill.bcr'))
+
+
+def bench_revisit_retained(ctx):
+    return _revisit(ctx)
+
+
+def bench_walker(ctx):
+    from berrycake_utils import search
+    from berrycake_utils.smoothing import smooth_path
+    from berrycake_utils.walker import Walker
+    view = ctx.world().world_view()
+    start = ctx.terrain.standing_cell(8, 8)
+    goal = ctx.terrain.standing_cell(24, 20)
+    ctx.game.teleport(start)
+    _, path, _ = search.astar(start, goal, view.is_standable)
+    walker = Walker(smooth_path(path, view.is_standable))
+    result = walker.walk()
+    position = ctx.game.position
+    return {'result': result, 'waypoints': len(walker.path),
+            'end_distance': ((position[0] - goal[0] - 0.5) ** 2 + (position[2] - goal[2] - 0.5) ** 2) ** 0.5,
+            'ticks': walker.tick_stats.get('ticks'), 'missed_ticks': walker.tick_stats.get('missed'),
+            'inputs_sent': walker.tick_stats.get('inputs_sent')}
+
+
+# (name, function, uses the shared loaded world - built before timing starts)
+BENCHMARKS = [
+    ('scan_adaptive', bench_scan_adaptive, False),
+    ('scan_full', bench_scan_full, False),
+    ('flattend', bench_flattend, True),
+    ('filter_top_blocks', bench_filter_top_blocks, True),
+    ('save_json', bench_save_json, True),
+    ('load_json', bench_load_json, True),
+    ('find_path_easy', bench_find_path_easy, True),
+    ('find_path_maze', bench_find_path_maze, True),
+    ('find_path_unreachable', bench_find_path_unreachable, True),
+    ('find_nearest_each', bench_find_nearest_each, True),
+    ('find_nearest_multi', bench_find_nearest_multi, True),
+    ('trips_find_path', bench_trips_find_path, True),
+    ('flow_field_build', bench_flow_field_build, True),
+    ('trips_flow_field', bench_trips_flow_field, True),
+    ('flow_field_repair', bench_flow_field_repair, True),
+    ('walker', bench_walker, True),
+    ('first_path_cold', bench_first_path_cold, False),
+    ('first_path_warm', bench_first_path_warm, False),
+    ('revisit_evicted', bench_revisit_evicted, False),
+    ('revisit_spilled', bench_revisit_spilled, False),
+    ('revisit_retained', bench_revisit_retained, False),
+]
+
+
+# ---------------------------------------------------
+# RUNNER
+# ---------------------------------------------------
+
+def run_benchmark(ctx, func, repeat):
+    times = []
+    extra = {}
+    calls = 0
+    for _ in range(repeat):
+        before = sum(ctx.game.calls.values())
+        start = time.perf_counter()
+        extra = func(ctx)
+        times.append(time.perf_counter() - start)
+        calls = sum(ctx.game.calls.values()) - before
+    return dict(best=min(times), mean=sum(times) / len(times), seconds=times, rpc_calls=calls, **extra)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """{name: best / baseline best} for benchmarks in both runs; prints regressions."""
+    ratios = {}
+    for name, result in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not old or not old.get('best'):
+            continue
+        ratio = result['best'] / old['best']
+        ratios[name] = ratio
+        flag = 'REGRESSION' if ratio > 1 + threshold else ('faster' if ratio < 1 - threshold else '')
+        print(f'  {name:24s} {old["best"] * 1000:9.1f} ms -> {result["best"] * 1000:9.1f} ms  x{ratio:5.2f} {flag}')
+    return ratios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--terrain', default='hills', choices=KINDS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every MineScript call')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default='', help='comma separated benchmark names')
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', default=None, help='earlier results file to compare against')
+    args = parser.parse_args(argv)
+
+    selected = [name for name in args.only.split(',') if name]
+    unknown = set(selected) - {name for name, *_ in BENCHMARKS}
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(sorted(unknown))}')
+
+    ctx = BenchContext(args.terrain, args.seed, args.latency)
+    results = {}
+    for name, func, uses_world in BENCHMARKS:
+        if selected and name not in selected:
+            continue
+        if uses_world:
+            ctx.world()
+        # the walker runs in real time, once is enough
+        results[name] = run_benchmark(ctx, func, 1 if name == 'walker' else args.repeat)
+        print(f'{name:24s} {results[name]["best"] * 1000:9.1f} ms  ({results[name]["rpc_calls"]} MineScript calls)')
+
+    report = {
+        'meta': {'time': time.time(), 'commit': _git_commit(), 'python': platform.python_version(),
+                 'platform': platform.platform(), 'terrain': args.terrain, 'seed': args.seed,
+                 'latency': args.latency, 'repeat': args.repeat},
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            print(f'compared to {args.compare}:')
+            report['compare'] = compare(results, json.load(f))
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'results written to {args.out}')
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Seeded synthetic terrain for the offline benchmarks.
+
+Terrain(kind, seed).block(x, y, z) returns a block id for any position,
+deterministically, so the same seed always produces the same world.
+Kinds: flat, hills, caves (hills with carved tunnels) and water (hills
+flooded up to sea level). maze() / enclose() put structures on top for
+the pathfinding benchmarks.
+"""
+import random
+
+AIR = 'minecraft:air'
+STONE = 'minecraft:stone'
+WALL = 'minecraft:stone_bricks'
+
+KINDS = ('flat', 'hills', 'caves', 'water')
+
+Y_BOTTOM = -64
+FLAT_HEIGHT = 64
+SEA_LEVEL = 63
+
+
+def _hash(seed, *ints):
+    """Deterministic 0..1 float for an integer lattice point."""
+    h = seed * 0x9E3779B1
+    for i in ints:
+        h = (h ^ (i * 0x85EBCA6B)) * 0xC2B2AE35 & 0xFFFFFFFF
+        h ^= h >> 15
+    return (h & 0xFFFFFF) / float(0xFFFFFF)
+
+
+def _smooth(t):
+    return t * t * (3 - 2 * t)
+
+
+class Terrain:
+    """
+    Deterministic block source for the fake MineScript backend.
+
+    GOAL:
+        - Give the benchmarks worlds that look like the real thing:
+          surfaces, ores, trees, caves and water.
+        - Be cheap enough that generating blocks does not dominate the
+          benchmarks.
+
+    HOW IT WORKS:
+        - Column heights come from two octaves of 2D value noise and are
+          cached per column.
+        - Caves carve out blocks below the surface where 3D value noise
+          (lattice cached) passes a threshold.
+        - overrides {(x, y, z): block_id} win over the generated world;
+          maze() / enclose() / set() write into it.
+    """
+
+    def __init__(self, kind='hills', seed=0, amplitude=10):
+        """
+        Args:
+            kind (str): One of KINDS.
+            seed (int): World seed.
+            amplitude (int): Height variation of hills / caves / water.
+        """
+        if kind not in KINDS:
+            raise ValueError(f'unknown terrain kind {kind!r}, expected one of {KINDS}')
+        self.kind = kind
+        self.seed = seed
+        self.amplitude = 0 if kind == 'flat' else amplitude
+        self.overrides = {}
+        self._heights = {}
+        self._lattice = {}
+
+    # ---------------------------------------------------
+    # GENERATION
+    # ---------------------------------------------------
+
+    def _noise2(self, x, z, scale, salt):
+        gx, fx = divmod(x / scale, 1.0)
+        gz, fz = divmod(z / scale, 1.0)
+        gx, gz = int(gx), int(gz)
+        sx, sz = _smooth(fx), _smooth(fz)
+        a = _hash(self.seed + salt, gx, gz)
+        b = _hash(self.seed + salt, gx + 1, gz)
+        c = _hash(self.seed + salt, gx, gz + 1)
+        d = _hash(self.seed + salt, gx + 1, gz + 1)
+        return (a + (b - a) * sx) * (1 - sz) + (c + (d - c) * sx) * sz
+
+    def _noise3(self, x, y, z, scale=8):
+        gx, fx = divmod(x, scale)
+        gy, fy = divmod(y, scale)
+        gz, fz = divmod(z, scale)
+        corners = self._lattice.get((gx, gy, gz))
+        if corners is None:
+            corners = [_hash(self.seed + 7, gx + dx, gy + dy, gz + dz)
+                       for dx in (0, 1) for dy in (0, 1) for dz in (0, 1)]
+            self._lattice[(gx, gy, gz)] = corners
+        sx, sy, sz = _smooth(fx / scale), _smooth(fy / scale), _smooth(fz / scale)
+        c00 = corners[0] + (corners[4] - corners[0]) * sx
+        c01 = corners[1] + (corners[5] - corners[1]) * sx
+        c10 = corners[2] + (corners[6] - corners[2]) * sx
+        c11 = corners[3] + (corners[7] - corners[3]) * sx
+        c0 = c00 + (c10 - c00) * sy
+        c1 = c01 + (c11 - c01) * sy
+        return c0 + (c1 - c0) * sz
+
+    def height(self, x, z):
+        """Y of the top solid block of column (x, z) before overrides."""
+        key = (x, z)
+        h = self._heights.get(key)
+        if h is None:
+            if not self.amplitude:
+                h = FLAT_HEIGHT
+            else:
+                n = 0.7 * self._noise2(x, z, 24.0, 1) + 0.3 * self._noise2(x, z, 8.0, 2)
+                h = FLAT_HEIGHT + int(round((n - 0.5) * 2 * self.amplitude))
+            self._heights[key] = h
+        return h
+
+    def block(self, x, y, z):
+        if self.overrides:
+            block = self.overrides.get((x, y, z))
+            if block is not None:
+                return block
+        if y < Y_BOTTOM:
+            return AIR
+        if y == Y_BOTTOM:
+            return 'minecraft:bedrock'
+        h = self.height(x, z)
+        if y > h:
+            if self.kind == 'water' and y <= SEA_LEVEL:
+                return 'minecraft:water'
+            if y == h + 1 and _hash(self.seed + 3, x, z) < 0.08:
+                return 'minecraft:short_grass'
+            if y <= h + 4 and _hash(self.seed + 4, x, z) < 0.006:
+                return 'minecraft:oak_log'
+            return AIR
+        if self.kind == 'caves' and Y_BOTTOM + 4 < y < h - 3 and self._noise3(x, y, z) > 0.72:
+            return AIR
+        if y == h:
+            if self.kind == 'water' and h <= SEA_LEVEL:
+                return 'minecraft:sand'
+            return 'minecraft:grass_block'
+        if y > h - 4:
+            return 'minecraft:dirt'
+        if y < 0:
+            return 'minecraft:deepslate'
+        return 'minecraft:iron_ore' if _hash(self.seed + 5, x, y, z) < 0.01 else STONE
+
+    # ---------------------------------------------------
+    # STRUCTURES
+    # ---------------------------------------------------
+
+    def standing_cell(self, x, z):
+        """(x, y, z) a player stands in on top of column (x, z)."""
+        y = self.height(x, z) + 1
+        while self.overrides.get((x, y, z), AIR) != AIR:
+            y += 1
+        return (x, y, z)
+
+    def set(self, position, block_type):
+        self.overrides[tuple(position)] = block_type
+
+    def wall(self, x, z, height=3, block_type=WALL):
+        """Column of blocks on top of the surface at (x, z), too high to jump over."""
+        top = self.height(x, z)
+        for y in range(top + 1, top + 1 + height):
+            self.overrides[(x, y, z)] = block_type
+
+    def maze(self, x0, z0, cells, seed=None):
+        """
+        Build a perfect maze of cells x cells (corridors one block wide)
+        with its corner at (x0, z0); it covers 2 * cells + 1 blocks per side
+        and sits on a flat floor just above the highest column under it.
+
+        Returns:
+            tuple: (entrance, exit) standing cells at opposite corners.
+        """
+        rng = random.Random(self.seed if seed is None else seed)
+        size = 2 * cells + 1
+        open_cells = {(1, 1)}
+        stack = [(0, 0)]
+        visited = {(0, 0)}
+        while stack:
+            cx, cz = stack[-1]
+            options = [(cx + dx, cz + dz) for dx, dz in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                       if 0 <= cx + dx < cells and 0 <= cz + dz < cells and (cx + dx, cz + dz) not in visited]
+            if not options:
+                stack.pop()
+                continue
+            nx, nz = rng.choice(options)
+            visited.add((nx, nz))
+            open_cells.add((2 * nx + 1, 2 * nz + 1))
+            open_cells.add((cx + nx + 1, cz + nz + 1))  # wall between the two cells
+            stack.append((nx, nz))
+
+        floor = max(self.height(x0 + i, z0 + j) for i in range(size) for j in range(size)) + 1
+        for i in range(size):
+            for j in range(size):
+                x, z = x0 + i, z0 + j
+                self.overrides[(x, floor, z)] = WALL
+                fill = AIR if (i, j) in open_cells else WALL
+                for y in range(floor + 1, floor + 4):
+                    self.overrides[(x, y, z)] = fill
+        return (x0 + 1, floor + 1, z0 + 1), (x0 + size - 2, floor + 1, z0 + size - 2)
+
+    def enclose(self, x, z, radius=2):
+        """Ring of walls around column (x, z). Returns the unreachable standing cell inside."""
+        for i in range(-radius, radius + 1):
+            for j in range(-radius, radius + 1):
+                if max(abs(i), abs(j)) == radius:
+                    self.wall(x + i, z + j)
+        return self.standing_cell(x, z)
@@ -1,10 +1,12 @@
-import system.lib.minescript as ms  
 import time
-import keyboard
-import json
-import os
+# taken before anything else is imported, for the startup metrics (launch -> first path)
+LAUNCHED_AT = time.time()
+import system.lib.minescript as ms  
 from berrycake_utils.worlddb import WorldDB
 
+# preload the chunks cached on disk for this world at launch (see warmstart.py)
+WARM_START = False
+
 class BerryCake:
     def __init__(self):
         ms.echo('§4[§c§lBerryCake§c❤§4]§f launched BerryCake')
@@ -12,7 +14,7 @@ class BerryCake:
         self.running = True
 
         # classes that run in main loop
-        self.world_db = WorldDB()
+        self.world_db = WorldDB(warm_start=WARM_START, launched_at=LAUNCHED_AT)
     
 
     def run(self):
@@ -25,5 +27,7 @@ class BerryCake:
 
 
 
-berrycake = BerryCake()
-berrycake.run()
\ No newline at end of file
+# guarded so pathfinding worker processes (pathservice.py) can import this file safely
+if __name__ == '__main__':
+    berrycake = BerryCake()
+    berrycake.run()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import system.lib.minescript as ms
+import time
+from collections import deque
+
+from berrycake_utils.ratelimit import TokenBucket
+
+# vanilla /fill refuses more than this many blocks per command
+FILL_LIMIT = 32768
+
+
+def merge_cuboids(writes, max_volume=FILL_LIMIT):
+    """
+    Greedily merge single-block writes into axis-aligned cuboids.
+
+    For every block type, take the lowest remaining block (y, z, x order),
+    grow it along X as far as the run goes, then along Z while whole rows
+    match, then along Y while whole layers match, never past max_volume.
+
+    Args:
+        writes (dict): {(x, y, z): block_id}.
+        max_volume (int): Largest cuboid allowed.
+
+    Returns:
+        list: [((x0, y0, z0), (x1, y1, z1), block_id), ...] covering every write exactly once.
+    """
+    by_type = {}
+    for coord, block_type in writes.items():
+        by_type.setdefault(block_type, set()).add(tuple(coord))
+
+    cuboids = []
+    for block_type, remaining in by_type.items():
+        for seed in sorted(remaining, key=lambda c: (c[1], c[2], c[0])):
+            if seed not in remaining:
+                continue
+            x0, y0, z0 = seed
+
+            x1 = x0
+            while (x1 + 1, y0, z0) in remaining and x1 + 1 - x0 + 1 <= max_volume:
+                x1 += 1
+            width = x1 - x0 + 1
+
+            z1 = z0
+            while ((z1 + 2 - z0) * width <= max_volume
+                   and all((x, y0, z1 + 1) in remaining for x in range(x0, x1 + 1))):
+                z1 += 1
+            area = width * (z1 - z0 + 1)
+
+            y1 = y0
+            while ((y1 + 2 - y0) * area <= max_volume
+                   and all((x, y1 + 1, z) in remaining
+                           for z in range(z0, z1 + 1) for x in range(x0, x1 + 1))):
+                y1 += 1
+
+            for y in range(y0, y1 + 1):
+                for z in range(z0, z1 + 1):
+                    for x in range(x0, x1 + 1):
+                        remaining.discard((x, y, z))
+            cuboids.append(((x0, y0, z0), (x1, y1, z1), block_type))
+    return cuboids
+
+
+class BatchEditor:
+    """
+    Collects block writes and sends them as few /fill commands as possible.
+
+    GOAL:
+        - Replace one /fill per block with a handful of cuboid /fills.
+        - Never send commands faster than the server's spam limit allows.
+
+    HOW IT WORKS:
+        - add() / add_many() queue writes; a later write to the same block wins.
+        - send() merges the queue with merge_cuboids() and executes commands
+          while the TokenBucket (commands per second) has tokens and the time
+          budget lasts; flush() keeps going until everything is sent.
+    """
+
+    def __init__(self, rate=10.0, burst=8, max_volume=FILL_LIMIT):
+        """
+        Args:
+            rate (float): Commands per second.
+            burst (int): Commands that may go out back to back.
+            max_volume (int): Largest /fill volume.
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.max_volume = max_volume
+        self.writes = {}
+        self.commands = deque()
+        self.stats = {'blocks': 0, 'commands': 0, 'seconds': 0.0}
+
+    def add(self, coord, block_type):
+        self.writes[tuple(int(c) for c in coord)] = block_type
+
+    def add_many(self, writes):
+        """writes: {(x, y, z): block_id} or iterable of ((x, y, z), block_id)."""
+        items = writes.items() if isinstance(writes, dict) else writes
+        for coord, block_type in items:
+            self.add(coord, block_type)
+
+    def pending(self):
+        return len(self.writes) + len(self.commands)
+
+    def _merge(self):
+        if not self.writes:
+            return
+        self.stats['blocks'] += len(self.writes)
+        for (x0, y0, z0), (x1, y1, z1), block_type in merge_cuboids(self.writes, self.max_volume):
+            self.commands.append(f'/fill {x0} {y0} {z0} {x1} {y1} {z1} {block_type}')
+        self.writes = {}
+
+    def send(self, budget=0.05):
+        """
+        Send queued commands for at most ~budget seconds without waiting for tokens.
+
+        Returns:
+            int: number of commands still queued.
+        """
+        start = time.time()
+        self._merge()
+        while self.commands and time.time() - start < budget and self.bucket.take():
+            ms.execute(self.commands.popleft())
+            self.stats['commands'] += 1
+        self.stats['seconds'] += time.time() - start
+        return len(self.commands)
+
+    def flush(self):
+        """Send everything, sleeping between commands as the rate limit requires."""
+        start = time.time()
+        self._merge()
+        while self.commands:
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                time.sleep(wait)
+            if self.bucket.take():
+                ms.execute(self.commands.popleft())
+                self.stats['commands'] += 1
+        self.stats['seconds'] += time.time() - start
@@ -17,15 +17,25 @@ class CameraControl:
         return None
 
     @staticmethod
-    def calculate_orientation(target_pos):
+    def target_entities(target_name='Iron Golem'):
+        """
+        Positions of every entity with that name (see target_entity).
+        Returns a list of (x, y, z), empty if none is around.
+        """
+        return [entity.position for entity in ms.get_entities() if entity.name == target_name]
+
+    @staticmethod
+    def calculate_orientation(target_pos, player_pos=None):
         """
         Calculates yaw and pitch to look at a target position.
+        Pass player_pos when it was already read this tick to save a MineScript call.
         Returns (yaw, pitch) or None if target_pos is None.
         """
         if target_pos is None:
             return None
 
-        player_pos = ms.player_position()
+        if player_pos is None:
+            player_pos = ms.player_position()
 
         dx = target_pos[0] - player_pos[0]
         dy = target_pos[1] - player_pos[1]
@@ -88,4 +98,159 @@ class CameraControl:
             time.sleep(0.006)
         return True
 
+class CameraController:
+    """
+    Non-blocking camera motion, advanced one step per tick.
+
+    GOAL:
+        - Turn the camera smoothly while the player keeps moving.
+        - Let Walker, entity tracking, etc. change the target at any time.
+
+    HOW IT WORKS:
+        - set_target() plans an eased trajectory (cubic Hermite) from the
+          current orientation to the target. The duration follows the
+          angle to turn (speed degrees per second, clamped).
+        - Retargeting mid-motion starts the new trajectory from where the
+          camera is now with its current angular velocity, so the motion
+          never jerks.
+        - step() evaluates the trajectory at the current time and sends one
+          player_set_orientation (with the usual slight jitter) when the
+          camera actually moved. It never sleeps.
+    """
+
+    def __init__(self, speed=360.0, min_duration=0.08, max_duration=0.6, retarget_threshold=1.0,
+                 jitter=(0.3, 0.2)):
+        """
+        Args:
+            speed (float): Turning speed in degrees per second.
+            min_duration (float): Shortest trajectory in seconds.
+            max_duration (float): Longest trajectory in seconds.
+            retarget_threshold (float): look_at() ignores target changes smaller than this (degrees).
+            jitter (tuple): Max random (yaw, pitch) offset added to every sent orientation.
+        """
+        self.speed = speed
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.retarget_threshold = retarget_threshold
+        self.jitter = jitter
+
+        # last orientation sent (without jitter), None until known
+        self.yaw = None
+        self.pitch = None
+        self.target = None
+        self.sent = 0  # number of player_set_orientation calls
+
+        self._origin = (0.0, 0.0)
+        self._delta = (0.0, 0.0)
+        self._velocity = (0.0, 0.0)
+        self._start = 0.0
+        self._duration = 0.0
+
+    @staticmethod
+    def _wrap(angle):
+        while angle > 180:
+            angle -= 360
+        while angle < -180:
+            angle += 360
+        return angle
+
+    def _sample(self, now):
+        """(yaw, pitch, yaw speed, pitch speed, finished) of the trajectory at time now."""
+        duration = self._duration
+        s = (now - self._start) / duration if duration > 0 else 1.0
+        if s >= 1.0:
+            return (self._origin[0] + self._delta[0], self._origin[1] + self._delta[1], 0.0, 0.0, True)
+        s2 = s * s
+        s3 = s2 * s
+        h10 = s3 - 2 * s2 + s
+        h01 = -2 * s3 + 3 * s2
+        d10 = 3 * s2 - 4 * s + 1
+        d01 = -6 * s2 + 6 * s
+        out = []
+        for origin, delta, velocity in zip(self._origin, self._delta, self._velocity):
+            out.append(origin + h10 * duration * velocity + h01 * delta)
+        speeds = [d10 * velocity + d01 * delta / duration for delta, velocity in zip(self._delta, self._velocity)]
+        return out[0], out[1], speeds[0], speeds[1], False
+
+    def moving(self):
+        return self.target is not None
+
+    def set_target(self, orientation, current=None):
+        """
+        Start (or redirect) a trajectory towards orientation (yaw, pitch).
+
+        Args:
+            orientation (tuple): Target (yaw, pitch).
+            current (tuple): Current (yaw, pitch) if already read this tick;
+                only needed before the controller has sent anything.
+        """
+        if orientation is None:
+            return
+        now = time.perf_counter()
+        velocity = (0.0, 0.0)
+        if self.target is not None:
+            yaw, pitch, vyaw, vpitch, finished = self._sample(now)
+            if not finished:
+                velocity = (vyaw, vpitch)
+        elif self.yaw is not None:
+            yaw, pitch = self.yaw, self.pitch
+        else:
+            yaw, pitch = current if current is not None else ms.player_orientation()
+
+        gyaw, gpitch = orientation
+        gpitch = max(-90.0, min(90.0, gpitch))
+        yaw = self._wrap(yaw)
+        delta = (self._wrap(gyaw - yaw), gpitch - pitch)
+
+        angle = max(abs(delta[0]), abs(delta[1]))
+        self._duration = max(self.min_duration, min(self.max_duration, angle / self.speed))
+        self._origin = (yaw, pitch)
+        self._delta = delta
+        self._velocity = velocity
+        self._start = now
+        self.target = (gyaw, gpitch)
+
+    def look_at(self, target_pos, player_pos=None, current=None):
+        """Aim at a world position; small changes of the target orientation are ignored."""
+        orientation = CameraControl.calculate_orientation(target_pos, player_pos)
+        if orientation is None:
+            return None
+        aim = self.target
+        if aim is None and self.yaw is not None:
+            aim = (self.yaw, self.pitch)
+        if (aim is None or abs(self._wrap(orientation[0] - aim[0])) > self.retarget_threshold
+                or abs(orientation[1] - aim[1]) > self.retarget_threshold):
+            self.set_target(orientation, current)
+        return orientation
+
+    def track_entity(self, target_name='Iron Golem', player_pos=None, current=None):
+        """Aim at the named entity (see CameraControl.target_entity). Returns its position or None."""
+        position = CameraControl.target_entity(target_name)
+        if position is not None:
+            self.look_at(position, player_pos, current)
+        return position
+
+    def step(self):
+        """
+        Advance the camera to where the trajectory is now. Call once per tick.
+
+        Returns:
+            bool: True while still turning.
+        """
+        if self.target is None:
+            return False
+        yaw, pitch, _, _, finished = self._sample(time.perf_counter())
+        if finished:
+            self.target = None
+
+        if self.yaw is None or abs(self._wrap(yaw - self.yaw)) > 0.05 or abs(pitch - self.pitch) > 0.05:
+            # Add slight randomization for natural feel
+            ms.player_set_orientation(yaw + random.uniform(-self.jitter[0], self.jitter[0]),
+                                      pitch + random.uniform(-self.jitter[1], self.jitter[1]))
+            self.sent += 1
+        self.yaw = yaw
+        self.pitch = pitch
+        return not finished
+
+
 #CameraControl.lock_target(CameraControl.calculate_orientation(target_pos=CameraControl.target_entity('Iron Golem')))
\ No newline at end of file
@@ -0,0 +1,520 @@
+from array import array
+from collections import Counter
+
+from berrycake_utils.blocks import is_clear, is_support
+
+CHUNK_SIZE = 16  # chunk width along X and Z
+SECTION_HEIGHT = 16
+# heightmap entry for a column without any solid / standable block
+NO_SURFACE = -32768
+
+
+class Chunk:
+    """
+    Compact storage for a single scanned chunk.
+
+    Works like the vanilla chunk format: every distinct block id in the chunk
+    is stored once in a palette, and the blocks themselves are palette
+    indices ordered y -> z -> x.
+
+    The chunk is split into 16-high sections. A section is either a flat
+    uint16 array of palette indices or, when every block in it is the same
+    (all air, all stone...), just that single palette index.
+
+    Palette index 0 is reserved for "nothing stored" so gaps (for example
+    removed air) read back as missing, exactly like a missing dict key.
+
+    Each chunk also keeps a "standable" bitmap (feet and head clear, support
+    solid and not impassable), one int bitmask per Y layer with bit
+    lz * x_size + lx, built on load and patched when blocks change.
+    Two heightmaps (highest solid block and highest standable cell per
+    column) are derived from the same layer masks.
+
+    A block-type index (count per palette id, positions per type on first
+    use) answers "where are the chests in this chunk" without a full scan.
+
+    The class keeps the dict-style API the rest of BerryCake relies on
+    (get / [] / in / keys / items / values / len), so code written against
+    the old {(x, y, z): 'minecraft:...'} chunks keeps working.
+    """
+
+    def __init__(self, origin, x_size=CHUNK_SIZE, y_min=-64, y_max=150, z_size=CHUNK_SIZE):
+        """
+        Create an empty chunk.
+
+        Args:
+            origin (tuple): (x, y, z) key of the chunk in WorldDB.
+            x_size (int): Width of the chunk along X.
+            y_min (int): Lowest absolute Y stored (inclusive).
+            y_max (int): Highest absolute Y stored (exclusive).
+            z_size (int): Width of the chunk along Z.
+        """
+        self.origin = tuple(origin)
+        self.x_size = x_size
+        self.z_size = z_size
+        self.y_min = y_min
+        self.y_max = y_max
+        self.height = y_max - y_min
+        self.layer_size = x_size * z_size
+
+        self.palette = [None]
+        self._palette_ids = {}
+        # one entry per section: int (uniform palette id) or array('H')
+        self.sections = [0] * self.section_count()
+
+        # number of blocks requested from MineScript to build this chunk
+        self.fetched_blocks = 0
+        # time.time() when the scan started, block events after it still apply
+        self.scanned_at = None
+        # sections stored from a sparse probe only (blocks between the probes unknown)
+        self.sampled = set()
+
+        # walkability: standable_layers[ly] for ly in 0..height (None until built)
+        self.standable_layers = None
+        # heightmaps: absolute y per column (index lz * x_size + lx), built with the bitmap
+        self.solid_heights = None
+        self.walkable_heights = None
+
+        # block-type index: {palette id: count} (None until built) and
+        # {palette id: set of coords} for the types asked for so far
+        self.type_counts = None
+        self._type_positions = {}
+        self._clear_flags = []
+        self._support_flags = []
+
+    def volume(self):
+        return self.x_size * self.height * self.z_size
+
+    # ---------------------------------------------------
+    # SECTIONS
+    # ---------------------------------------------------
+
+    def section_count(self):
+        return (self.height + SECTION_HEIGHT - 1) // SECTION_HEIGHT
+
+    def section_bounds(self, section):
+        """Absolute (y_start, y_end) of a section, y_end exclusive."""
+        y0 = self.y_min + section * SECTION_HEIGHT
+        return y0, min(y0 + SECTION_HEIGHT, self.y_max)
+
+    def section_volume(self, section):
+        y0, y1 = self.section_bounds(section)
+        return (y1 - y0) * self.layer_size
+
+    def is_uniform(self, section):
+        return isinstance(self.sections[section], int)
+
+    def section_coords(self, section, xs=None, ys=None, zs=None):
+        """
+        Absolute block coordinates of a section in storage order.
+
+        Args:
+            section (int): Section index.
+            xs, ys, zs (iterable): Optional local offsets to sample instead
+                of every block (ys is relative to the section bottom).
+
+        Returns:
+            list: [[x, y, z], ...] ready to be passed to ms.getblocklist.
+        """
+        x0, _, z0 = self.origin
+        y0, y1 = self.section_bounds(section)
+        xs = range(self.x_size) if xs is None else xs
+        zs = range(self.z_size) if zs is None else zs
+        ys = range(y1 - y0) if ys is None else [y for y in ys if y < y1 - y0]
+        return [[x0 + x, y0 + y, z0 + z] for y in ys for z in zs for x in xs]
+
+    def set_section(self, section, block_types):
+        """
+        Store a whole section.
+
+        Args:
+            section (int): Section index.
+            block_types (str | list): A single block id for a uniform section,
+                or every block id of the section in storage order.
+        """
+        self.standable_layers = None
+        self.type_counts = None
+        self._type_positions = {}
+        self.sampled.discard(section)
+        if isinstance(block_types, str) or block_types is None:
+            self.sections[section] = self._palette_id(block_types)
+            return
+        if len(block_types) != self.section_volume(section):
+            raise ValueError(f'expected {self.section_volume(section)} blocks, got {len(block_types)}')
+        ids = array('H', map(self._palette_id, block_types))
+        if ids.count(ids[0]) == len(ids):
+            self.sections[section] = ids[0]
+        else:
+            self.sections[section] = ids
+
+    def section_ids(self, section):
+        """Palette ids of a section as a flat array (expands uniform sections)."""
+        data = self.sections[section]
+        if isinstance(data, int):
+            return array('H', [data]) * self.section_volume(section)
+        return data
+
+    # ---------------------------------------------------
+    # CONSTRUCTION
+    # ---------------------------------------------------
+
+    def scan_coords(self):
+        """
+        Every absolute block coordinate of the chunk, in storage order.
+
+        Returns:
+            list: [[x, y, z], ...] ready to be passed to ms.getblocklist.
+        """
+        coords = []
+        for section in range(self.section_count()):
+            coords.extend(self.section_coords(section))
+        return coords
+
+    def fill(self, block_types):
+        """
+        Replace the whole chunk with block ids given in storage order
+        (the order returned by scan_coords).
+        """
+        if len(block_types) != self.volume():
+            raise ValueError(f'expected {self.volume()} blocks, got {len(block_types)}')
+        self.palette = [None]
+        self._palette_ids = {}
+        self._clear_flags = []
+        self._support_flags = []
+        start = 0
+        for section in range(self.section_count()):
+            end = start + self.section_volume(section)
+            self.set_section(section, block_types[start:end])
+            start = end
+
+    @classmethod
+    def from_dict(cls, origin, blocks):
+        """
+        Build a chunk from an old-style {(x, y, z): block_type} dictionary.
+        The chunk bounds are taken from the coordinates present.
+        """
+        if not blocks:
+            return cls(origin, 0, 0, 0, 0)
+        xs, ys, zs = zip(*blocks.keys())
+        chunk = cls(origin,
+                    x_size=max(xs) - origin[0] + 1,
+                    y_min=min(ys),
+                    y_max=max(ys) + 1,
+                    z_size=max(zs) - origin[2] + 1)
+        for coord, block_type in blocks.items():
+            chunk[coord] = block_type
+        return chunk
+
+    # ---------------------------------------------------
+    # INDEXING
+    # ---------------------------------------------------
+
+    def _palette_id(self, block_type):
+        if block_type is None:
+            return 0
+        pid = self._palette_ids.get(block_type)
+        if pid is None:
+            pid = len(self.palette)
+            self._palette_ids[block_type] = pid
+            self.palette.append(block_type)
+        return pid
+
+    def _locate(self, coord):
+        """(section, index inside section) of an absolute coordinate, or (-1, -1) if outside."""
+        lx = coord[0] - self.origin[0]
+        ly = coord[1] - self.y_min
+        lz = coord[2] - self.origin[2]
+        if 0 <= lx < self.x_size and 0 <= ly < self.height and 0 <= lz < self.z_size:
+            section, sy = divmod(ly, SECTION_HEIGHT)
+            return section, (sy * self.z_size + lz) * self.x_size + lx
+        return -1, -1
+
+    def _coord(self, section, index):
+        """Absolute coordinate of an index inside a section."""
+        rest, lx = divmod(index, self.x_size)
+        sy, lz = divmod(rest, self.z_size)
+        return (self.origin[0] + lx, self.y_min + section * SECTION_HEIGHT + sy, self.origin[2] + lz)
+
+    def _pid_at(self, coord):
+        section, i = self._locate(coord)
+        if section < 0:
+            return 0
+        data = self.sections[section]
+        if isinstance(data, int):
+            return data
+        return data[i]
+
+    # ---------------------------------------------------
+    # DICT-STYLE API
+    # ---------------------------------------------------
+
+    def get(self, coord, default=None):
+        pid = self._pid_at(coord)
+        if pid == 0:
+            return default
+        return self.palette[pid]
+
+    def __getitem__(self, coord):
+        block_type = self.get(coord)
+        if block_type is None:
+            raise KeyError(coord)
+        return block_type
+
+    def __setitem__(self, coord, block_type):
+        section, i = self._locate(coord)
+        if section < 0:
+            raise KeyError(f'{coord} is outside chunk {self.origin}')
+        pid = self._palette_id(block_type)
+        data = self.sections[section]
+        if isinstance(data, int):
+            if data == pid:
+                return
+            old = data
+            data = self.sections[section] = self.section_ids(section)
+        else:
+            old = data[i]
+            if old == pid:
+                return
+        data[i] = pid
+
+        if self.type_counts is not None:
+            self._update_type_index(tuple(coord), old, pid)
+
+        if self.standable_layers is not None:
+            self._update_walkability(coord[1] - self.y_min)
+            self._update_heights(coord[0] - self.origin[0], coord[2] - self.origin[2])
+
+    def __delitem__(self, coord):
+        if coord not in self:
+            raise KeyError(coord)
+        self[coord] = None
+
+    def __contains__(self, coord):
+        return self._pid_at(coord) != 0
+
+    def __len__(self):
+        count = 0
+        for section, data in enumerate(self.sections):
+            if isinstance(data, int):
+                count += self.section_volume(section) if data else 0
+            else:
+                count += len(data) - data.count(0)
+        return count
+
+    def __iter__(self):
+        return self.keys()
+
+    def items(self):
+        coord = self._coord
+        palette = self.palette
+        for section, data in enumerate(self.sections):
+            if isinstance(data, int):
+                if data:
+                    block_type = palette[data]
+                    for i in range(self.section_volume(section)):
+                        yield coord(section, i), block_type
+                continue
+            for i, pid in enumerate(data):
+                if pid:
+                    yield coord(section, i), palette[pid]
+
+    def keys(self):
+        for coord, _ in self.items():
+            yield coord
+
+    def values(self):
+        for _, block_type in self.items():
+            yield block_type
+
+    # ---------------------------------------------------
+    # WALKABILITY
+    # ---------------------------------------------------
+
+    def _palette_flags(self):
+        """Per palette id '1'/'0' strings for "clear" and "support", kept in step with the palette."""
+        for block_type in self.palette[len(self._clear_flags):]:
+            self._clear_flags.append('1' if is_clear(block_type) else '0')
+            self._support_flags.append('1' if is_support(block_type) else '0')
+        return self._clear_flags, self._support_flags
+
+    def _layer_masks(self, ly):
+        """(clear, support) bitmasks of local layer ly; outside the chunk counts as air."""
+        full = (1 << self.layer_size) - 1
+        if ly < 0 or ly >= self.height:
+            return full, 0
+
+        clear_flags, support_flags = self._palette_flags()
+        section, sy = divmod(ly, SECTION_HEIGHT)
+        data = self.sections[section]
+        if isinstance(data, int):
+            return (full if clear_flags[data] == '1' else 0,
+                    full if support_flags[data] == '1' else 0)
+
+        start = sy * self.layer_size
+        layer = data[start:start + self.layer_size]
+        layer.reverse()  # highest bit first for int(..., 2)
+        clear = int(''.join(map(clear_flags.__getitem__, layer)), 2)
+        support = int(''.join(map(support_flags.__getitem__, layer)), 2)
+        return clear, support
+
+    def build_walkability(self):
+        """(Re)compute the standable bitmap and the heightmaps for the whole chunk."""
+        # masks[i] belongs to local layer i - 1
+        masks = [self._layer_masks(ly) for ly in range(-1, self.height + 2)]
+        self.standable_layers = [masks[ly][1] & masks[ly + 1][0] & masks[ly + 2][0]
+                                 for ly in range(self.height + 1)]
+
+        full = (1 << self.layer_size) - 1
+        self.solid_heights = self._top_layers([full ^ clear for clear, _ in masks[1:self.height + 1]])
+        self.walkable_heights = self._top_layers(self.standable_layers)
+
+    def _top_layers(self, layers):
+        """
+        Highest absolute y per column whose bit is set in layers[ly], as array('h').
+        Works on all columns at once: walks the layers top-down and drops
+        every column from the search mask as soon as it is found.
+        """
+        heights = array('h', [NO_SURFACE]) * self.layer_size
+        remaining = (1 << self.layer_size) - 1
+        for ly in range(len(layers) - 1, -1, -1):
+            hits = layers[ly] & remaining
+            if not hits:
+                continue
+            remaining ^= hits
+            y = self.y_min + ly
+            while hits:
+                low = hits & -hits
+                heights[low.bit_length() - 1] = y
+                hits ^= low
+            if not remaining:
+                break
+        return heights
+
+    def _update_heights(self, lx, lz):
+        """Recompute both heightmaps for one column after a block change."""
+        i = lz * self.x_size + lx
+        clear_flags, _ = self._palette_flags()
+        x = self.origin[0] + lx
+        z = self.origin[2] + lz
+        self.solid_heights[i] = NO_SURFACE
+        for y in range(self.y_max - 1, self.y_min - 1, -1):
+            if clear_flags[self._pid_at((x, y, z))] == '0':
+                self.solid_heights[i] = y
+                break
+        self.walkable_heights[i] = NO_SURFACE
+        for ly in range(len(self.standable_layers) - 1, -1, -1):
+            if (self.standable_layers[ly] >> i) & 1:
+                self.walkable_heights[i] = self.y_min + ly
+                break
+
+    def _update_walkability(self, ly):
+        """Patch the standable layers touched by a block change at local layer ly."""
+        masks = {i: self._layer_masks(i) for i in range(ly - 2, ly + 3)}
+        for i in range(max(ly - 1, 0), min(ly + 1, self.height) + 1):
+            self.standable_layers[i] = masks[i - 1][1] & masks[i][0] & masks[i + 1][0]
+
+    def is_standable(self, x, y, z):
+        """True if a 2-block-high player can stand with their feet at (x, y, z)."""
+        layers = self.standable_layers
+        if layers is None:
+            self.build_walkability()
+            layers = self.standable_layers
+        ly = y - self.y_min
+        lx = x - self.origin[0]
+        lz = z - self.origin[2]
+        if 0 <= ly <= self.height and 0 <= lx < self.x_size and 0 <= lz < self.z_size:
+            return (layers[ly] >> (lz * self.x_size + lx)) & 1 == 1
+        return False
+
+    def surface(self, x, z, walkable=False):
+        """
+        Highest solid block y (or, with walkable, highest standable feet y)
+        of column (x, z); None outside the chunk or if the column has none.
+        """
+        if self.standable_layers is None:
+            self.build_walkability()
+        lx = x - self.origin[0]
+        lz = z - self.origin[2]
+        if not (0 <= lx < self.x_size and 0 <= lz < self.z_size):
+            return None
+        y = (self.walkable_heights if walkable else self.solid_heights)[lz * self.x_size + lx]
+        return None if y == NO_SURFACE else y
+
+    # ---------------------------------------------------
+    # BLOCK TYPE INDEX
+    # ---------------------------------------------------
+
+    def build_type_index(self):
+        """Count the blocks of every palette id; positions are collected per type on first use."""
+        counts = Counter()
+        for section, data in enumerate(self.sections):
+            if isinstance(data, int):
+                counts[data] += self.section_volume(section)
+            else:
+                counts.update(data)
+        counts.pop(0, None)
+        self.type_counts = dict(counts)
+        self._type_positions = {}
+
+    def _update_type_index(self, coord, old, new):
+        counts = self.type_counts
+        if old:
+            counts[old] = counts.get(old, 0) - 1
+            if old in self._type_positions:
+                self._type_positions[old].discard(coord)
+        if new:
+            counts[new] = counts.get(new, 0) + 1
+            if new in self._type_positions:
+                self._type_positions[new].add(coord)
+
+    def count_of(self, block_type):
+        """Number of blocks of block_type stored in this chunk."""
+        if self.type_counts is None:
+            self.build_type_index()
+        pid = self._palette_ids.get(block_type)
+        return self.type_counts.get(pid, 0) if pid is not None else 0
+
+    def positions_of(self, block_type):
+        """
+        Every coordinate holding block_type, as a set (kept up to date by
+        later writes; do not modify it). Mixed sections are searched with
+        bytes.find on the raw uint16 data instead of a Python loop.
+        """
+        if not self.count_of(block_type):
+            return set()
+        pid = self._palette_ids[block_type]
+        positions = self._type_positions.get(pid)
+        if positions is not None:
+            return positions
+
+        positions = set()
+        coord = self._coord
+        pattern = array('H', [pid]).tobytes()
+        for section, data in enumerate(self.sections):
+            if isinstance(data, int):
+                if data == pid:
+                    positions.update(coord(section, i) for i in range(self.section_volume(section)))
+                continue
+            raw = data.tobytes()
+            i = raw.find(pattern)
+            while i >= 0:
+                if i % 2:
+                    # match straddles two entries
+                    i = raw.find(pattern, i + 1)
+                    continue
+                positions.add(coord(section, i // 2))
+                i = raw.find(pattern, i + 2)
+        self._type_positions[pid] = positions
+        return positions
+
+    def memory_usage(self):
+        """Approximate bytes used by the section arrays and palette references."""
+        size = 8 * len(self.palette)
+        for data in self.sections:
+            size += 8 if isinstance(data, int) else data.itemsize * len(data)
+        return size
+
+    def __repr__(self):
+        uniform = sum(1 for s in range(len(self.sections)) if self.is_uniform(s))
+        return (f'Chunk(origin={self.origin}, palette={len(self.palette) - 1}, '
+                f'sections={len(self.sections)} ({uniform} uniform))')
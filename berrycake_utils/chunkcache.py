@@ -0,0 +1,221 @@
+import os
+import time
+
+from berrycake_utils.chunkstore import ChunkStore
+
+# chunks kept loaded past the load radius before any can be evicted (hysteresis band)
+UNLOAD_MARGIN = 2
+# seconds of idle time one chunk of distance from the player is worth when ranking evictions
+DISTANCE_WEIGHT = 2.0
+# without max_chunks / max_bytes, keep up to this many times the chunks of the band
+AUTO_BUDGET_FACTOR = 2
+
+
+class ChunkCache:
+    """
+    Decides which chunks WorldDB keeps in memory and keeps the evicted ones on disk.
+
+    GOAL:
+        - Walking back and forth or changing the render distance must not
+          throw away chunks that are needed again seconds later.
+        - Bound the memory held by chunks outside the render distance.
+        - Make re-entering a recently visited area (nearly) free: from
+          memory while the chunk is still held, else from the spill store
+          instead of a MineScript rescan.
+
+    HOW IT WORKS:
+        - Chunks within the load radius + unload_margin (the band) are never
+          evicted, so a chunk loaded at the edge is not dropped again one
+          step later.
+        - Chunks beyond the band stay loaded while the cache is within
+          budget: max_chunks and / or max_bytes (Chunk.memory_usage()).
+          max_chunks=None keeps AUTO_BUDGET_FACTOR times the band, 0 evicts
+          everything beyond the band.
+        - Over budget, chunks are evicted highest score first: seconds since
+          the chunk was last inside the band + distance_weight * its chunk
+          distance from the player (distance_weight=0 is plain LRU).
+        - spill() writes evicted chunks to a ChunkStore with their eviction
+          time; restore() reads them back. WorldDB replays the ChangeJournal
+          since that time, so a restored chunk comes back current without a
+          scan. Chunks the client reloaded while spilled are distrust()ed and
+          get rescanned.
+    """
+
+    def __init__(self, chunk_size=16, max_chunks=None, max_bytes=None, unload_margin=UNLOAD_MARGIN,
+                 distance_weight=DISTANCE_WEIGHT, layout=None, store=None, spill_path=None):
+        """
+        Args:
+            chunk_size (int): Chunk width in blocks.
+            max_chunks (int): Chunks kept in memory (None = automatic, 0 = only the band).
+            max_bytes (int): Approximate bytes of chunk data kept in memory (None = no limit).
+            unload_margin (int): Chunks kept past the load radius before eviction.
+            distance_weight (float): Idle seconds one chunk of distance counts for.
+            layout (tuple): (x_size, y_min, y_max, z_size) restored chunks must match.
+            store (ChunkStore): Store evicted chunks are spilled to (e.g. the warm-start cache).
+            spill_path (str): Without store, spill to a session store at this path
+                (emptied on open, deleted on close).
+        """
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.max_bytes = max_bytes
+        self.unload_margin = unload_margin
+        self.distance_weight = distance_weight
+        self.layout = layout
+
+        self.store = store
+        self._spill_path = None
+        if store is None and spill_path:
+            self._spill_path = spill_path[:-4] if spill_path.endswith('.bcr') else spill_path
+            self._remove_spill_files()
+            self.store = ChunkStore(self._spill_path)
+
+        self.last_seen = {}     # {chunk_origin: time.time() it was last inside the band}
+        self.sizes = {}         # {chunk_origin: approximate bytes}
+        self.spilled = {}       # {chunk_origin: time.time() it was evicted} for trusted spills
+        self.retained = set()   # loaded chunks past the band (the client may not have them loaded)
+        self._resize = set()    # loaded / changed chunks whose size must be measured again
+        self.stats = {'evicted': 0, 'spilled': 0, 'restored': 0, 'retained': 0, 'bytes': 0}
+
+    # ---------------------------------------------------
+    # LISTENERS (WorldDB chunk ready / unload / change)
+    # ---------------------------------------------------
+
+    def loaded(self, chunk_origin):
+        self.last_seen[chunk_origin] = time.time()
+        self._resize.add(chunk_origin)
+
+    def changed(self, chunk_origin):
+        self._resize.add(chunk_origin)
+
+    def unloaded(self, chunk_origin):
+        self.retained.discard(chunk_origin)
+        self.last_seen.pop(chunk_origin, None)
+        self.sizes.pop(chunk_origin, None)
+        self._resize.discard(chunk_origin)
+
+    # ---------------------------------------------------
+    # EVICTION
+    # ---------------------------------------------------
+
+    def distance(self, chunk_origin, pos):
+        """Chunk distance (the larger of the X / Z chunk offsets) between a chunk and a block position."""
+        size = self.chunk_size
+        return max(abs(chunk_origin[0] // size - pos[0] // size), abs(chunk_origin[2] // size - pos[2] // size))
+
+    def band(self, load_radius):
+        return load_radius + self.unload_margin
+
+    def outside_band(self, chunk_origins, pos, load_radius):
+        band = self.band(load_radius)
+        return [origin for origin in chunk_origins if self.distance(origin, pos) > band]
+
+    def budget(self, load_radius):
+        """Chunks that may stay in memory for this load radius."""
+        if self.max_chunks is not None:
+            return self.max_chunks
+        if self.max_bytes is not None:
+            return None
+        return AUTO_BUDGET_FACTOR * (2 * self.band(load_radius) + 1) ** 2
+
+    def evictions(self, world_db, pos, load_radius):
+        """
+        Chunks to evict, in order, to bring the loaded chunks within budget.
+        Chunks inside the band are never returned.
+
+        Args:
+            world_db (dict): {chunk_origin: Chunk} currently loaded.
+            pos (list): Player position [x, y, z].
+            load_radius (int): Chunk radius WorldDB loads around the player.
+
+        Returns:
+            list: chunk origins, most evictable first.
+        """
+        now = time.time()
+        band = self.band(load_radius)
+        for origin in self._resize:
+            chunk = world_db.get(origin)
+            if chunk is not None:
+                self.sizes[origin] = chunk.memory_usage()
+        self._resize.clear()
+
+        candidates = []
+        for origin in world_db:
+            distance = self.distance(origin, pos)
+            if distance <= band:
+                self.last_seen[origin] = now
+            else:
+                idle = now - self.last_seen.get(origin, now)
+                candidates.append((idle + self.distance_weight * distance, origin))
+
+        count = len(world_db)
+        used = sum(self.sizes.values())
+        max_chunks = self.budget(load_radius)
+        candidates.sort(reverse=True)
+        evict = []
+        for _, origin in candidates:
+            if (max_chunks is None or count <= max_chunks) and (self.max_bytes is None or used <= self.max_bytes):
+                break
+            evict.append(origin)
+            count -= 1
+            used -= self.sizes.get(origin, 0)
+
+        self.retained = {origin for _, origin in candidates}.difference(evict)
+        self.stats['retained'] = len(self.retained)
+        self.stats['bytes'] = used
+        return evict
+
+    # ---------------------------------------------------
+    # SPILLING
+    # ---------------------------------------------------
+
+    def spill(self, chunk_origin, chunk):
+        """Note an evicted chunk and write it to the spill store (if any)."""
+        self.stats['evicted'] += 1
+        if self.store is None:
+            return
+        self.store.write(chunk, chunk_origin)
+        self.spilled[chunk_origin] = time.time()
+        self.stats['spilled'] += 1
+
+    def can_restore(self, chunk_origin):
+        return self.store is not None and chunk_origin in self.store
+
+    def restore(self, chunk_origin):
+        """
+        Read a chunk back from the spill store.
+
+        Returns:
+            tuple: (Chunk, evicted_at) - evicted_at is None when the stored copy
+            is not known to be current (spilled in an earlier session, or
+            distrusted); (None, None) when there is no usable copy.
+        """
+        if not self.can_restore(chunk_origin):
+            return None, None
+        chunk = self.store.read(chunk_origin)
+        if self.layout is not None and (chunk.x_size, chunk.y_min, chunk.y_max, chunk.z_size) != self.layout:
+            return None, None
+        self.stats['restored'] += 1
+        return chunk, self.spilled.pop(chunk_origin, None)
+
+    def distrust(self, chunk_origin):
+        """The stored copy may have missed changes (e.g. the client reloaded the chunk)."""
+        self.spilled.pop(chunk_origin, None)
+
+    def detach(self):
+        """Stop spilling to a store owned by someone else (it is being closed)."""
+        if self._spill_path is None:
+            self.store = None
+            self.spilled.clear()
+
+    def _remove_spill_files(self):
+        for path in (self._spill_path + '.bcr', self._spill_path + '.bci'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        """Close and delete the session spill store (a shared store is left alone)."""
+        if self._spill_path is None or self.store is None:
+            return
+        self.store.close()
+        self.store = None
+        self._remove_spill_files()
@@ -0,0 +1,181 @@
+import heapq
+import threading
+import time
+from collections import deque
+
+# errors a scan may hit when MineScript fails a call or stops answering (replays
+# re-raise recorded failures as RuntimeError); anything else is a bug and propagates
+SCAN_ERRORS = (RuntimeError, TimeoutError, OSError)
+
+
+class ChunkStreamer:
+    """
+    Loads missing chunks in the background, nearest chunk first.
+
+    GOAL:
+        - Never stall the main loop on a full render-distance rescan.
+        - Load the chunk under the player before the ones far away.
+
+    HOW IT WORKS:
+        - update() receives the chunks that are still missing plus the
+          player position, and keeps them in a priority queue ordered by
+          distance to the player.
+        - A worker thread (or, with threaded=False, the caller inside
+          collect()) pops the nearest chunk and scans it.
+        - Finished chunks are handed back through collect() so the
+          database is only ever modified from the main loop.
+        - A scan failing with one of scan_errors is counted, reported to
+          on_error and retried on a later update(); other errors propagate.
+    """
+
+    def __init__(self, scan_chunk, threaded=True, chunk_size=16, scan_errors=SCAN_ERRORS, on_error=None):
+        """
+        Args:
+            scan_chunk (callable): scan_chunk(origin) -> Chunk, does the MineScript scan.
+            threaded (bool): Scan on a worker thread instead of time-slicing collect().
+            chunk_size (int): Chunk width, used to find chunk centres.
+            scan_errors (tuple): Exception types that only fail the one scan.
+            on_error (callable): on_error(origin, error) called for each failed scan.
+        """
+        self.scan_chunk = scan_chunk
+        self.threaded = threaded
+        self.chunk_size = chunk_size
+        self.scan_errors = scan_errors
+        self.on_error = on_error
+        self.stats = {'scanned': 0, 'failed': 0}
+
+        self._heap = []             # [(distance_sq, origin)]
+        self._wanted = set()        # chunks the caller still needs
+        self._in_flight = set()     # chunks currently being scanned
+        self._done = deque()        # [(origin, chunk)] waiting for collect()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._running = False
+
+    # ---------------------------------------------------
+    # QUEUE
+    # ---------------------------------------------------
+
+    def _distance_sq(self, origin, player_pos):
+        half = self.chunk_size / 2
+        dx = origin[0] + half - player_pos[0]
+        dz = origin[2] + half - player_pos[2]
+        return dx * dx + dz * dz
+
+    def update(self, missing, player_pos):
+        """
+        Replace the set of chunks to load and re-sort them by distance.
+
+        Args:
+            missing (iterable): Chunk origins that are not loaded yet.
+            player_pos (list): Current player position [x, y, z].
+        """
+        with self._cond:
+            self._wanted = set(missing)
+            self._heap = [(self._distance_sq(origin, player_pos), origin)
+                          for origin in self._wanted if origin not in self._in_flight]
+            heapq.heapify(self._heap)
+            if self._heap:
+                self._cond.notify_all()
+
+        if self.threaded:
+            self._ensure_worker()
+
+    def pending(self):
+        """Number of chunks queued or being scanned."""
+        with self._cond:
+            return len(self._heap) + len(self._in_flight)
+
+    def _pop_nearest(self):
+        """Pop the nearest wanted chunk and mark it in flight (lock must be held)."""
+        while self._heap:
+            _, origin = heapq.heappop(self._heap)
+            if origin in self._wanted and origin not in self._in_flight:
+                self._in_flight.add(origin)
+                return origin
+        return None
+
+    def _scan(self, origin):
+        chunk = None
+        try:
+            chunk = self.scan_chunk(origin)
+        except self.scan_errors as e:
+            self.stats['failed'] += 1
+            if self.on_error is not None:
+                self.on_error(origin, e)
+        finally:
+            with self._cond:
+                self._in_flight.discard(origin)
+                if chunk is not None:
+                    self.stats['scanned'] += 1
+                    self._done.append((origin, chunk))
+                self._cond.notify_all()
+
+    # ---------------------------------------------------
+    # WORKER THREAD
+    # ---------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._running = True
+        self._worker = threading.Thread(target=self._work, name='berrycake-chunk-streamer', daemon=True)
+        self._worker.start()
+
+    def _work(self):
+        while self._running:
+            with self._cond:
+                origin = self._pop_nearest()
+                if origin is None:
+                    self._cond.wait(0.25)
+                    continue
+            self._scan(origin)
+
+    def stop(self):
+        """Stop the worker thread after its current scan."""
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+
+    # ---------------------------------------------------
+    # MAIN LOOP SIDE
+    # ---------------------------------------------------
+
+    def collect(self, budget=0.05):
+        """
+        Hand back finished chunks, spending at most ~budget seconds.
+
+        With threaded=False the scans themselves happen here, nearest
+        first, until the budget is used up (at least one scan per call).
+
+        Returns:
+            list: [(origin, Chunk)] ready to be added to the database.
+        """
+        deadline = time.time() + budget
+
+        if not self.threaded:
+            while True:
+                with self._cond:
+                    origin = self._pop_nearest()
+                if origin is None:
+                    break
+                self._scan(origin)
+                if time.time() >= deadline:
+                    break
+
+        ready = []
+        with self._cond:
+            while self._done:
+                origin, chunk = self._done.popleft()
+                # drop chunks that were unloaded while they were being scanned
+                if origin in self._wanted:
+                    self._wanted.discard(origin)
+                    ready.append((origin, chunk))
+        return ready
+
+    def wait_for_any(self, timeout):
+        """Block until a scanned chunk is waiting in collect() or timeout passes."""
+        with self._cond:
+            if not self._done:
+                self._cond.wait(timeout)
+            return bool(self._done)
@@ -0,0 +1,319 @@
+"""
+Binary on-disk chunk store.
+
+FILES:
+    <name>.bcr  - data file, header followed by one record per chunk write
+    <name>.bci  - index, (chunk origin -> offset, length, flags) for random access
+
+RECORD (optionally zlib-compressed):
+    header      ox, oy, oz, x_size, y_min, y_max, z_size, palette size, section count
+    palette     u16 length + utf-8 bytes for every palette entry after index 0
+    sections    one kind byte each, then
+                  KIND_UNIFORM : u16 palette id
+                  KIND_U8      : one byte per block (palette < 256)
+                  KIND_U16     : two bytes per block, little-endian
+
+Rewriting a chunk appends a new record and moves the index entry; compact()
+rewrites the data file without the stale records.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from berrycake_utils.chunk import CHUNK_SIZE, Chunk
+
+DATA_MAGIC = b'BCRG'
+INDEX_MAGIC = b'BCRI'
+FORMAT_VERSION = 1
+
+_FILE_HEADER = struct.Struct('<4sH')
+_RECORD_HEADER = struct.Struct('<iiiiiiiHH')
+_INDEX_ENTRY = struct.Struct('<iiiQIB')
+_U16 = struct.Struct('<H')
+
+KIND_UNIFORM = 0
+KIND_U8 = 1
+KIND_U16 = 2
+
+FLAG_ZLIB = 1
+
+
+def encode_chunk(chunk):
+    """Serialize a Chunk to bytes (uncompressed)."""
+    parts = [_RECORD_HEADER.pack(chunk.origin[0], chunk.origin[1], chunk.origin[2],
+                                 chunk.x_size, chunk.y_min, chunk.y_max, chunk.z_size,
+                                 len(chunk.palette) - 1, len(chunk.sections))]
+    for block_type in chunk.palette[1:]:
+        raw = (block_type or '').encode('utf-8')
+        parts.append(_U16.pack(len(raw)))
+        parts.append(raw)
+
+    narrow = len(chunk.palette) <= 256
+    for data in chunk.sections:
+        if isinstance(data, int):
+            parts.append(bytes((KIND_UNIFORM,)))
+            parts.append(_U16.pack(data))
+        elif narrow:
+            parts.append(bytes((KIND_U8,)))
+            parts.append(array('B', data).tobytes())
+        else:
+            parts.append(bytes((KIND_U16,)))
+            ids = array('H', data)
+            if sys.byteorder == 'big':
+                ids.byteswap()
+            parts.append(ids.tobytes())
+    return b''.join(parts)
+
+
+def decode_chunk(raw):
+    """Rebuild a Chunk from bytes produced by encode_chunk."""
+    view = memoryview(raw)
+    ox, oy, oz, x_size, y_min, y_max, z_size, palette_size, section_count = _RECORD_HEADER.unpack_from(view, 0)
+    pos = _RECORD_HEADER.size
+
+    chunk = Chunk((ox, oy, oz), x_size=x_size, y_min=y_min, y_max=y_max, z_size=z_size)
+    for _ in range(palette_size):
+        (length,) = _U16.unpack_from(view, pos)
+        pos += 2
+        chunk._palette_id(bytes(view[pos:pos + length]).decode('utf-8'))
+        pos += length
+
+    for section in range(section_count):
+        kind = view[pos]
+        pos += 1
+        if kind == KIND_UNIFORM:
+            (chunk.sections[section],) = _U16.unpack_from(view, pos)
+            # the store does not say whether it was fetched in full or probed
+            chunk.sampled.add(section)
+            pos += 2
+            continue
+        count = chunk.section_volume(section)
+        if kind == KIND_U8:
+            narrow = array('B')
+            narrow.frombytes(view[pos:pos + count])
+            chunk.sections[section] = array('H', narrow)
+            pos += count
+        else:
+            ids = array('H')
+            ids.frombytes(view[pos:pos + 2 * count])
+            if sys.byteorder == 'big':
+                ids.byteswap()
+            chunk.sections[section] = ids
+            pos += 2 * count
+    return chunk
+
+
+class ChunkStore:
+    """
+    Random-access binary store for chunks, read through mmap.
+
+    Only the index is loaded on open; each read() maps straight to one
+    record, so a single chunk can be loaded without touching the rest of
+    the world.
+    """
+
+    def __init__(self, filename, compress=True):
+        """
+        Open (or create) a store.
+
+        Args:
+            filename (str): Path without extension, or ending in .bcr.
+            compress (bool): zlib-compress new records.
+        """
+        base = filename[:-4] if filename.endswith('.bcr') else filename
+        self.data_path = base + '.bcr'
+        self.index_path = base + '.bci'
+        self.compress = compress
+
+        # {chunk_origin: (offset, length, flags)}
+        self.index = {}
+        self._file = None
+        self._map = None
+        self._dirty = False
+
+        self._open()
+
+    # ---------------------------------------------------
+    # FILES
+    # ---------------------------------------------------
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.data_path))
+        os.makedirs(directory, exist_ok=True)
+
+        if not os.path.exists(self.data_path):
+            with open(self.data_path, 'wb') as f:
+                f.write(_FILE_HEADER.pack(DATA_MAGIC, FORMAT_VERSION))
+            self._dirty = True
+
+        self._file = open(self.data_path, 'r+b')
+        magic, version = _FILE_HEADER.unpack(self._file.read(_FILE_HEADER.size))
+        if magic != DATA_MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{self.data_path} is not a BerryCake chunk store (v{FORMAT_VERSION})')
+
+        if os.path.exists(self.index_path):
+            self._read_index()
+
+    def _read_index(self):
+        with open(self.index_path, 'rb') as f:
+            raw = f.read()
+        magic, version = _FILE_HEADER.unpack_from(raw, 0)
+        if magic != INDEX_MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{self.index_path} is not a BerryCake chunk index (v{FORMAT_VERSION})')
+        for ox, oy, oz, offset, length, flags in _INDEX_ENTRY.iter_unpack(raw[_FILE_HEADER.size:]):
+            self.index[(ox, oy, oz)] = (offset, length, flags)
+
+    def _write_index(self):
+        parts = [_FILE_HEADER.pack(INDEX_MAGIC, FORMAT_VERSION)]
+        for (ox, oy, oz), (offset, length, flags) in self.index.items():
+            parts.append(_INDEX_ENTRY.pack(ox, oy, oz, offset, length, flags))
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def _mapped(self, end):
+        """Return an mmap covering at least `end` bytes of the data file."""
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def flush(self):
+        """Write pending data and the index to disk."""
+        self._file.flush()
+        if self._dirty:
+            self._write_index()
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------------------------------------------
+    # CHUNKS
+    # ---------------------------------------------------
+
+    def __contains__(self, chunk_origin):
+        return tuple(chunk_origin) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def origins(self):
+        return list(self.index.keys())
+
+    def write(self, chunk, chunk_origin=None):
+        """Append a chunk record and point the index at it."""
+        chunk_origin = tuple(chunk_origin or chunk.origin)
+        payload = encode_chunk(chunk)
+        flags = 0
+        if self.compress:
+            payload = zlib.compress(payload, 6)
+            flags |= FLAG_ZLIB
+
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(payload)
+        self.index[chunk_origin] = (offset, len(payload), flags)
+        self._dirty = True
+
+    def read(self, chunk_origin):
+        """
+        Load one chunk through mmap.
+
+        Returns:
+            Chunk or None if the chunk is not in the store.
+        """
+        entry = self.index.get(tuple(chunk_origin))
+        if entry is None:
+            return None
+        offset, length, flags = entry
+        mapped = self._mapped(offset + length)
+        payload = mapped[offset:offset + length]
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        return decode_chunk(payload)
+
+    def read_near(self, pos, radius, chunk_size=CHUNK_SIZE):
+        """
+        Load every stored chunk whose centre is within `radius` blocks (XZ)
+        of pos.
+
+        Args:
+            chunk_size (int): Chunk width, to find the centre from the origin.
+
+        Returns:
+            dict: {chunk_origin: Chunk}
+        """
+        half = chunk_size / 2
+        chunks = {}
+        for origin in self.index:
+            if abs(origin[0] + half - pos[0]) <= radius and abs(origin[2] + half - pos[2]) <= radius:
+                chunks[origin] = self.read(origin)
+        return chunks
+
+    def compact(self):
+        """Rewrite the data file so it only holds the live record of every chunk."""
+        self.flush()
+        # map up to the last record: a map made before later writes would be too short
+        mapped = self._mapped(max((offset + length for offset, length, _ in self.index.values()), default=0))
+        tmp_path = self.data_path + '.tmp'
+        new_index = {}
+        with open(tmp_path, 'wb') as f:
+            f.write(_FILE_HEADER.pack(DATA_MAGIC, FORMAT_VERSION))
+            for origin, (offset, length, flags) in self.index.items():
+                new_index[origin] = (f.tell(), length, flags)
+                f.write(mapped[offset:offset + length])
+
+        self._map.close()
+        self._map = None
+        self._file.close()
+        os.replace(tmp_path, self.data_path)
+        self._file = open(self.data_path, 'r+b')
+        self.index = new_index
+        self._write_index()
+
+
+def migrate_json(json_path, store):
+    """
+    Convert a world dump written by WorldDB.save_to_json into a ChunkStore.
+
+    Args:
+        json_path (str): Path of the JSON dump.
+        store (ChunkStore): Destination store (flushed afterwards).
+
+    Returns:
+        int: number of chunks migrated.
+    """
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+
+    for chunk_key, blocks in data.items():
+        chunk_origin = tuple(map(int, chunk_key.split(',')))
+        block_dict = {
+            tuple(map(int, b_key.split(','))): block_type
+            for b_key, block_type in blocks.items()
+        }
+        store.write(Chunk.from_dict(chunk_origin, block_dict), chunk_origin)
+
+    store.flush()
+    return len(data)
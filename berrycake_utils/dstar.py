@@ -0,0 +1,263 @@
+import heapq
+import math
+import time
+
+from berrycake_utils import search
+
+INF = math.inf
+# heuristic scale / offset that keep it strictly admissible under float rounding
+H_DEFLATE = 1 - 1e-9
+H_DEFLATE_ABS = 1e-9
+
+
+class IncrementalPlanner:
+    """
+    D* Lite planner that keeps its search tree between replans.
+
+    GOAL:
+        - Repair the route after the Walker gets stuck instead of running a
+          new A* from scratch every time.
+        - Repath cost should follow the size of the change, not the route.
+
+    HOW IT WORKS:
+        - Searches backwards from the goal, so g(cell) is the cost from that
+          cell to the goal and stays valid when the player moves.
+        - replan(start, changed) shifts the key modifier (km) for the new
+          start and only re-evaluates the cells around the changed ones.
+        - Walkability answers are cached per cell; cells passed to replan()
+          as changed or blocked are re-read from the world.
+    """
+
+    def __init__(self, goal, standable, max_nodes=2500000, timeout=15.0):
+        """
+        Args:
+            goal (tuple): (x, y, z) goal cell.
+            standable (callable): standable(x, y, z) -> bool.
+            max_nodes (int): Expansion limit per plan / replan.
+            timeout (float): Time limit per plan / replan in seconds.
+        """
+        self.goal = tuple(map(int, goal))
+        self.goal_key = search.pack(*self.goal)
+        self.standable = standable
+        self.max_nodes = max_nodes
+        self.timeout = timeout
+
+        # cells the caller marked as unwalkable (e.g. where the Walker got stuck)
+        self.blocked = set()
+        self._walkable_cache = {}
+
+        self.g = {}
+        self.rhs = {self.goal_key: 0.0}
+        self.km = 0.0
+        self.start = None
+        self.start_key = None
+        self._open = {}   # {key: queue key}, entries in _heap not in here are stale
+        self._heap = []
+
+        # stats of the last plan/replan
+        self.nodes_expanded = 0
+
+    # ---------------------------------------------------
+    # GRAPH
+    # ---------------------------------------------------
+
+    def _walkable(self, key):
+        ok = self._walkable_cache.get(key)
+        if ok is None:
+            ok = key not in self.blocked and self.standable(*search.unpack(key))
+            self._walkable_cache[key] = ok
+        return ok
+
+    def _moves(self, key, reverse=False):
+        """
+        Valid moves out of (or, with reverse, into) a cell.
+
+        Yields:
+            (other key, cost of the move)
+        """
+        if not self._walkable(key):
+            return
+        for dx, dy, dz, dkey, cost, corner in search.NEIGHBOURS:
+            other = key + dkey
+            if not self._walkable(other):
+                continue
+            if corner and not (self._walkable(key + corner[0]) and self._walkable(key + corner[1])):
+                continue
+            if reverse and dy:
+                # other -> key climbs when dy < 0
+                cost += search.CLIMB_PENALTY if dy < 0 else -search.CLIMB_PENALTY
+            yield other, cost
+
+    def _h(self, key):
+        sx, sy, sz = self.start
+        x, y, z = search.unpack(key)
+        # octile is exact along straight runs, so a float sum of move costs can
+        # come out one ulp below it; deflate it so the stop test in _compute()
+        # never fires before the start is settled
+        return search.octile(x - sx, y - sy, z - sz) * H_DEFLATE - H_DEFLATE_ABS
+
+    def _key(self, key):
+        best = min(self.g.get(key, INF), self.rhs.get(key, INF))
+        return (best + self._h(key) + self.km, best)
+
+    def _update_vertex(self, key):
+        if key != self.goal_key:
+            best = INF
+            g = self.g
+            for other, cost in self._moves(key):
+                value = cost + g.get(other, INF)
+                if value < best:
+                    best = value
+            if best == INF:
+                self.rhs.pop(key, None)
+            else:
+                self.rhs[key] = best
+
+        if self.g.get(key, INF) != self.rhs.get(key, INF):
+            queue_key = self._key(key)
+            self._open[key] = queue_key
+            heapq.heappush(self._heap, (queue_key, key))
+        else:
+            self._open.pop(key, None)
+
+    def _top(self):
+        """Smallest live queue entry, dropping stale ones."""
+        heap = self._heap
+        while heap:
+            queue_key, key = heap[0]
+            if self._open.get(key) == queue_key:
+                return queue_key, key
+            heapq.heappop(heap)
+        return None, None
+
+    def _compute(self):
+        """Expand until the start is consistent. Returns False on limit / timeout."""
+        deadline = time.time() + self.timeout
+        nodes = 0
+        start_key = self.start_key
+        while True:
+            top_key, key = self._top()
+            if key is None:
+                break
+            if top_key >= self._key(start_key) and self.rhs.get(start_key, INF) == self.g.get(start_key, INF):
+                break
+
+            nodes += 1
+            if nodes > self.max_nodes or (not nodes & 1023 and time.time() > deadline):
+                self.nodes_expanded = nodes
+                return False
+
+            new_key = self._key(key)
+            if top_key < new_key:
+                self._open[key] = new_key
+                heapq.heappush(self._heap, (new_key, key))
+                continue
+
+            heapq.heappop(self._heap)
+            del self._open[key]
+            g_old = self.g.get(key, INF)
+            rhs = self.rhs.get(key, INF)
+            if g_old > rhs:
+                self.g[key] = rhs
+                for other, _ in self._moves(key, reverse=True):
+                    self._update_vertex(other)
+            else:
+                self.g.pop(key, None)
+                self._update_vertex(key)
+                for other, _ in self._moves(key, reverse=True):
+                    self._update_vertex(other)
+
+        self.nodes_expanded = nodes
+        return True
+
+    # ---------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------
+
+    def plan(self, start):
+        """
+        First search from start to the goal.
+
+        Returns:
+            list: [(x, y, z), ...] from start to goal, or [] if none.
+        """
+        self.start = tuple(map(int, start))
+        self.start_key = search.pack(*self.start)
+        if not self._heap and not self.g:
+            queue_key = self._key(self.goal_key)
+            self._open[self.goal_key] = queue_key
+            heapq.heappush(self._heap, (queue_key, self.goal_key))
+        if not self._compute():
+            return []
+        return self.path()
+
+    def replan(self, start, changed=(), blocked=()):
+        """
+        Repair the existing search after moving and/or world changes.
+
+        Args:
+            start (tuple): New (x, y, z) start (current player cell).
+            changed (iterable): Cells whose block changed (placed / broken).
+            blocked (iterable): Cells to treat as unwalkable from now on.
+
+        Returns:
+            list: [(x, y, z), ...] from start to goal, or [] if none.
+        """
+        if self.start is None:
+            self.blocked.update(search.pack(*map(int, c)) for c in blocked)
+            return self.plan(start)
+
+        new_start = tuple(map(int, start))
+        self.km += search.octile(new_start[0] - self.start[0],
+                                 new_start[1] - self.start[1],
+                                 new_start[2] - self.start[2])
+        self.start = new_start
+        self.start_key = search.pack(*new_start)
+
+        # a block change at (x, y, z) changes whether (x, y - 1, z) (head),
+        # (x, y, z) (feet) and (x, y + 1, z) (support) are standable
+        touched = set()
+        for cell in blocked:
+            key = search.pack(*map(int, cell))
+            if key != self.goal_key:
+                self.blocked.add(key)
+                touched.add(key)
+        for cell in changed:
+            x, y, z = map(int, cell)
+            for dy in (-1, 0, 1):
+                touched.add(search.pack(x, y + dy, z))
+
+        for key in touched:
+            self._walkable_cache.pop(key, None)
+
+        # every edge into or out of a touched cell may have changed
+        affected = set(touched)
+        for key in touched:
+            for _, _, _, dkey, _, _ in search.NEIGHBOURS:
+                affected.add(key + dkey)
+        for key in affected:
+            self._update_vertex(key)
+
+        if not self._compute():
+            return []
+        return self.path()
+
+    def path(self, max_length=100000):
+        """Follow the cheapest successors from the start to the goal."""
+        key = self.start_key
+        if self.g.get(key, INF) == INF and self.rhs.get(key, INF) == INF:
+            return []
+        path = [search.unpack(key)]
+        seen = {key}
+        while key != self.goal_key and len(path) < max_length:
+            best, best_value = None, INF
+            for other, cost in self._moves(key):
+                value = cost + self.g.get(other, INF)
+                if value < best_value:
+                    best, best_value = other, value
+            if best is None or best in seen:
+                return []
+            seen.add(best)
+            path.append(search.unpack(best))
+            key = best
+        return path
@@ -0,0 +1,302 @@
+"""
+Flow fields: cost-to-go and next step toward a fixed destination for every
+reachable cell, from one reverse Dijkstra.
+
+A field answers "which way from here?" with a dict lookup, so walking to a
+destination the bot visits over and over (base, farm, chest room) needs
+no search at all, from any start and after any detour. Changed chunks
+only invalidate the part of the field whose routes ran through them; that
+part is recomputed from its still valid border. Kept free of MineScript
+imports like search.py.
+"""
+import heapq
+
+from berrycake_utils.search import NEIGHBOURS, CLIMB_PENALTY, FOUND, astar_multi, pack, unpack
+
+# cells a field may hold (~100 bytes each)
+FIELD_MAX_NODES = 400000
+# how far path_from() searches for the field from a start cell outside it
+JOIN_RADIUS = 12
+
+
+class FlowField:
+    """
+    Distance / direction field toward a set of goal cells.
+
+    GOAL:
+        - Walk to frequent destinations without running find_path from
+          wherever the player happens to be.
+        - Make repaths after being pushed off course free.
+
+    HOW IT WORKS:
+        - build() runs a Dijkstra backwards from the goals over standable
+          cells (reversed move costs, so climbing is still what costs extra)
+          and keeps for every cell its cost to the nearest goal and the next
+          cell on the way there. next_step() / path_from() just follow that.
+        - mark_dirty(chunk_origin) notes a loaded / unloaded chunk,
+          mark_changed(position) a block change, block(cell) a cell to avoid.
+          repair() (run lazily by the queries) drops every cell whose route
+          ran through one of them, then runs the Dijkstra again seeded from
+          the valid cells around the hole. Routes that got cheaper through
+          the change are picked up as well.
+        - A start outside the field joins it with a short multi-goal search
+          (JOIN_RADIUS) and continues along it.
+    """
+
+    def __init__(self, goals, standable, radius=None, center=None, max_nodes=FIELD_MAX_NODES, chunk_size=16):
+        """
+        Args:
+            goals (iterable): (x, y, z) cells that count as arrived; the ones that are
+                not standable (yet) are skipped until a repair finds them standable.
+            standable (callable): standable(x, y, z) -> bool (e.g. WorldView.is_standable).
+            radius (float): Only cover cells this far (straight line) from center.
+            center (tuple): Centre of radius (defaults to the first goal).
+            max_nodes (int): Stop growing the field past this many cells.
+            chunk_size (int): Chunk width, for mark_dirty().
+        """
+        self.goals = [tuple(map(int, goal)) for goal in goals]
+        self.standable = standable
+        self.radius = radius
+        self.center = tuple(center) if center is not None else (self.goals[0] if self.goals else (0, 0, 0))
+        self.max_nodes = max_nodes
+        self.chunk_size = chunk_size
+
+        self.cost = {}      # {key: cost to the nearest goal}
+        self.toward = {}    # {key: next key on the way (None at a goal)}
+        self.blocked = set()
+        self._dirty = set()     # (chunk x, chunk z) loaded / unloaded since the last repair
+        self._touched = set()   # keys whose standability may have changed since the last repair
+        self.stats = {'builds': 0, 'repairs': 0, 'cells_repaired': 0, 'nodes': 0}
+        self.build()
+
+    # ---------------------------------------------------
+    # BUILDING
+    # ---------------------------------------------------
+
+    def build(self):
+        """Compute the whole field from scratch."""
+        self.cost.clear()
+        self.toward.clear()
+        self._dirty.clear()
+        self._touched.clear()
+        self.stats['builds'] += 1
+        self._expand(self._goal_seeds())
+
+    def _goal_seeds(self):
+        seeds = []
+        for goal in self.goals:
+            key = pack(*goal)
+            if key not in self.cost and key not in self.blocked and self.standable(*goal):
+                self.cost[key] = 0.0
+                self.toward[key] = None
+                seeds.append((0.0, key))
+        return seeds
+
+    def _in_range(self, x, y, z):
+        if self.radius is None:
+            return True
+        gx, gy, gz = self.center
+        return (x - gx) ** 2 + (y - gy) ** 2 + (z - gz) ** 2 <= self.radius * self.radius
+
+    def _expand(self, seeds):
+        """Reverse Dijkstra from seeds [(cost, key)], improving any cell it reaches more cheaply."""
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        standable = self.standable
+        cost = self.cost
+        toward = self.toward
+        blocked = self.blocked
+        walkable = {}
+
+        heap = list(seeds)
+        heapq.heapify(heap)
+        nodes = 0
+        while heap:
+            g, key = heappop(heap)
+            if g > cost.get(key, g):
+                continue  # a cheaper entry was handled already
+            nodes += 1
+            x, y, z = unpack(key)
+            for dx, dy, dz, dkey, move, corner in NEIGHBOURS:
+                # the neighbour walks to key, so the climb penalty applies the other way round
+                if dy:
+                    move += CLIMB_PENALTY if dy < 0 else -CLIMB_PENALTY
+                ng = g + move
+                nkey = key + dkey
+                old = cost.get(nkey)
+                if old is not None and old <= ng:
+                    continue
+                if old is None and (len(cost) >= self.max_nodes or nkey in blocked):
+                    continue
+                nx = x + dx
+                ny = y + dy
+                nz = z + dz
+                ok = walkable.get(nkey)
+                if ok is None:
+                    ok = walkable[nkey] = standable(nx, ny, nz) and self._in_range(nx, ny, nz)
+                if not ok:
+                    continue
+                if corner and not (standable(nx, y, z) and standable(x, y, nz)):
+                    continue
+                cost[nkey] = ng
+                toward[nkey] = key
+                heappush(heap, (ng, nkey))
+        self.stats['nodes'] += nodes
+        return nodes
+
+    # ---------------------------------------------------
+    # INVALIDATION
+    # ---------------------------------------------------
+
+    def mark_dirty(self, chunk_origin):
+        """A chunk was loaded, unloaded or rescanned: recheck all of it before the next query."""
+        self._dirty.add((chunk_origin[0] // self.chunk_size, chunk_origin[2] // self.chunk_size))
+
+    def mark_changed(self, position):
+        """The block at position changed: recheck the cells standing in, on or under it."""
+        x, y, z = map(int, position)
+        for cell_y in (y - 1, y, y + 1):
+            self._touched.add(pack(x, cell_y, z))
+
+    def block(self, cell):
+        """
+        Treat cell as not walkable (e.g. where the Walker got stuck) until it changes.
+        Goals are never blocked, or the destination would drop out of its own field.
+        """
+        cell = tuple(map(int, cell))
+        if cell in self.goals:
+            return
+        key = pack(*cell)
+        self.blocked.add(key)
+        self._touched.add(key)
+
+    def repair(self):
+        """
+        Recompute the part of the field that depends on dirty chunks / changed cells.
+
+        Returns:
+            int: cells dropped and recomputed (0 when nothing was dirty).
+        """
+        if not self._dirty and not self._touched:
+            return 0
+        size = self.chunk_size
+        dirty = self._dirty
+        touched = self._touched
+
+        def in_dirty_chunk(key):
+            x, _, z = unpack(key)
+            return (x // size, z // size) in dirty
+
+        # a block change or rescan unblocks cells, block() only lasts until then
+        if dirty:
+            self.blocked = {key for key in self.blocked if not in_dirty_chunk(key)}
+
+        def changed(key):
+            return key in touched or (dirty and in_dirty_chunk(key))
+
+        def corner_changed(key, nkey):
+            # a horizontal diagonal also needs both cells it cuts past (see search.NEIGHBOURS)
+            x, y, z = unpack(key)
+            nx, ny, nz = unpack(nkey)
+            if ny != y or nx == x or nz == z:
+                return False
+            return changed(pack(nx, y, z)) or changed(pack(x, y, nz))
+
+        # cells whose route runs through a dirty chunk / touched cell, following the next-step links
+        toward = self.toward
+        hit = {}
+        for key in toward:
+            chain = []
+            k = key
+            while k is not None and k not in hit:
+                n = toward[k]
+                if changed(k) or (n is not None and corner_changed(k, n)):
+                    hit[k] = True
+                    break
+                chain.append(k)
+                k = n
+            result = hit.get(k, False) if k is not None else False
+            for c in chain:
+                hit[c] = result
+        invalid = [key for key, h in hit.items() if h]
+        for key in invalid:
+            del self.cost[key]
+            del toward[key]
+
+        # seed from the valid cells around the hole and the touched cells (which may have opened up)
+        cost = self.cost
+        seeds = {}
+        for key in invalid + list(touched):
+            for *_, dkey, _, _ in NEIGHBOURS:
+                nkey = key + dkey
+                if nkey in cost:
+                    seeds[nkey] = cost[nkey]
+        if dirty:
+            # ... and the cells along the edges of dirty chunks (a loaded chunk extends the field)
+            for key, g in cost.items():
+                x, _, z = unpack(key)
+                if ((x - 1) // size, z // size) in dirty or ((x + 1) // size, z // size) in dirty \
+                        or (x // size, (z - 1) // size) in dirty or (x // size, (z + 1) // size) in dirty:
+                    seeds[key] = g
+        dirty.clear()
+        touched.clear()
+
+        self._expand([(g, key) for key, g in seeds.items()] + self._goal_seeds())
+        self.stats['repairs'] += 1
+        self.stats['cells_repaired'] += len(invalid)
+        return len(invalid)
+
+    # ---------------------------------------------------
+    # QUERIES
+    # ---------------------------------------------------
+
+    def __len__(self):
+        return len(self.cost)
+
+    def __contains__(self, cell):
+        self.repair()
+        return pack(*map(int, cell)) in self.cost
+
+    def cost_from(self, cell):
+        """Walking cost from cell to the nearest goal, or None if cell is not in the field."""
+        self.repair()
+        return self.cost.get(pack(*map(int, cell)))
+
+    def next_step(self, cell):
+        """
+        The next cell toward the destination.
+
+        Returns:
+            tuple | None: (x, y, z); cell itself at a goal; None outside the field.
+        """
+        self.repair()
+        key = pack(*map(int, cell))
+        if key not in self.toward:
+            return None
+        nkey = self.toward[key]
+        return unpack(key if nkey is None else nkey)
+
+    def path_from(self, cell, max_steps=100000):
+        """
+        Cells from cell to a goal, following the field; a start outside it
+        first joins the nearest field cell within JOIN_RADIUS.
+
+        Returns:
+            list: [(x, y, z), ...] start first, or [] if the field cannot be reached.
+        """
+        self.repair()
+        start = tuple(map(int, cell))
+        key = pack(*start)
+        path = []
+        if key not in self.toward:
+            status, join, _ = astar_multi(start, (), self.standable, radius=JOIN_RADIUS,
+                                          is_goal=lambda x, y, z: pack(x, y, z) in self.toward)
+            if status != FOUND:
+                return []
+            path = join[:-1]
+            key = pack(*join[-1])
+        toward = self.toward
+        while key is not None and len(path) < max_steps:
+            path.append(unpack(key))
+            key = toward[key]
+        return path
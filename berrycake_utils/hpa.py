@@ -0,0 +1,355 @@
+import heapq
+import math
+import time
+
+from berrycake_utils import search
+
+# the four horizontal neighbours of a chunk: (dx, dz) in chunk units
+_BORDERS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class ClusterGraph:
+    """
+    HPA*-style abstract graph over the loaded chunks.
+
+    GOAL:
+        - Plan long routes without expanding millions of block cells.
+        - Only refine the part of the route the Walker is about to follow.
+
+    HOW IT WORKS:
+        - Every pair of neighbouring loaded chunks is scanned along their
+          shared border for cells you can step across; each contiguous run
+          becomes one entrance (a node on both sides plus an inter edge).
+        - Inside a chunk, a bounded Dijkstra from each entrance gives the
+          intra edge costs to the other entrances of the same chunk.
+        - plan() links start and goal into their chunks, runs A* over the
+          abstract nodes and returns a HierarchicalRoute that refines one
+          chunk-sized segment at a time.
+        - Chunks are rebuilt lazily: loading / changing a chunk only marks
+          it dirty, update() does the work (entrances, then intra edges)
+          within a time budget; ready() says when it has caught up.
+    """
+
+    def __init__(self, world, chunk_size=16):
+        """
+        Args:
+            world (WorldDB): Database to build the graph over (world_db and world_view()).
+            chunk_size (int): Chunk width along X and Z.
+        """
+        self.world = world
+        self.chunk_size = chunk_size
+
+        # {frozenset((origin_a, origin_b)): [(key_a, key_b), ...]} entrances per border
+        self.borders = {}
+        # {chunk_origin: set(node keys)}
+        self.chunk_nodes = {}
+        # {node key: {node key: cost}} inside one chunk / across a border
+        self.intra = {}
+        self.inter = {}
+        self.dirty = set()
+        # chunks whose entrances changed and still need their intra edges rebuilt
+        self.intra_pending = set()
+
+    # ---------------------------------------------------
+    # MAINTENANCE
+    # ---------------------------------------------------
+
+    def mark_dirty(self, chunk_origin):
+        """Call when a chunk is loaded or its blocks change."""
+        self.dirty.add(tuple(chunk_origin))
+
+    def remove_chunk(self, chunk_origin):
+        """Call when a chunk is unloaded."""
+        chunk_origin = tuple(chunk_origin)
+        self.dirty.discard(chunk_origin)
+        self.intra_pending.discard(chunk_origin)
+        for neighbour in self._neighbours(chunk_origin):
+            if self._set_border(chunk_origin, neighbour, []) and neighbour in self.world.world_db:
+                self._rebuild_intra(neighbour)
+        for key in self.chunk_nodes.pop(chunk_origin, ()):
+            self.intra.pop(key, None)
+            self.inter.pop(key, None)
+
+    def update(self, budget=None):
+        """
+        Rebuild dirty chunks, stopping after ~budget seconds (None = all).
+
+        Returns:
+            int: number of chunks still dirty or waiting for their intra edges.
+        """
+        deadline = None if budget is None else time.time() + budget
+        world_db = self.world.world_db
+        while self.dirty:
+            if deadline is not None and time.time() > deadline:
+                break
+            origin = self.dirty.pop()
+            if origin in world_db:
+                self.intra_pending |= self._rebuild_borders(origin)
+
+        # intra edges once per chunk whose entrances changed
+        while self.intra_pending:
+            if deadline is not None and time.time() > deadline:
+                break
+            origin = self.intra_pending.pop()
+            if origin in world_db:
+                self._rebuild_intra(origin)
+        return len(self.dirty) + len(self.intra_pending)
+
+    def ready(self):
+        """True when every loaded chunk is in the graph with up-to-date edges."""
+        return not self.dirty and not self.intra_pending
+
+    def _neighbours(self, origin):
+        size = self.chunk_size
+        return [(origin[0] + dx * size, origin[1], origin[2] + dz * size) for dx, dz in _BORDERS]
+
+    def _rebuild_borders(self, origin):
+        """Recompute the entrances around a chunk; returns the chunks whose intra edges need a rebuild."""
+        world_db = self.world.world_db
+        touched = {origin}
+        for neighbour in self._neighbours(origin):
+            entrances = self._find_entrances(origin, neighbour) if neighbour in world_db else []
+            if self._set_border(origin, neighbour, entrances):
+                touched.add(neighbour)
+        return touched
+
+    def _find_entrances(self, origin, neighbour):
+        """Entrances between two adjacent chunks as [(key in origin, key in neighbour)]."""
+        world_db = self.world.world_db
+        chunk = world_db[origin]
+        other = world_db[neighbour]
+        if chunk.standable_layers is None:
+            chunk.build_walkability()
+        size = self.chunk_size
+
+        dx = (neighbour[0] - origin[0]) // size
+        dz = (neighbour[2] - origin[2]) // size
+        if dx:
+            lx = size - 1 if dx > 0 else 0
+            cells = [(lx, t) for t in range(size)]
+        else:
+            lz = size - 1 if dz > 0 else 0
+            cells = [(t, lz) for t in range(size)]
+        bits = [lz * chunk.x_size + lx for lx, lz in cells]
+        edge_mask = sum(1 << bit for bit in bits)
+
+        # best crossing per border cell (t, y): level first, then down, then up
+        crossings = []
+        for ly, layer in enumerate(chunk.standable_layers):
+            if not layer & edge_mask:
+                continue
+            y = chunk.y_min + ly
+            for t, bit in enumerate(bits):
+                if not (layer >> bit) & 1:
+                    continue
+                x = origin[0] + cells[t][0]
+                z = origin[2] + cells[t][1]
+                for dy in (0, -1, 1):
+                    if other.is_standable(x + dx, y + dy, z + dz):
+                        crossings.append((t, y, dy, x, z))
+                        break
+
+        # chain crossings that are side by side along the border and at most
+        # one block apart in height into one entrance, placed at its middle
+        crossings.sort()
+        chains = []
+        for crossing in crossings:
+            t, y = crossing[0], crossing[1]
+            for chain in chains:
+                last = chain[-1]
+                if last[0] == t - 1 and abs(last[1] - y) <= 1:
+                    chain.append(crossing)
+                    break
+            else:
+                chains.append([crossing])
+
+        entrances = []
+        for chain in chains:
+            _, y, dy, x, z = chain[len(chain) // 2]
+            entrances.append((search.pack(x, y, z), search.pack(x + dx, y + dy, z + dz)))
+        return entrances
+
+    def _set_border(self, origin, neighbour, entrances):
+        """Store the entrances of one border. Returns True if they changed."""
+        border = frozenset((origin, neighbour))
+        old = self.borders.get(border, [])
+        # store oriented as (key in the lower origin, key in the higher origin)
+        if origin > neighbour:
+            entrances = [(b, a) for a, b in entrances]
+        if sorted(old) == sorted(entrances):
+            return False
+
+        for a, b in old:
+            self.inter.get(a, {}).pop(b, None)
+            self.inter.get(b, {}).pop(a, None)
+
+        if entrances:
+            self.borders[border] = entrances
+        else:
+            self.borders.pop(border, None)
+
+        for a, b in entrances:
+            ax, ay, az = search.unpack(a)
+            bx, by, bz = search.unpack(b)
+            step = math.sqrt((bx - ax) ** 2 + (by - ay) ** 2 + (bz - az) ** 2)
+            self.inter.setdefault(a, {})[b] = step + (search.CLIMB_PENALTY if by > ay else 0.0)
+            self.inter.setdefault(b, {})[a] = step + (search.CLIMB_PENALTY if ay > by else 0.0)
+
+        self._collect_nodes(origin)
+        self._collect_nodes(neighbour)
+        return True
+
+    def _collect_nodes(self, origin):
+        """Recompute the node set of a chunk from its borders."""
+        nodes = set()
+        for neighbour in self._neighbours(origin):
+            border = frozenset((origin, neighbour))
+            side = 0 if origin < neighbour else 1
+            for pair in self.borders.get(border, ()):
+                nodes.add(pair[side])
+        for key in self.chunk_nodes.get(origin, set()) - nodes:
+            self.intra.pop(key, None)
+            if not self.inter.get(key):
+                self.inter.pop(key, None)
+        if nodes:
+            self.chunk_nodes[origin] = nodes
+        else:
+            self.chunk_nodes.pop(origin, None)
+
+    def _chunk_standable(self, origin):
+        """standable() limited to one chunk (Chunk.is_standable is False outside its bounds)."""
+        chunk = self.world.world_db.get(origin)
+        if chunk is None:
+            return lambda x, y, z: False
+        return chunk.is_standable
+
+    def _rebuild_intra(self, origin):
+        """Intra-chunk edge costs between all entrances of a chunk."""
+        nodes = self.chunk_nodes.get(origin, set())
+        standable = self._chunk_standable(origin)
+        for key in nodes:
+            costs = search.dijkstra(search.unpack(key), standable, nodes - {key})
+            self.intra[key] = costs
+
+    # ---------------------------------------------------
+    # PLANNING
+    # ---------------------------------------------------
+
+    def plan(self, start_pos, goal_pos, max_nodes=200000):
+        """
+        Plan an abstract route from start to goal over the loaded chunks.
+
+        Returns:
+            HierarchicalRoute or None if no route exists in the graph.
+        """
+        self.update()
+        view = self.world.world_view()
+        start = tuple(map(int, start_pos))
+        goal = tuple(map(int, goal_pos))
+        start_key = search.pack(*start)
+        goal_key = search.pack(*goal)
+
+        start_origin = view.chunk_origin(start)
+        goal_origin = view.chunk_origin(goal)
+        if start_origin == goal_origin:
+            return HierarchicalRoute(self, [start_key, goal_key])
+
+        # link start and goal into the abstract graph
+        start_edges = search.dijkstra(start, self._chunk_standable(start_origin),
+                                      self.chunk_nodes.get(start_origin, ()))
+        goal_edges = search.dijkstra(goal, self._chunk_standable(goal_origin),
+                                     self.chunk_nodes.get(goal_origin, ()), reverse=True)
+        if not start_edges or not goal_edges:
+            return None
+
+        gx, gy, gz = goal
+        open_heap = [(0.0, start_key)]
+        g_score = {start_key: 0.0}
+        parent = {start_key: None}
+        closed = set()
+
+        while open_heap and len(closed) < max_nodes:
+            _, key = heapq.heappop(open_heap)
+            if key in closed:
+                continue
+            closed.add(key)
+            if key == goal_key:
+                nodes = []
+                while key is not None:
+                    nodes.append(key)
+                    key = parent[key]
+                nodes.reverse()
+                return HierarchicalRoute(self, nodes)
+
+            edges = list(self.intra.get(key, {}).items()) + list(self.inter.get(key, {}).items())
+            if key == start_key:
+                edges.extend(start_edges.items())
+            if key in goal_edges:
+                edges.append((goal_key, goal_edges[key]))
+
+            g = g_score[key]
+            for nkey, cost in edges:
+                ng = g + cost
+                if nkey in closed or g_score.get(nkey, math.inf) <= ng:
+                    continue
+                g_score[nkey] = ng
+                parent[nkey] = key
+                nx, ny, nz = search.unpack(nkey)
+                heapq.heappush(open_heap, (ng + search.octile(nx - gx, ny - gy, nz - gz), nkey))
+
+        return None
+
+
+class HierarchicalRoute:
+    """
+    Abstract route returned by ClusterGraph.plan().
+
+    The block-level path is only worked out one segment at a time:
+    segments() yields the cells up to the next chunk border, so the
+    Walker can start moving before the rest of the route is refined.
+    """
+
+    def __init__(self, graph, nodes):
+        self.graph = graph
+        self.nodes = nodes  # packed keys, start first
+
+    def waypoints(self):
+        """The abstract nodes as (x, y, z) tuples."""
+        return [search.unpack(key) for key in self.nodes]
+
+    def refine(self, a, b):
+        """Block path between two consecutive abstract nodes (inclusive)."""
+        ax, ay, az = search.unpack(a)
+        bx, by, bz = search.unpack(b)
+        if max(abs(ax - bx), abs(ay - by), abs(az - bz)) <= 1:
+            return [(ax, ay, az), (bx, by, bz)]
+        size = self.graph.chunk_size
+        view = self.graph.world.world_view()
+        origin = view.chunk_origin((ax, ay, az))
+        standable = view.is_standable
+        if origin == view.chunk_origin((bx, by, bz)):
+            standable = self.graph._chunk_standable(origin)
+        _, path, _ = search.astar((ax, ay, az), (bx, by, bz), standable,
+                                  max_nodes=size * size * 64, timeout=2.0)
+        return path
+
+    def segments(self):
+        """
+        Yield block paths one chunk at a time; each starts where the previous ended.
+        An empty list means refinement failed (the world changed) and a replan is needed.
+        """
+        pending = []
+        for a, b in zip(self.nodes, self.nodes[1:]):
+            piece = self.refine(a, b)
+            if not piece:
+                yield []
+                return
+            pending.extend(piece if not pending else piece[1:])
+            # hand over at chunk borders (inter edges are one block long)
+            ax, _, az = search.unpack(a)
+            bx, _, bz = search.unpack(b)
+            if max(abs(ax - bx), abs(az - bz)) <= 1 and len(pending) > 2:
+                yield pending
+                pending = [pending[-1]]
+        if len(pending) > 1:
+            yield pending
@@ -0,0 +1,326 @@
+"""
+Runtime metrics: counters, gauges, timers and histograms for the main loop.
+
+Everything goes through the METRICS registry. It starts disabled, and
+while disabled every call returns right away (timer() hands out one
+shared no-op context), so the instrumented code costs an attribute check.
+WorldDB(metrics=True) turns it on, wraps the MineScript calls and writes
+snapshots with a MetricsExporter: a few preformatted lines for hud.pyj
+and a JSON line per snapshot for offline analysis.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# MineScript functions counted as RPCs by instrument_minescript()
+# (every ms.<name> the package calls; 'entities' is the older name of get_entities)
+RPC_FUNCTIONS = ('getblock', 'getblocklist', 'execute', 'echo', 'player', 'player_position',
+                 'player_orientation', 'player_set_orientation', 'player_look_at',
+                 'player_get_targeted_block', 'get_entities', 'entities', 'world_info',
+                 'player_press_forward', 'player_press_backward', 'player_press_left',
+                 'player_press_right', 'player_press_jump', 'player_press_sprint', 'player_press_sneak',
+                 'player_press_attack', 'player_press_use')
+
+
+class Histogram:
+    """Count / total / min / max of every sample plus the most recent ones for percentiles."""
+
+    def __init__(self, history=512):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.recent = deque(maxlen=history)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.recent.append(value)
+
+    def percentile(self, p):
+        """p-th percentile (0..100) of the recent samples, 0.0 when empty."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min or 0.0,
+            'max': self.max or 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'last': self.recent[-1] if self.recent else 0.0,
+        }
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, 1000 * (time.perf_counter() - self.start))
+        return False
+
+
+class Metrics:
+    """
+    Registry of named counters, gauges and histograms.
+
+    GOAL:
+        - Tell where a stutter comes from (chunk scans, pathfinding,
+          camera, MineScript latency) without a profiler.
+        - Cost next to nothing when switched off.
+
+    HOW IT WORKS:
+        - count(name, n) adds to a counter, gauge(name, value) stores the
+          latest value, observe(name, value) adds a histogram sample.
+        - timer(name) / timed(name) observe the elapsed milliseconds of a
+          block / function under that name.
+        - Every call checks self.enabled first; updates take a lock, as
+          chunk scans report from the streamer thread.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+            self.started = time.time()
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        if not self.enabled:
+            return
+        self.gauges[name] = value
+
+    def observe(self, name, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(value)
+
+    def timer(self, name):
+        """Context manager observing the block's run time in ms under name."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name):
+        """Decorator: observe every call's run time in ms under name."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, 1000 * (time.perf_counter() - start))
+            return wrapper
+        return decorate
+
+    def snapshot(self):
+        """Plain-dict copy of everything, ready for json.dumps."""
+        with self._lock:
+            return {
+                'time': time.time(),
+                'uptime': time.time() - self.started,
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {name: h.summary() for name, h in self.histograms.items()},
+            }
+
+
+METRICS = Metrics()
+
+
+# ---------------------------------------------------
+# MINESCRIPT INSTRUMENTATION
+# ---------------------------------------------------
+
+def instrument_minescript(ms, registry=METRICS, names=RPC_FUNCTIONS):
+    """
+    Wrap MineScript functions so every call counts as 'rpc.calls' /
+    'rpc.<name>' and its latency goes to the 'rpc.ms' histogram.
+    Wraps the module in place, so modules that imported it already are
+    covered; calling it twice does nothing.
+
+    Returns:
+        list: names of the wrapped functions.
+    """
+    wrapped = []
+    for name in names:
+        func = getattr(ms, name, None)
+        if func is None or getattr(func, '_metrics_wrapped', None) is not None:
+            continue
+
+        def wrapper(*args, _func=func, _counter=f'rpc.{name}', **kwargs):
+            if not registry.enabled:
+                return _func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return _func(*args, **kwargs)
+            finally:
+                registry.observe('rpc.ms', 1000 * (time.perf_counter() - start))
+                registry.count('rpc.calls')
+                registry.count(_counter)
+
+        functools.update_wrapper(wrapper, func)
+        wrapper._metrics_wrapped = func
+        setattr(ms, name, wrapper)
+        wrapped.append(name)
+    return wrapped
+
+
+def uninstrument_minescript(ms, names=RPC_FUNCTIONS):
+    """Put back the functions instrument_minescript() wrapped."""
+    for name in names:
+        original = getattr(getattr(ms, name, None), '_metrics_wrapped', None)
+        if original is not None:
+            setattr(ms, name, original)
+
+
+# ---------------------------------------------------
+# EXPORT
+# ---------------------------------------------------
+
+class MetricsExporter:
+    """
+    Writes registry snapshots every interval seconds.
+
+    GOAL:
+        - Feed the live panel in hud.pyj.
+        - Keep a log that can be read back after a session.
+
+    HOW IT WORKS:
+        - update() is called once per main loop cycle and does nothing
+          until interval seconds passed since the last export.
+        - Rates (RPCs/s, nodes/s...) come from the counter differences
+          between two exports.
+        - hud_path gets a few short "Label: value" lines, replaced
+          atomically so the HUD never reads half a file; log_path gets
+          the full snapshot as one JSON line appended per export.
+    """
+
+    # (label, counter) pairs shown as per-second rates on the HUD
+    HUD_RATES = (('RPC/s', 'rpc.calls'), ('Nodes/s', 'path.nodes'), ('Chunks/s', 'chunks.scanned'))
+
+    def __init__(self, registry=METRICS, hud_path=None, log_path=None, interval=1.0):
+        """
+        Args:
+            registry (Metrics): Registry to export.
+            hud_path (str): Text file read by hud.pyj (None = no HUD panel).
+            log_path (str): JSON-lines file for offline analysis (None = no log).
+            interval (float): Seconds between exports.
+        """
+        self.registry = registry
+        self.hud_path = hud_path
+        self.log_path = log_path
+        self.interval = interval
+        self._last_time = None
+        self._last_counters = {}
+
+    def rates(self, snapshot):
+        """Per-second counter increase since the previous export."""
+        if self._last_time is None:
+            elapsed = snapshot['uptime']
+        else:
+            elapsed = snapshot['time'] - self._last_time
+        elapsed = max(elapsed, 1e-6)
+        return {name: (value - self._last_counters.get(name, 0)) / elapsed
+                for name, value in snapshot['counters'].items()}
+
+    def hud_lines(self, snapshot, rates):
+        gauges = snapshot['gauges']
+        cycle = snapshot['histograms'].get('cycle.ms')
+        lines = []
+        if cycle is not None:
+            lines.append(f"Cycle: {cycle['p50']:.1f} ms (p95 {cycle['p95']:.1f}, max {cycle['max']:.1f})")
+        chunks = f"Chunks: {gauges.get('chunks.loaded', 0)} loaded, {gauges.get('chunks.pending', 0)} pending"
+        if 'cache.bytes' in gauges:
+            chunks += f", {gauges.get('cache.retained', 0)} retained ({gauges['cache.bytes'] / 2 ** 20:.0f} MB)"
+        lines.append(chunks)
+        lines.append(' | '.join(f'{label}: {rates.get(counter, 0.0):.0f}' for label, counter in self.HUD_RATES))
+        rpc = snapshot['histograms'].get('rpc.ms')
+        if rpc is not None:
+            lines.append(f"RPC: {rpc['p50']:.1f} ms (p95 {rpc['p95']:.1f})")
+        walker = snapshot['histograms'].get('walker.tick_ms')
+        if 'startup.first_path_s' in gauges:
+            lines.append(f"First path: {gauges['startup.first_path_s']:.2f} s after launch")
+        if walker is not None:
+            missed = snapshot['counters'].get('walker.missed', 0)
+            lines.append(f"Walker: {walker['p50']:.1f} ms/tick (p95 {walker['p95']:.1f}), {missed} missed")
+        return lines
+
+    def export(self):
+        """Write one snapshot now. Returns it."""
+        snapshot = self.registry.snapshot()
+        rates = self.rates(snapshot)
+        snapshot['rates'] = rates
+        if self.hud_path:
+            tmp_path = self.hud_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(self.hud_lines(snapshot, rates)) + '\n')
+            os.replace(tmp_path, self.hud_path)
+        if self.log_path:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(snapshot) + '\n')
+        self._last_time = snapshot['time']
+        self._last_counters = snapshot['counters']
+        return snapshot
+
+    def update(self):
+        if not self.registry.enabled:
+            return None
+        now = time.time()
+        if self._last_time is not None and now - self._last_time < self.interval:
+            return None
+        return self.export()
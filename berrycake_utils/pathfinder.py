@@ -1,10 +1,11 @@
 import time
 import math
-import heapq
 import system.lib.minescript as minescript
 
-IMPASSABLE_BLOCKS = {"minecraft:water", "minecraft:lava", "minecraft:cactus", "minecraft:fire","minecraft:wither_rose"}
-PASSABLE_BLOCKS = {"minecraft:air","minecraft:torch","minecraft:sugar_cane","minecraft:rail","minecraft:detector_rail","minecraft:activator_rail","minecraft:powered_rail","minecraft:short_dry_grass","minecraft:tall_dry_grass","minecraft:tall_grass", "minecraft:short_grass","minecraft:snow","minecraft:soul_torch","minecraft:redstone_wire","minecraft:redstone_torch","minecraft:redstone_wall_torch","minecraft:repeater","minecraft:comparator","minecraft:flower_pot","minecraft:rose_bush","minecraft:poppy","minecraft:allium","minecraft:azalea_bush","minecraft:azure_bluet","minecraft:blue_orchid","minecraft:brown_mushroom","minecraft:closed_eyeblossom","minecraft:cornflower","minecraft:crimson_fungus","minecraft:crimson_roots","minecraft:dandelion","minecraft:fern","minecraft:dead_bush","minecraft:lily_of_the_valley","minecraft:open_eyeblossom","minecraft:orange_tulip","minecraft:oxeye_daisy","minecraft:pink_tulip","minecraft:red_mushroom","minecraft:red_tulip","minecraft:torchflower","minecraft:warped_fungus","minecraft:warped_roots","minecraft:white_tulip","minecraft:acacia_pressure_plate","minecraft:bamboo_pressure_plate","minecraft:birch_pressure_plate","minecraft:cherry_pressire_plate","minecraft:crimson_pressure_plate","minecraft:dark_oak_pressure_plate","minecraft:heavy_weighted_pressure_plate","minecraft:jungle_pressure_plate","minecraft:light_weighted_pressure_plate","minecraft:mangrove_pressure_plate","minecraft:oak_pressure_plate","minecraft:pale_oak_pressure_plate","minecraft:polished_blackstone_pressure_plate","minecraft:spruce_pressure_plate","minecraft:stone_pressure_plate","minecraft:stone_pressure_plate","minecraft:warped_pressure_plate"}
+from berrycake_utils import search
+from berrycake_utils.batchedit import BatchEditor
+from berrycake_utils.metrics import METRICS
+from berrycake_utils.blocks import IMPASSABLE_BLOCKS, PASSABLE_BLOCKS
 
 
 # configuration
@@ -30,23 +31,6 @@ def tweenpointat(location):
         # fallback: if player_look_at expects yaw,pitch you need to compute them
         pass
 
-class Node:
-    def __init__(self, parent=None, position=None):
-        self.parent = parent
-        self.position = position
-        self.g = 0.0
-        self.h = 0.0
-        self.f = 0.0
-
-    def __eq__(self, other):
-        return isinstance(other, Node) and self.position == other.position
-
-    def __lt__(self, other):
-        return self.f < other.f
-
-    def __hash__(self):
-        return hash(self.position)
-
 def _is_solid_block(block_id):
     """Return True if the block id represents a solid block (not passable)."""
     if not block_id:
@@ -65,7 +49,8 @@ def _is_impassable_block(block_id):
 def _is_walkable(pos, world_data, dest_pos=None):
     """
     Checks if a 2-block-high entity can stand at 'pos'.
-    world_data is expected to map (x,y,z)->block_id (string like 'minecraft:stone').
+    world_data is anything with .get((x,y,z), default) -> block_id (string like 'minecraft:stone'),
+    e.g. a flat dict or a WorldView over the loaded chunks.
     dest_pos optionally used for debug logging; pass (x,y,z) of destination.
     """
     # positions to inspect
@@ -107,102 +92,124 @@ def _can_move_corner_cut(curr, neighbor, world_data):
         return _is_walkable(n1, world_data) and _is_walkable(n2, world_data)
     return True
 
+def _walkability_test(world_data, dest_pos=None):
+    """
+    Return a fast standable(x, y, z) -> bool for world_data.
+    Uses the precomputed chunk bitmaps of a WorldView when available,
+    otherwise falls back to _is_walkable lookups on a plain dict.
+    """
+    standable = getattr(world_data, 'is_standable', None)
+    if standable is not None:
+        return standable
+    return lambda x, y, z: _is_walkable((x, y, z), world_data, dest_pos=dest_pos)
+
+@METRICS.timed('path.find_ms')
 def find_path(start_pos, end_pos, world_data, max_nodes=2500000):
     """
-    A* pathfinder. world_data: dict[(x,y,z)] -> block_id (string).
+    A* pathfinder. world_data: dict[(x,y,z)] -> block_id (string) or a WorldView.
     Returns list of (x,y,z) tuples from start to end, or [] if none.
+
+    The search itself runs in berrycake_utils.search.astar (int-packed keys,
+    precomputed neighbour costs, octile heuristic).
     """
-    start_node = Node(None, tuple(map(int, start_pos)))
-    end_node = Node(None, tuple(map(int, end_pos)))
-    open_heap = []
-    closed_set = set()
-    open_dict = {}
-
-    start_node.g = 0.0
-    start_node.h = math.dist(start_node.position, end_node.position)
-    start_node.f = start_node.h
-    heapq.heappush(open_heap, start_node)
-    open_dict[start_node.position] = start_node
-
-    nodes_processed = 0
+    start = tuple(map(int, start_pos))
+    end = tuple(map(int, end_pos))
+    standable = _walkability_test(world_data, dest_pos=end_pos)
+
     start_time = time.time()
     minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f ')
 
-    while open_heap:
-        # timeout guard by time
-        if time.time() - start_time > NODE_TIMEOUT_SEC:
-            minescript.echo("find_path: timeout by time")
-            return []
-
-        current_node = heapq.heappop(open_heap)
-        open_dict.pop(current_node.position, None)
-
-        if current_node.position in closed_set:
-            continue
-        closed_set.add(current_node.position)
-
-        nodes_processed += 1
-        if nodes_processed > max_nodes:
-            minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f max nodes processed: TERMINATING PATHFINDER')
-            return []
-
-        # reached target
-        if current_node.position == end_node.position:
-            path = []
-            cur = current_node
-            while cur:
-                path.append(cur.position)
-                cur = cur.parent
-            minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f nodes processed:  {nodes_processed} in {time.time() - start_time}')
-            minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f {len(path)} path length')
-            return path[::-1]
-
-        (x, y, z) = current_node.position
-        # neighbors (26 around including vertical); may be adjusted to restrict vertical movement if desired
-        for dx in (-1, 0, 1):
-            for dy in (-1, 0, 1):
-                for dz in (-1, 0, 1):
-                    if dx == 0 and dy == 0 and dz == 0:
-                        continue
-                    neighbor_pos = (x + dx, y + dy, z + dz)
-
-                    if neighbor_pos in closed_set:
-                        continue
-
-                    # must be within reasonable world bounds? optionally check here
-
-                    # quickly reject if not walkable
-                    if not _is_walkable(neighbor_pos, world_data, dest_pos=end_pos):
-                        continue
-
-                    # prevent corner cutting for horizontal diagonals
-                    if not _can_move_corner_cut(current_node.position, neighbor_pos, world_data):
-                        continue
-
-                    move_cost = current_node.g + math.sqrt(dx * dx + dy * dy + dz * dz)
-                    if dy > 0:
-                        move_cost += 0.5  # climbing penalty
-
-                    existing = open_dict.get(neighbor_pos)
-                    if existing and existing.g <= move_cost:
-                        continue
-
-                    neighbor_node = Node(current_node, neighbor_pos)
-                    neighbor_node.g = move_cost
-                    neighbor_node.h = math.dist(neighbor_pos, end_node.position)
-                    neighbor_node.f = neighbor_node.g + neighbor_node.h
-
-                    heapq.heappush(open_heap, neighbor_node)
-                    open_dict[neighbor_pos] = neighbor_node
-
-    # no path found
-    minescript.echo('§4[§c§lBerryCake§c❤§4]§f No path found :( TERMINATING PATHFINDER')
+    status, path, nodes_processed = search.astar(start, end, standable,
+                                                 max_nodes=max_nodes, timeout=NODE_TIMEOUT_SEC)
+    METRICS.count('path.nodes', nodes_processed)
+    METRICS.count('path.searches')
+
+    if status == search.FOUND:
+        minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f nodes processed:  {nodes_processed} in {time.time() - start_time}')
+        minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f {len(path)} path length')
+        return path
+    if status == search.TIMEOUT:
+        minescript.echo("find_path: timeout by time")
+    elif status == search.MAX_NODES:
+        minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f max nodes processed: TERMINATING PATHFINDER')
+    else:
+        minescript.echo('§4[§c§lBerryCake§c❤§4]§f No path found :( TERMINATING PATHFINDER')
     return []
 
+def approach_cells(targets, standable, reach=1):
+    """
+    Cells to stand on to reach each target: standable feet cells at most
+    reach blocks away horizontally, from 2 below to 1 above the target.
+    A target that is itself standable (an entity's feet) is included.
+
+    Args:
+        targets (iterable): (x, y, z) block or entity positions (floats are floored).
+        standable (callable): standable(x, y, z) -> bool.
+        reach (int): Horizontal reach in blocks.
+
+    Returns:
+        dict: {cell: target} (a cell near several targets keeps the first one).
+    """
+    cells = {}
+    for target in targets:
+        tx, ty, tz = (int(math.floor(c)) for c in target[:3])
+        for dy in (0, -1, 1, -2):
+            for dx in range(-reach, reach + 1):
+                for dz in range(-reach, reach + 1):
+                    cell = (tx + dx, ty + dy, tz + dz)
+                    if cell not in cells and standable(*cell):
+                        cells[cell] = tuple(target[:3])
+    return cells
+
+@METRICS.timed('path.find_ms')
+def find_path_to_nearest(start_pos, targets, world_data, reach=1, is_goal=None, radius=None, first_hit=False,
+                         max_nodes=2500000):
+    """
+    Path to whichever of several targets is cheapest to reach, in one A* search
+    (instead of one find_path per candidate).
+
+    Args:
+        start_pos (tuple): (x, y, z) start.
+        targets (iterable): Block / entity positions to reach (see approach_cells), may be empty.
+        world_data: dict[(x,y,z)] -> block_id or a WorldView.
+        reach (int): Stop this many blocks (horizontally) from the target.
+        is_goal (callable): Optional is_goal(x, y, z) -> bool for cells that count as
+            reached too (e.g. "next to water"); use with radius.
+        radius (float): Only search this far (straight line) from start_pos.
+        first_hit (bool): Take the first target the search touches, not the proven cheapest.
+
+    Returns:
+        tuple: (target, path) - the target reached (the goal cell for is_goal
+            matches) and the path to stand next to it; (None, []) if none is reachable.
+    """
+    start = tuple(map(int, start_pos))
+    standable = _walkability_test(world_data)
+    goals = approach_cells(targets or (), standable, reach)
+
+    start_time = time.time()
+    status, path, nodes_processed = search.astar_multi(start, goals, standable, is_goal=is_goal, radius=radius,
+                                                       first_hit=first_hit, max_nodes=max_nodes,
+                                                       timeout=NODE_TIMEOUT_SEC)
+    METRICS.count('path.nodes', nodes_processed)
+    METRICS.count('path.searches')
+
+    if status == search.FOUND:
+        minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f nearest of {len(goals)} goal cells: '
+                        f'nodes processed: {nodes_processed} in {time.time() - start_time}')
+        return goals.get(path[-1], path[-1]), path
+    if status == search.TIMEOUT:
+        minescript.echo("find_path_to_nearest: timeout by time")
+    elif status == search.MAX_NODES:
+        minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f max nodes processed: TERMINATING PATHFINDER')
+    else:
+        minescript.echo('§4[§c§lBerryCake§c❤§4]§f No reachable target found :( TERMINATING PATHFINDER')
+    return None, []
+
 def debug_glow_path(path, delay=0.05):
     minescript.echo(f'§4[§c§lBerryCake§c❤§4]§f starting visualisation')
     minescript.echo(path)
-    for block in path:
-        minescript.execute(f'/fill {block[0]} {block[1]} {block[2]} {block[0]} {block[1]} {block[2]} minecraft:glowstone')
+    editor = BatchEditor()
+    editor.add_many((block[:3], 'minecraft:glowstone') for block in path)
+    editor.flush()
         
 
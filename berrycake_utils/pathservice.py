@@ -0,0 +1,335 @@
+"""
+Asynchronous pathfinding in a pool of worker processes.
+
+The main process copies the standable bitmaps of every loaded chunk into
+one shared memory block (a WorldSnapshot); workers read it by name and
+run search.astar against it, so the world is never pickled. Each
+query also gets a slot in a small shared control block where the worker
+writes its progress and reads a cancel flag.
+
+Workers only import this module and search.py (no MineScript). With the
+"spawn" start method (Windows) the entry script is imported again in
+every worker, so it must keep its main loop behind
+`if __name__ == '__main__':`.
+"""
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+from berrycake_utils import search
+
+# per query slot in the control block: [nodes expanded, cancel flag] as int64
+_SLOT_FIELDS = 2
+
+
+class WorldSnapshot:
+    """
+    Standable bitmaps of the loaded chunks, copied into shared memory.
+
+    Every chunk is stored as its standable layers one after another, each
+    layer (x_size * z_size bits) packed little-endian into whole bytes.
+    The index {(chunk x, chunk z): (offset, y_min, x_size, z_size, layers)}
+    is small and sent along with every query.
+    """
+
+    def __init__(self, world_db, chunk_size=16, chunk_y=128):
+        """
+        Args:
+            world_db (dict): {chunk_origin: Chunk} to copy.
+            chunk_size (int): Chunk width along X and Z.
+            chunk_y (int): Y component of every chunk key in world_db.
+        """
+        self.chunk_size = chunk_size
+        self.chunk_y = chunk_y
+        self.index = {}
+        self.users = 0  # queries still running against this snapshot
+
+        parts = []
+        offset = 0
+        for origin, chunk in list(world_db.items()):
+            if chunk.standable_layers is None:
+                chunk.build_walkability()
+            layer_bytes = (chunk.layer_size + 7) // 8
+            layers = chunk.standable_layers
+            data = b''.join(layer.to_bytes(layer_bytes, 'little') for layer in layers)
+            self.index[(origin[0], origin[2])] = (offset, chunk.y_min, chunk.x_size, chunk.z_size, len(layers))
+            parts.append(data)
+            offset += len(data)
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.shm.buf[:offset] = b''.join(parts)
+
+    def descriptor(self):
+        """Everything a worker needs to attach: (shm name, index, chunk size, chunk y)."""
+        return self.shm.name, self.index, self.chunk_size, self.chunk_y
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SnapshotView:
+    """
+    is_standable() over a WorldSnapshot buffer (the shared memoryview itself,
+    no copy), for use inside a worker. Chunks are decoded back into int
+    bitmasks the first time they are hit.
+    """
+
+    def __init__(self, buf, index, chunk_size=16, chunk_y=128):
+        self.buf = buf
+        self.index = index
+        self.chunk_size = chunk_size
+        self.chunk_y = chunk_y
+        # {(chunk x, chunk z): (layers, y_min, x_size, z_size)}
+        self._chunks = {}
+
+    def _decode(self, key):
+        entry = self.index.get(key)
+        if entry is None:
+            self._chunks[key] = None
+            return None
+        offset, y_min, x_size, z_size, count = entry
+        layer_bytes = (x_size * z_size + 7) // 8
+        buf = self.buf
+        layers = [int.from_bytes(buf[offset + i * layer_bytes:offset + (i + 1) * layer_bytes], 'little')
+                  for i in range(count)]
+        decoded = self._chunks[key] = (layers, y_min, x_size, z_size)
+        return decoded
+
+    def is_standable(self, x, y, z):
+        size = self.chunk_size
+        cx = x // size * size
+        cz = z // size * size
+        key = (cx, cz)
+        chunk = self._chunks.get(key, False)
+        if chunk is False:
+            chunk = self._decode(key)
+        if chunk is None:
+            return False
+        layers, y_min, x_size, z_size = chunk
+        ly = y - y_min
+        lx = x - cx
+        lz = z - cz
+        if 0 <= ly < len(layers) and 0 <= lx < x_size and 0 <= lz < z_size:
+            return (layers[ly] >> (lz * x_size + lx)) & 1 == 1
+        return False
+
+
+# ---------------------------------------------------
+# WORKER SIDE
+# ---------------------------------------------------
+
+# control blocks this worker has attached, by name
+_controls = {}
+_worker_lock = threading.Lock()
+
+
+def _control_block(name):
+    with _worker_lock:
+        shm = _controls.get(name)
+        if shm is None:
+            shm = _controls[name] = shared_memory.SharedMemory(name=name)
+        return shm
+
+
+def _run_query(snapshot, control_name, slot, start, goal, max_nodes, timeout):
+    """Worker entry point: A* against a snapshot, reporting progress into the control block."""
+    name, index, chunk_size, chunk_y = snapshot
+    # read the snapshot in place: the main process keeps it until this query is done
+    shm = shared_memory.SharedMemory(name=name)
+    view = SnapshotView(shm.buf, index, chunk_size, chunk_y)
+    control = _control_block(control_name).buf.cast('q')
+    base = slot * _SLOT_FIELDS
+
+    def progress(nodes):
+        control[base] = nodes
+        return control[base + 1] != 0
+
+    try:
+        status, path, nodes = search.astar(start, goal, view.is_standable,
+                                           max_nodes=max_nodes, timeout=timeout, progress=progress)
+        control[base] = nodes
+    finally:
+        control.release()
+        view.buf = None  # the memoryview must be gone before the handle is closed
+        shm.close()
+    return status, path, nodes
+
+
+# ---------------------------------------------------
+# MAIN PROCESS SIDE
+# ---------------------------------------------------
+
+class PathFuture:
+    """
+    Handle for one submitted query.
+
+    result() returns (status, path, nodes_expanded) like search.astar.
+    """
+
+    def __init__(self, service, future, slot, start, goal):
+        self.service = service
+        self.future = future
+        self.slot = slot
+        self.start = start
+        self.goal = goal
+
+    def done(self):
+        return self.future.done()
+
+    def progress(self):
+        """Nodes expanded so far (updated by the worker every 1024 nodes)."""
+        return self.service._read_slot(self.slot, 0)
+
+    def cancel(self):
+        """Stop the query; a running search ends with search.CANCELLED."""
+        if self.future.done():
+            return  # the slot may already belong to another query
+        if not self.future.cancel():
+            self.service._write_slot(self.slot, 1, 1)
+
+    def cancelled(self):
+        if self.future.cancelled():
+            return True
+        return self.future.done() and self.future.result()[0] == search.CANCELLED
+
+    def result(self, timeout=None):
+        """(status, path, nodes_expanded); waits up to timeout seconds (None = forever)."""
+        if self.future.cancelled():
+            return search.CANCELLED, [], 0
+        return self.future.result(timeout)
+
+    def path(self):
+        """The path if the query finished and found one, else []."""
+        if not self.done() or self.future.cancelled():
+            return []
+        status, path, _ = self.future.result()
+        return path if status == search.FOUND else []
+
+
+class PathService:
+    """
+    Pathfinding service that keeps the main loop free while searching.
+
+    GOAL:
+        - Long searches must not stop chunk streaming or the main loop.
+        - Searches can be watched (progress) and cancelled.
+        - Several goals can be searched at the same time.
+
+    HOW IT WORKS:
+        - submit() takes a snapshot of the walkability bitmaps (only when a
+          chunk was loaded / unloaded since the last one), hands its
+          shared memory name to a worker and returns a PathFuture.
+        - Snapshots are freed once no running query uses them.
+        - The pool is started on the first submit() and shut down at exit.
+    """
+
+    def __init__(self, world_db, chunk_size=16, chunk_y=128, workers=2, processes=True, max_queries=64):
+        """
+        Args:
+            world_db (dict): {chunk_origin: Chunk}, used by reference.
+            chunk_size (int): Chunk width along X and Z.
+            chunk_y (int): Y component of every chunk key in world_db.
+            workers (int): Number of searches that can run at once.
+            processes (bool): Use worker processes (False = threads, same API).
+            max_queries (int): Queries that can be pending at the same time.
+        """
+        self.world_db = world_db
+        self.chunk_size = chunk_size
+        self.chunk_y = chunk_y
+        self.workers = workers
+        self.processes = processes
+        self.max_queries = max_queries
+
+        self.executor = None
+        self.snapshot = None
+        self.stale = True
+        self._old_snapshots = []
+        self._free_slots = list(range(max_queries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+        self.control = shared_memory.SharedMemory(create=True, size=max_queries * _SLOT_FIELDS * 8)
+        self._control = self.control.buf.cast('q')
+        for i in range(len(self._control)):
+            self._control[i] = 0
+        atexit.register(self.shutdown)
+
+    def invalidate(self, chunk_origin=None):
+        """Call when chunks are loaded, unloaded or changed; the next submit() takes a new snapshot."""
+        self.stale = True
+
+    def _read_slot(self, slot, field):
+        return self._control[slot * _SLOT_FIELDS + field]
+
+    def _write_slot(self, slot, field, value):
+        self._control[slot * _SLOT_FIELDS + field] = value
+
+    def _take_snapshot(self):
+        with self._lock:
+            if self.snapshot is not None:
+                self._old_snapshots.append(self.snapshot)
+            self.snapshot = WorldSnapshot(self.world_db, self.chunk_size, self.chunk_y)
+            self.stale = False
+            self._free_old_snapshots()
+
+    def _free_old_snapshots(self):
+        for snapshot in [s for s in self._old_snapshots if s.users == 0]:
+            self._old_snapshots.remove(snapshot)
+            snapshot.release()
+
+    def submit(self, start_pos, goal_pos, max_nodes=2500000, timeout=15.0):
+        """
+        Queue a search from start_pos to goal_pos.
+
+        Returns:
+            PathFuture
+        """
+        if self.executor is None:
+            pool = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+            self.executor = pool(max_workers=self.workers)
+        if self.stale or self.snapshot is None:
+            self._take_snapshot()
+
+        with self._lock:
+            if not self._free_slots:
+                raise RuntimeError(f'more than {self.max_queries} path queries pending')
+            slot = self._free_slots.pop()
+            snapshot = self.snapshot
+            snapshot.users += 1
+        self._write_slot(slot, 0, 0)
+        self._write_slot(slot, 1, 0)
+
+        start = tuple(map(int, start_pos))
+        goal = tuple(map(int, goal_pos))
+        future = self.executor.submit(_run_query, snapshot.descriptor(), self.control.name, slot,
+                                      start, goal, max_nodes, timeout)
+
+        def finished(_, slot=slot, snapshot=snapshot):
+            with self._lock:
+                snapshot.users -= 1
+                self._free_slots.append(slot)
+                self._free_old_snapshots()
+
+        future.add_done_callback(finished)
+        return PathFuture(self, future, slot, start, goal)
+
+    def shutdown(self):
+        """Cancel pending queries, stop the pool and free the shared memory."""
+        if self.executor is not None:
+            for i in range(self.max_queries):
+                self._write_slot(i, 1, 1)
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        with self._lock:
+            if self.snapshot is not None:
+                self._old_snapshots.append(self.snapshot)
+                self.snapshot = None
+            for snapshot in self._old_snapshots:
+                snapshot.release()
+            self._old_snapshots = []
+        if self._control is not None:
+            self._control.release()
+            self._control = None
+            self.control.close()
+            self.control.unlink()
@@ -0,0 +1,41 @@
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Tokens refill at rate per second up to burst; take(n) spends them if
+    available. Used to cap how many MineScript calls background work makes.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            burst (float): Bucket size (defaults to one second worth of tokens, at least 1).
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self._last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def take(self, n=1):
+        """Spend n tokens. Returns False (and spends nothing) if there are not enough."""
+        self._refill()
+        if self.tokens < n:
+            return False
+        self.tokens -= n
+        return True
+
+    def wait_time(self, n=1):
+        """Seconds until n tokens are available."""
+        self._refill()
+        if self.tokens >= n or self.rate <= 0:
+            return 0.0 if self.tokens >= n else float('inf')
+        return (n - self.tokens) / self.rate
@@ -0,0 +1,414 @@
+"""
+Allocation-light A* core used by pathfinder.find_path (and astar_multi()
+for pathfinder.find_path_to_nearest).
+
+Positions are packed into single ints so the open heap holds plain
+(f, h, key) tuples and the bookkeeping is two int-keyed dicts (g score
+and parent). The 26 neighbour offsets, their key deltas and move costs
+are computed once at import. Kept free of MineScript imports so it can
+run anywhere (worker threads, other processes, offline benchmarks).
+"""
+import heapq
+import math
+import time
+
+# key layout: | x (26 bits) | y (12 bits) | z (26 bits) |
+_Z_BITS = 26
+_Y_BITS = 12
+_X_SHIFT = _Z_BITS + _Y_BITS
+_Z_OFFSET = 1 << (_Z_BITS - 1)
+_Y_OFFSET = 1 << (_Y_BITS - 1)
+_X_OFFSET = 1 << (_Z_BITS - 1)
+_Z_MASK = (1 << _Z_BITS) - 1
+_Y_MASK = (1 << _Y_BITS) - 1
+
+CLIMB_PENALTY = 0.5  # extra cost for any move that goes up
+# astar_multi() takes the exact nearest-goal heuristic up to this many goals, grouped boxes beyond
+EXACT_GOAL_LIMIT = 32
+
+_SQRT2_MINUS_1 = math.sqrt(2) - 1
+_SQRT3_MINUS_SQRT2 = math.sqrt(3) - math.sqrt(2)
+
+# search results
+FOUND = 'found'
+NO_PATH = 'no_path'
+TIMEOUT = 'timeout'
+MAX_NODES = 'max_nodes'
+CANCELLED = 'cancelled'
+
+
+def pack(x, y, z):
+    """Pack an integer block position into a single int key."""
+    return ((x + _X_OFFSET) << _X_SHIFT) | ((y + _Y_OFFSET) << _Z_BITS) | (z + _Z_OFFSET)
+
+
+def unpack(key):
+    """Inverse of pack()."""
+    return ((key >> _X_SHIFT) - _X_OFFSET,
+            ((key >> _Z_BITS) & _Y_MASK) - _Y_OFFSET,
+            (key & _Z_MASK) - _Z_OFFSET)
+
+
+def _build_neighbours():
+    neighbours = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                if dx == 0 and dy == 0 and dz == 0:
+                    continue
+                cost = math.sqrt(dx * dx + dy * dy + dz * dz)
+                if dy > 0:
+                    cost += CLIMB_PENALTY
+                dkey = (dx << _X_SHIFT) + (dy << _Z_BITS) + dz
+                # horizontal diagonals must not cut corners: key deltas of the
+                # two orthogonal cells that must be standable too (0 = no check)
+                corner = (dx << _X_SHIFT, dz) if dx and dz and not dy else 0
+                neighbours.append((dx, dy, dz, dkey, cost, corner))
+    return tuple(neighbours)
+
+
+# (dx, dy, dz, key delta, move cost, corner key deltas or 0)
+NEIGHBOURS = _build_neighbours()
+
+
+def octile(dx, dy, dz):
+    """
+    Exact 26-connected move cost over open ground (3D octile distance).
+    Admissible and consistent for the NEIGHBOURS costs.
+    """
+    a = abs(dx)
+    b = abs(dy)
+    c = abs(dz)
+    if a < b:
+        a, b = b, a
+    if b < c:
+        b, c = c, b
+    if a < b:
+        a, b = b, a
+    return a + _SQRT2_MINUS_1 * b + _SQRT3_MINUS_SQRT2 * c
+
+
+def reconstruct(parent, key):
+    """Follow parent links back from key; returns [(x, y, z), ...] start first."""
+    path = []
+    while key is not None:
+        path.append(unpack(key))
+        key = parent[key]
+    path.reverse()
+    return path
+
+
+def astar(start, goal, standable, max_nodes=2500000, timeout=15.0, progress=None):
+    """
+    A* over standable cells.
+
+    Args:
+        start (tuple): (x, y, z) integer start cell.
+        goal (tuple): (x, y, z) integer goal cell.
+        standable (callable): standable(x, y, z) -> bool.
+        max_nodes (int): Give up after expanding this many nodes.
+        timeout (float): Give up after this many seconds (checked every 1024 nodes).
+        progress (callable): Optional progress(nodes_expanded) called every
+            1024 nodes; the search stops with CANCELLED if it returns True.
+
+    Returns:
+        tuple: (status, path, nodes_expanded) with status one of
+            FOUND / NO_PATH / TIMEOUT / MAX_NODES / CANCELLED and path a list of
+            (x, y, z) tuples (empty unless FOUND).
+    """
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    neighbours = NEIGHBOURS
+    d2 = _SQRT2_MINUS_1
+    d3 = _SQRT3_MINUS_SQRT2
+
+    gx, gy, gz = goal
+    start_key = pack(*start)
+    goal_key = pack(*goal)
+
+    h = octile(start[0] - gx, start[1] - gy, start[2] - gz)
+    open_heap = [(h, h, start_key)]
+    g_score = {start_key: 0.0}
+    parent = {start_key: None}
+    closed = set()
+    # standable() results for this search, keyed like g_score
+    walkable = {}
+
+    nodes = 0
+    deadline = time.time() + timeout
+
+    while open_heap:
+        _, _, key = heappop(open_heap)
+        if key in closed:
+            continue
+        closed.add(key)
+
+        nodes += 1
+        if nodes > max_nodes:
+            return MAX_NODES, [], nodes
+        if not nodes & 1023:
+            if time.time() > deadline:
+                return TIMEOUT, [], nodes
+            if progress is not None and progress(nodes):
+                return CANCELLED, [], nodes
+
+        if key == goal_key:
+            return FOUND, reconstruct(parent, key), nodes
+
+        x, y, z = unpack(key)
+        g = g_score[key]
+
+        for dx, dy, dz, dkey, cost, corner in neighbours:
+            nkey = key + dkey
+            if nkey in closed:
+                continue
+            nx = x + dx
+            ny = y + dy
+            nz = z + dz
+            ok = walkable.get(nkey)
+            if ok is None:
+                ok = walkable[nkey] = standable(nx, ny, nz)
+            if not ok:
+                continue
+            if corner:
+                ckey = key + corner[0]
+                ok = walkable.get(ckey)
+                if ok is None:
+                    ok = walkable[ckey] = standable(nx, y, z)
+                if not ok:
+                    continue
+                ckey = key + corner[1]
+                ok = walkable.get(ckey)
+                if ok is None:
+                    ok = walkable[ckey] = standable(x, y, nz)
+                if not ok:
+                    continue
+
+            ng = g + cost
+            old = g_score.get(nkey)
+            if old is not None and old <= ng:
+                continue
+            g_score[nkey] = ng
+            parent[nkey] = key
+
+            # inline octile(nx - gx, ny - gy, nz - gz)
+            a = nx - gx if nx > gx else gx - nx
+            b = ny - gy if ny > gy else gy - ny
+            c = nz - gz if nz > gz else gz - nz
+            if a < b:
+                a, b = b, a
+            if b < c:
+                b, c = c, b
+            if a < b:
+                a, b = b, a
+            h = a + d2 * b + d3 * c
+            heappush(open_heap, (ng + h, h, nkey))
+
+    return NO_PATH, [], nodes
+
+
+def _goal_boxes(goals, limit):
+    """Group goals into at most limit bounding boxes, [(x0, x1, y0, y1, z0, z1)], coarser grid cells until they fit."""
+    shift = 3
+    while True:
+        boxes = {}
+        for x, y, z in goals:
+            cell = (x >> shift, y >> shift, z >> shift)
+            box = boxes.get(cell)
+            if box is None:
+                boxes[cell] = [x, x, y, y, z, z]
+            else:
+                box[0] = min(box[0], x)
+                box[1] = max(box[1], x)
+                box[2] = min(box[2], y)
+                box[3] = max(box[3], y)
+                box[4] = min(box[4], z)
+                box[5] = max(box[5], z)
+        if len(boxes) <= limit:
+            return [tuple(box) for box in boxes.values()]
+        shift += 1
+
+
+def _goal_heuristic(goals):
+    """
+    Admissible h(x, y, z) towards the nearest of goals: exact (min octile)
+    for up to EXACT_GOAL_LIMIT goals; beyond, octile distance to the nearest
+    of up to EXACT_GOAL_LIMIT boxes grouping nearby goals.
+    """
+    if len(goals) <= EXACT_GOAL_LIMIT:
+        def h(x, y, z):
+            return min(octile(x - gx, y - gy, z - gz) for gx, gy, gz in goals)
+        return h
+    boxes = _goal_boxes(goals, EXACT_GOAL_LIMIT)
+
+    def h(x, y, z):
+        return min(octile(max(x0 - x, 0, x - x1), max(y0 - y, 0, y - y1), max(z0 - z, 0, z - z1))
+                   for x0, x1, y0, y1, z0, z1 in boxes)
+    return h
+
+
+def astar_multi(start, goals, standable, is_goal=None, radius=None, first_hit=False,
+                max_nodes=2500000, timeout=15.0, progress=None):
+    """
+    A* to the cheapest reachable of several goals, in one search.
+
+    Args:
+        start (tuple): (x, y, z) integer start cell.
+        goals (iterable): (x, y, z) goal cells (may be empty when is_goal is given).
+        standable (callable): standable(x, y, z) -> bool.
+        is_goal (callable): Optional is_goal(x, y, z) -> bool; cells it accepts are
+            goals too. The search is then uniform-cost (no heuristic).
+        radius (float): Never leave this straight-line distance from start.
+        first_hit (bool): Stop as soon as a goal is reached by any move instead of
+            when it is proven cheapest (fewer nodes, the path may be a bit longer).
+        max_nodes, timeout, progress: As for astar().
+
+    Returns:
+        tuple: (status, path, nodes_expanded) like astar(); when FOUND, path[-1]
+            is the goal that was reached.
+    """
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    neighbours = NEIGHBOURS
+
+    goals = [tuple(goal) for goal in goals]
+    goal_keys = {pack(*goal) for goal in goals}
+    if not goals and is_goal is None:
+        return NO_PATH, [], 0
+    heuristic = _goal_heuristic(goals) if goals and is_goal is None else None
+
+    sx, sy, sz = start
+    start_key = pack(*start)
+    limit = None if radius is None else radius * radius
+
+    h = heuristic(*start) if heuristic is not None else 0.0
+    open_heap = [(h, h, start_key)]
+    g_score = {start_key: 0.0}
+    parent = {start_key: None}
+    closed = set()
+    walkable = {}
+
+    nodes = 0
+    deadline = time.time() + timeout
+
+    while open_heap:
+        _, _, key = heappop(open_heap)
+        if key in closed:
+            continue
+        closed.add(key)
+
+        nodes += 1
+        if nodes > max_nodes:
+            return MAX_NODES, [], nodes
+        if not nodes & 1023:
+            if time.time() > deadline:
+                return TIMEOUT, [], nodes
+            if progress is not None and progress(nodes):
+                return CANCELLED, [], nodes
+
+        x, y, z = unpack(key)
+        if key in goal_keys or (is_goal is not None and is_goal(x, y, z)):
+            return FOUND, reconstruct(parent, key), nodes
+        g = g_score[key]
+
+        for dx, dy, dz, dkey, cost, corner in neighbours:
+            nkey = key + dkey
+            if nkey in closed:
+                continue
+            nx = x + dx
+            ny = y + dy
+            nz = z + dz
+            if limit is not None and (nx - sx) ** 2 + (ny - sy) ** 2 + (nz - sz) ** 2 > limit:
+                continue
+            ok = walkable.get(nkey)
+            if ok is None:
+                ok = walkable[nkey] = standable(nx, ny, nz)
+            if not ok:
+                continue
+            if corner:
+                ckey = key + corner[0]
+                ok = walkable.get(ckey)
+                if ok is None:
+                    ok = walkable[ckey] = standable(nx, y, z)
+                if not ok:
+                    continue
+                ckey = key + corner[1]
+                ok = walkable.get(ckey)
+                if ok is None:
+                    ok = walkable[ckey] = standable(x, y, nz)
+                if not ok:
+                    continue
+
+            ng = g + cost
+            old = g_score.get(nkey)
+            if old is not None and old <= ng:
+                continue
+            g_score[nkey] = ng
+            parent[nkey] = key
+            if first_hit and (nkey in goal_keys or (is_goal is not None and is_goal(nx, ny, nz))):
+                return FOUND, reconstruct(parent, nkey), nodes
+            h = heuristic(nx, ny, nz) if heuristic is not None else 0.0
+            heappush(open_heap, (ng + h, h, nkey))
+
+    return NO_PATH, [], nodes
+
+
+def dijkstra(source, standable, targets, reverse=False, max_nodes=200000):
+    """
+    Uniform-cost search from source until every target is settled.
+
+    Args:
+        source (tuple): (x, y, z) start cell.
+        standable (callable): standable(x, y, z) -> bool.
+        targets (iterable): Cells (tuples) or packed keys to find costs for.
+        reverse (bool): Return the cost of walking from each target TO source
+            (climb penalties are applied in the other direction).
+        max_nodes (int): Expansion limit.
+
+    Returns:
+        dict: {target key: cost} for every target that was reached.
+    """
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    neighbours = NEIGHBOURS
+
+    wanted = {t if isinstance(t, int) else pack(*t) for t in targets}
+    source_key = pack(*source)
+    open_heap = [(0.0, source_key)]
+    g_score = {source_key: 0.0}
+    closed = set()
+    walkable = {}
+    found = {}
+
+    while open_heap and len(found) < len(wanted) and len(closed) < max_nodes:
+        g, key = heappop(open_heap)
+        if key in closed:
+            continue
+        closed.add(key)
+        if key in wanted:
+            found[key] = g
+
+        x, y, z = unpack(key)
+        for dx, dy, dz, dkey, cost, corner in neighbours:
+            nkey = key + dkey
+            if nkey in closed:
+                continue
+            ok = walkable.get(nkey)
+            if ok is None:
+                ok = walkable[nkey] = standable(x + dx, y + dy, z + dz)
+            if not ok:
+                continue
+            if corner:
+                if not (standable(x + dx, y, z) and standable(x, y, z + dz)):
+                    continue
+            if reverse and dy:
+                # walking nkey -> key climbs when dy < 0, not when dy > 0
+                cost += CLIMB_PENALTY if dy < 0 else -CLIMB_PENALTY
+            ng = g + cost
+            old = g_score.get(nkey)
+            if old is not None and old <= ng:
+                continue
+            g_score[nkey] = ng
+            heappush(open_heap, (ng, nkey))
+
+    return found
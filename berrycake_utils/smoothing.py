@@ -0,0 +1,114 @@
+"""
+Path smoothing: turn a block-by-block path into a few walkable waypoints.
+
+find_path / search.astar return one cell per block. smooth_path()
+string-pulls that into straight runs on the same level, keeping every
+point where the height changes and tagging it with what the Walker has
+to do there. Kept free of MineScript imports like search.py.
+"""
+import math
+from collections import namedtuple
+
+# what the Walker does when heading for a waypoint
+WALK = 'walk'
+JUMP = 'jump'   # one block up from the previous waypoint
+DROP = 'drop'   # down from the previous waypoint
+
+Waypoint = namedtuple('Waypoint', 'x y z action')
+
+# half the player's width, used for the line-of-walk corridor
+PLAYER_RADIUS = 0.3
+# distance between samples along a line-of-walk check
+_LINE_STEP = 0.25
+
+
+def line_of_walk(a, b, standable, radius=PLAYER_RADIUS):
+    """
+    True if a player can walk straight from the centre of cell a to the
+    centre of cell b (same Y) without leaving standable ground: every
+    cell under the player's footprint along the line must be standable.
+    """
+    y = a[1]
+    ax, az = a[0] + 0.5, a[2] + 0.5
+    dx = b[0] + 0.5 - ax
+    dz = b[2] + 0.5 - az
+    steps = max(1, int(math.ceil(math.hypot(dx, dz) / _LINE_STEP)))
+    checked = set()
+    for i in range(steps + 1):
+        t = i / steps
+        px = ax + dx * t
+        pz = az + dz * t
+        for cx in {math.floor(px - radius), math.floor(px + radius)}:
+            for cz in {math.floor(pz - radius), math.floor(pz + radius)}:
+                if (cx, cz) in checked:
+                    continue
+                if not standable(cx, y, cz):
+                    return False
+                checked.add((cx, cz))
+    return True
+
+
+def smooth_path(path, standable, max_run=24):
+    """
+    Reduce a block path to the fewest waypoints that are still safe to walk.
+
+    Args:
+        path (list): [(x, y, z), ...] consecutive cells, start first.
+        standable (callable): standable(x, y, z) -> bool (e.g. WorldView.is_standable).
+        max_run (int): Longest stretch of path cells merged into one waypoint,
+            so the Walker still corrects its heading now and then.
+
+    Returns:
+        list: [Waypoint(x, y, z, action), ...]; the first is the start cell,
+            the last is the goal. Every change in height is kept as a
+            JUMP / DROP waypoint right after the cell before it.
+    """
+    if not path:
+        return []
+    path = [tuple(map(int, cell)) for cell in path]
+    anchor = path[0]
+    waypoints = [Waypoint(*anchor, WALK)]
+    i = 1
+    n = len(path)
+    while i < n:
+        cell = path[i]
+        if cell[1] != anchor[1]:
+            waypoints.append(Waypoint(*cell, JUMP if cell[1] > anchor[1] else DROP))
+            anchor = cell
+            i += 1
+            continue
+
+        # furthest cell on this level still in a straight line of walk
+        j = i
+        while (j + 1 < n and j + 1 - i < max_run and path[j + 1][1] == anchor[1]
+               and line_of_walk(anchor, path[j + 1], standable)):
+            j += 1
+        waypoints.append(Waypoint(*path[j], WALK))
+        anchor = path[j]
+        i = j + 1
+    return waypoints
+
+
+def first_unreached(path, position, start=0, end=None):
+    """
+    The cell of a block path the player could not get to: the one after the
+    cell of path[start:end + 1] closest to position. Used to report where the
+    Walker got stuck on a smoothed run, which may span many cells.
+
+    Args:
+        path (list): [(x, y, z), ...] the block path the waypoints came from.
+        position (tuple): Player position (x, y, z), feet.
+        start (int): First path index the player may be at (previous waypoint).
+        end (int): Path index of the waypoint being walked to (default: last).
+
+    Returns:
+        tuple: (x, y, z) cell, or None for an empty path.
+    """
+    if not path:
+        return None
+    end = len(path) - 1 if end is None else min(end, len(path) - 1)
+    start = max(0, min(start, end))
+    px, py, pz = position[:3]
+    closest = min(range(start, end + 1),
+                  key=lambda i: (path[i][0] + 0.5 - px) ** 2 + (path[i][1] - py) ** 2 + (path[i][2] + 0.5 - pz) ** 2)
+    return tuple(map(int, path[min(closest + 1, end)][:3]))
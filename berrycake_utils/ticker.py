@@ -0,0 +1,103 @@
+import system.lib.minescript as ms
+import time
+from collections import deque, namedtuple
+
+# Minecraft runs at 20 ticks per second
+TICK_RATE = 20
+
+PlayerState = namedtuple('PlayerState', 'position yaw pitch')
+
+
+def read_player():
+    """
+    Player position and orientation in one MineScript call (ms.player()),
+    falling back to player_position() + player_orientation() on older versions.
+    """
+    if hasattr(ms, 'player'):
+        player = ms.player()
+        return PlayerState(tuple(player.position), player.yaw, player.pitch)
+    yaw, pitch = ms.player_orientation()
+    return PlayerState(tuple(ms.player_position()), yaw, pitch)
+
+
+class TickScheduler:
+    """
+    Fixed-rate loop timing for control code (Walker, camera...).
+
+    GOAL:
+        - Run control logic once per game tick instead of in a busy loop.
+        - Know how long each tick's work took and how many ticks were missed.
+
+    HOW IT WORKS:
+        - start() sets the first deadline; every wait() sleeps until the
+          next one, so ticks stay aligned to start + n * period.
+        - When the work overran one or more periods, those ticks count as
+          missed and the schedule skips ahead instead of bursting to catch up.
+    """
+
+    def __init__(self, rate=TICK_RATE, history=200):
+        """
+        Args:
+            rate (float): Ticks per second.
+            history (int): Number of recent tick latencies kept for stats().
+        """
+        self.period = 1.0 / rate
+        self.ticks = 0
+        self.missed = 0
+        self.latencies = deque(maxlen=history)
+        self._next = None
+        self._tick_start = None
+
+    def start(self):
+        self._tick_start = time.perf_counter()
+        self._next = self._tick_start + self.period
+
+    def wait(self):
+        """End the current tick: record its latency and sleep until the next one."""
+        if self._next is None:
+            self.start()
+        now = time.perf_counter()
+        self.latencies.append(now - self._tick_start)
+        self.ticks += 1
+
+        if now > self._next:
+            late = int((now - self._next) / self.period)
+            self.missed += late
+            self._next += late * self.period
+        if now < self._next:
+            time.sleep(self._next - now)
+        self._tick_start = time.perf_counter()
+        self._next += self.period
+
+    def stats(self):
+        """{'ticks', 'missed', 'avg_ms', 'max_ms'} over the recent ticks."""
+        latencies = self.latencies
+        return {
+            'ticks': self.ticks,
+            'missed': self.missed,
+            'avg_ms': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            'max_ms': 1000 * max(latencies) if latencies else 0.0,
+        }
+
+
+class Controls:
+    """
+    Movement keys that only call MineScript when the pressed state changes.
+    Key names match ms.player_press_<name> (forward, jump, sprint, ...).
+    """
+
+    def __init__(self):
+        self.pressed = {}
+        self.sent = 0  # number of press calls actually sent
+
+    def press(self, key, down=True):
+        if self.pressed.get(key) == down:
+            return
+        getattr(ms, f'player_press_{key}')(down)
+        self.pressed[key] = down
+        self.sent += 1
+
+    def release_all(self):
+        for key, down in list(self.pressed.items()):
+            if down:
+                self.press(key, False)
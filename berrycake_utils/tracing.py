@@ -0,0 +1,155 @@
+"""
+Record MineScript sessions into compact traces for offline replay.
+
+TraceRecorder wraps the MineScript functions BerryCake calls and writes
+one line per call to a gzip'd JSON-lines file: the time since the start,
+the function name, a short signature of the arguments and the result.
+bench/replay.py feeds such a trace back in place of the game, so a slow
+session can be profiled offline and engine versions compared on the
+same inputs.
+
+Trace format (one JSON value per line):
+    {"version": 1, "started": <unix time>, "functions": [...], "meta": {...}}   header
+    [t, name, signature, result]                                                  one per call
+A call that raised is stored with {"__error__": "<repr>"} as its result.
+"""
+import atexit
+import gzip
+import json
+import threading
+import time
+import zlib
+
+TRACE_VERSION = 1
+
+# MineScript functions whose calls are recorded
+TRACED_FUNCTIONS = ('getblock', 'getblocklist', 'player', 'player_position', 'player_orientation',
+                    'player_set_orientation', 'player_look_at', 'get_entities', 'entities',
+                    'player_get_targeted_block', 'world_info', 'execute', 'echo',
+                    'player_press_forward', 'player_press_backward', 'player_press_left',
+                    'player_press_right', 'player_press_jump', 'player_press_sprint',
+                    'player_press_sneak', 'player_press_attack', 'player_press_use')
+
+
+def call_signature(args, kwargs):
+    """Short fingerprint of a call's arguments (big coordinate lists stay small in the trace)."""
+    text = repr((args, sorted(kwargs.items())))
+    if len(text) <= 64:
+        return text
+    return f'{len(text)}:{zlib.crc32(text.encode()):08x}'
+
+
+def encode(value):
+    """MineScript return values as plain JSON (objects become {'__obj__': {attribute: value}})."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)) and not hasattr(value, '_asdict'):
+        return [encode(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): encode(v) for k, v in value.items()}
+    if hasattr(value, '_asdict'):
+        fields = value._asdict()
+    elif hasattr(value, '__dict__'):
+        fields = vars(value)
+    elif hasattr(value, '__slots__'):
+        fields = {name: getattr(value, name) for name in value.__slots__ if hasattr(value, name)}
+    else:
+        return str(value)
+    return {'__obj__': {name: encode(v) for name, v in fields.items() if not name.startswith('_')}}
+
+
+class TraceRecorder:
+    """
+    Writes every MineScript call made through a module to a trace file.
+
+    GOAL:
+        - Capture exactly what the game answered during a session, with
+          timings, so it can be replayed offline.
+        - Keep traces small and recording cheap enough to leave on.
+
+    HOW IT WORKS:
+        - start() wraps the TRACED_FUNCTIONS of the module in place, like
+          metrics.instrument_minescript(), so modules that imported it
+          already are recorded too; stop() puts the originals back.
+        - Arguments are reduced to call_signature(); results are stored in
+          full (encode()), since replay has to return them.
+        - Calls from the chunk streamer thread are written under a lock.
+    """
+
+    def __init__(self, ms, path, meta=None):
+        """
+        Args:
+            ms (module): The MineScript module to record.
+            path (str): Trace file (gzip'd JSON lines).
+            meta (dict): Anything worth keeping with the trace (settings, world, version...).
+        """
+        self.ms = ms
+        self.path = path
+        self.meta = meta or {}
+        self.calls = 0
+        self._file = None
+        self._start = None
+        self._lock = threading.Lock()
+        self._originals = {}
+
+    def start(self):
+        if self._file is not None:
+            return self
+        self._originals = {name: getattr(self.ms, name) for name in TRACED_FUNCTIONS if hasattr(self.ms, name)}
+        self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+        # the functions that existed, so a replay offers the same API (see ticker.read_player)
+        header = {'version': TRACE_VERSION, 'started': time.time(), 'functions': list(self._originals),
+                  'meta': self.meta}
+        self._file.write(json.dumps(header) + '\n')
+        self._start = time.perf_counter()
+        for name, func in self._originals.items():
+            setattr(self.ms, name, self._wrap(name, func))
+        atexit.register(self.stop)
+        return self
+
+    def _wrap(self, name, func):
+        def wrapper(*args, **kwargs):
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self._write(name, call_signature(args, kwargs), {'__error__': repr(e)}, encoded=True)
+                raise
+            self._write(name, call_signature(args, kwargs), result)
+            return result
+        wrapper.__name__ = getattr(func, '__name__', name)
+        wrapper.__doc__ = getattr(func, '__doc__', None)
+        return wrapper
+
+    def _write(self, name, signature, result, encoded=False):
+        if not encoded:
+            result = encode(result)
+        line = json.dumps([round(time.perf_counter() - self._start, 6), name, signature, result],
+                          separators=(',', ':'))
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + '\n')
+                self.calls += 1
+
+    def stop(self):
+        """Restore the MineScript functions and close the trace."""
+        for name, func in self._originals.items():
+            setattr(self.ms, name, func)
+        self._originals = {}
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path):
+    """
+    Load a trace written by TraceRecorder.
+
+    Returns:
+        tuple: (header dict, [[t, name, signature, result], ...])
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != TRACE_VERSION:
+            raise ValueError(f'unsupported trace version {header.get("version")} in {path}')
+        return header, [json.loads(line) for line in f if line.strip()]
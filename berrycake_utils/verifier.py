@@ -0,0 +1,168 @@
+import system.lib.minescript as ms
+import random
+import time
+from collections import deque
+
+from berrycake_utils.blocks import AIR, is_clear, is_support
+from berrycake_utils.ratelimit import TokenBucket
+
+# probes per axis in a section; each axis is cut into PROBE_STEPS strata
+# and one random offset is picked per stratum on every visit
+PROBE_STEPS = 3
+
+
+class SectionVerifier:
+    """
+    Spot-checks loaded chunks against the game and rescans what changed.
+
+    GOAL:
+        - Keep world_db fresh in long sessions without block events and
+          without dropping and rescanning whole chunks.
+        - Never spend more than a fixed number of MineScript calls per second.
+
+    HOW IT WORKS:
+        - Every (chunk, 16-high section) pair of the loaded chunks is
+          visited in turn; each visit fetches a small 3x3x3 grid of probe
+          blocks (stratified random, so a different grid each pass),
+          sections_per_call sections per getblocklist call. Small edits are
+          found within a few passes, big ones on the first.
+        - A probe that disagrees with the stored block puts the section on
+          the rescan list; rescans fetch the whole section and write the
+          differences back (journal + listeners, like WorldDB.set_block).
+        - Every call (probe batch or rescan) takes a token from a
+          TokenBucket refilled at rpc_per_second.
+        - Sections the adaptive scan stored from its probes alone (Chunk.sampled)
+          only count as changed when a probe finds a block that walks
+          differently (support / clear / neither, see blocks.py): stone vs an
+          ore between the probes is not a change, stone vs water is.
+    """
+
+    def __init__(self, world, rpc_per_second=2.0, sections_per_call=8, seed=None):
+        """
+        Args:
+            world (WorldDB): Database to check (world_db, journal, chunk_change_listeners).
+            rpc_per_second (float): getblocklist calls allowed per second (0 = off).
+            sections_per_call (int): Sections probed with one getblocklist call.
+            seed (int): Seed for the probe offsets (None = random); replays pass the recorded one.
+        """
+        self.world = world
+        self.bucket = TokenBucket(rpc_per_second)
+        self.enabled = rpc_per_second > 0
+        self.sections_per_call = sections_per_call
+
+        self._queue = deque()    # [(chunk_origin, section)] still to probe this pass
+        self._rescan = deque()   # [(chunk_origin, section)] that failed a probe
+        self._rng = random.Random(seed)
+        self.passes = 0
+        self.stats = {'sections_checked': 0, 'mismatches': 0, 'sections_rescanned': 0,
+                      'blocks_fetched': 0, 'blocks_changed': 0}
+
+    def _next_pass(self):
+        # chunks the ChunkCache only retains may be outside the client's view, probes would read air
+        retained = self.world.chunk_cache.retained
+        for origin, chunk in list(self.world.world_db.items()):
+            if origin in retained:
+                continue
+            for section in range(chunk.section_count()):
+                self._queue.append((origin, section))
+        self.passes += 1
+
+    def check_first(self, origins):
+        """Probe these chunks before the rest of the pass (e.g. chunks preloaded from a cache)."""
+        world_db = self.world.world_db
+        for origin in reversed(list(origins)):
+            chunk = world_db.get(origin)
+            if chunk is not None:
+                self._queue.extendleft((origin, section) for section in reversed(range(chunk.section_count())))
+
+    def _offsets(self, size):
+        """One random local offset per stratum of 0..size."""
+        bounds = [size * i // PROBE_STEPS for i in range(PROBE_STEPS + 1)]
+        return sorted({self._rng.randrange(a, b) for a, b in zip(bounds, bounds[1:]) if b > a})
+
+    def _probe_coords(self, chunk, section):
+        y0, y1 = chunk.section_bounds(section)
+        return chunk.section_coords(section, self._offsets(chunk.x_size),
+                                    self._offsets(y1 - y0), self._offsets(chunk.z_size))
+
+    @staticmethod
+    def _matches(stored, actual, sampled):
+        if stored == actual:
+            return True
+        # a probed-only section never knew the blocks between its probes; only walkability counts
+        return sampled and is_support(stored) == is_support(actual) and is_clear(stored) == is_clear(actual)
+
+    def _probe(self, batch):
+        world_db = self.world.world_db
+        probes = []
+        for origin, section in batch:
+            chunk = world_db.get(origin)
+            if chunk is not None:
+                probes.append((origin, chunk, section, self._probe_coords(chunk, section)))
+        if not probes:
+            return
+        fetched = ms.getblocklist([coord for *_, coords in probes for coord in coords])
+        self.stats['blocks_fetched'] += len(fetched)
+
+        start = 0
+        for origin, chunk, section, coords in probes:
+            actual = fetched[start:start + len(coords)]
+            start += len(coords)
+            self.stats['sections_checked'] += 1
+            sampled = section in chunk.sampled
+            for coord, block_type in zip(coords, actual):
+                if not self._matches(chunk.get(tuple(coord), AIR), block_type, sampled):
+                    self.stats['mismatches'] += 1
+                    self._rescan.append((origin, section))
+                    break
+
+    def _rescan_section(self, origin, section):
+        world = self.world
+        chunk = world.world_db.get(origin)
+        if chunk is None:
+            return
+        coords = chunk.section_coords(section)
+        fetched = ms.getblocklist(coords)
+        self.stats['blocks_fetched'] += len(fetched)
+        self.stats['sections_rescanned'] += 1
+
+        # only journal real changes, not the ores a probed-only section was stored without
+        sampled = section in chunk.sampled
+        changed = 0
+        for coord, block_type in zip(coords, fetched):
+            coord = tuple(coord)
+            old = chunk.get(coord, AIR)
+            if not self._matches(old, block_type, sampled):
+                world.journal.append(coord, old, block_type)
+                changed += 1
+        if not changed:
+            return
+        self.stats['blocks_changed'] += changed
+        chunk.set_section(section, fetched)
+        chunk.build_walkability()
+        for listener in world.chunk_change_listeners:
+            listener(origin)
+
+    def update(self, budget=0.05):
+        """
+        Probe / rescan as far as the token bucket and ~budget seconds allow.
+        Call once per main loop cycle.
+        """
+        if not self.enabled:
+            return
+        deadline = time.time() + budget
+        while time.time() < deadline:
+            if self._rescan:
+                if not self.bucket.take():
+                    return
+                self._rescan_section(*self._rescan.popleft())
+                continue
+
+            if not self._queue:
+                self._next_pass()
+                if not self._queue:
+                    return
+            if not self.bucket.take():
+                return
+            batch = [self._queue.popleft() for _ in range(min(self.sections_per_call, len(self._queue)))]
+            self._probe(batch)
@@ -1,12 +1,27 @@
 import system.lib.minescript as ms
-from berrycake_utils.camctrl import CameraControl
+from berrycake_utils.camctrl import CameraController
 import time
 from berrycake_utils.pathfinder import find_path
+from berrycake_utils.ticker import TickScheduler, Controls, read_player, TICK_RATE
+from berrycake_utils.smoothing import JUMP, first_unreached
+from berrycake_utils.metrics import METRICS
 
 
 class Walker:
-    def __init__(self, path, sprint=True, briding=False, breaking=False):
+    def __init__(self, path, sprint=True, briding=False, breaking=False, tick_rate=TICK_RATE, raw_path=None):
         self.path = path
+        # block path the (smoothed) waypoints were made from, to report where a run got stuck
+        self.raw_path = raw_path
+        # path cell the Walker failed to reach when walk() returned 'stuck'
+        self.stuck_at = None
+
+        # fixed-rate control loop
+        self.scheduler = TickScheduler(tick_rate)
+        self.controls = Controls()
+        self.camera = CameraController()
+        self.tick_stats = {}
+        # callables run once per tick (e.g. the metrics exporter, so the HUD stays live while walking)
+        self.tick_listeners = []
 
 
     def parse_path(self, path):
@@ -16,50 +31,97 @@ class Walker:
 
         return new_path
 
+    def _raw_indices(self):
+        """Index in raw_path of every waypoint (waypoints are cells of the raw path, in order)."""
+        indices = []
+        j = 0
+        for cell in self.path:
+            target = tuple(map(int, cell[:3]))
+            k = j
+            while k < len(self.raw_path) and tuple(self.raw_path[k][:3]) != target:
+                k += 1
+            if k == len(self.raw_path):
+                return None  # not made from raw_path
+            indices.append(k)
+            j = k
+        return indices
+
+    def _stuck_cell(self, index, position):
+        """The first raw path cell not reached on the way to waypoint index (the waypoint without raw_path)."""
+        cell = self.path[index]
+        indices = self._raw_indices() if self.raw_path else None
+        if indices is None:
+            return tuple(cell[:3])
+        start = indices[index - 1] if index else 0
+        return first_unreached(self.raw_path, position, start, indices[index])
+
     def walk(self, close_distance=1, timer_per_block=1.5, repathing_dist=4.5):
-        for coord in self.path:
-            target_orientation = CameraControl.calculate_orientation(coord)
-
-            start_time = time.time()
-            while time.time() - start_time < timer_per_block:
-                player_x, player_y, player_z = ms.player_position()
-                dist = ((player_x - coord[0]) ** 2 +
-                        (player_y - coord[1]) ** 2 +
-                        (player_z - coord[2]) ** 2) ** 0.5
-
-                # Stop if we're close enough to this node
-                if dist <= close_distance:
-                    #ms.player_press_forward(False)
-                    ms.player_press_jump(False)
-                    break
-
-                # Face target
-                CameraControl.lock_target(target_orientation, max_step=4.0, timeout=0.18)
-
-                # Jump if needed
-                _, ppitch = ms.player_orientation()
-                if ppitch < -1:
-                    ms.player_press_jump(True)
-                else:
-                    ms.player_press_jump(False)
-
-                # Move forward
-                ms.player_press_forward(True)
-
-                time.sleep(0.02)  # tick delay
-
-            player_x, player_y, player_z = ms.player_position()
-            dist = ((player_x - coord[0]) ** 2 +
-                        (player_y - coord[1]) ** 2 +
-                        (player_z - coord[2]) ** 2) ** 0.5
-            if dist >= repathing_dist:      
-                ms.echo('§4[§c§lBerryCake§c❤§4]§f REPATHING - stuck')
-                return 'stuck'
-            
-
-
-        ms.player_press_forward(False)
-        ms.player_press_jump(False)
-        return 'done'
+        """
+        Walk the path. Entries are (x, y, z) cells or smoothing.Waypoint;
+        waypoints are walked to their block centre, may be many blocks
+        apart (the time limit grows with the distance) and say when to jump.
+
+        Runs once per tick (see TickScheduler): player state is read once,
+        the camera follows a CameraController trajectory while walking and
+        keys are only sent when they change. Tick latency / missed ticks
+        end up in tick_stats and, when enabled, in METRICS.
+        """
+        scheduler = self.scheduler
+        controls = self.controls
+        camera = self.camera
+        scheduler.start()
+        state = read_player()
+        previous = state.position
+        try:
+            for index, cell in enumerate(self.path):
+                coord = cell
+                action = getattr(cell, 'action', None)
+                if action is not None:
+                    coord = (cell.x + 0.5, cell.y, cell.z + 0.5)
+                blocks = max(1.0, ((coord[0] - previous[0]) ** 2 + (coord[2] - previous[2]) ** 2) ** 0.5)
+                previous = coord
+
+                start_time = time.time()
+                while time.time() - start_time < timer_per_block * blocks:
+                    state = read_player()
+                    dist = self._distance(state.position, coord)
+
+                    # Stop if we're close enough to this node
+                    if dist <= close_distance:
+                        controls.press('jump', False)
+                        break
+
+                    # Face target: retarget the camera trajectory, one step per tick
+                    with METRICS.timer('walker.camera_ms'):
+                        _, gpitch = camera.look_at(coord, state.position, (state.yaw, state.pitch))
+                        camera.step()
+
+                    # Jump if needed
+                    controls.press('jump', action == JUMP or gpitch < -1)
+
+                    # Move forward
+                    controls.press('forward', True)
+
+                    for listener in self.tick_listeners:
+                        listener()
+                    scheduler.wait()
+                    METRICS.observe('walker.tick_ms', 1000 * scheduler.latencies[-1])
+
+                state = read_player()
+                if self._distance(state.position, coord) >= repathing_dist:
+                    ms.echo('§4[§c§lBerryCake§c❤§4]§f REPATHING - stuck')
+                    self.stuck_at = self._stuck_cell(index, state.position)
+                    return 'stuck'
+        finally:
+            controls.release_all()
+            self.tick_stats = scheduler.stats()
+            self.tick_stats['inputs_sent'] = controls.sent + camera.sent
+            METRICS.count('walker.ticks', self.tick_stats['ticks'])
+            METRICS.count('walker.missed', self.tick_stats['missed'])
+            METRICS.count('walker.inputs_sent', self.tick_stats['inputs_sent'])
 
+        return 'done'
 
+    @staticmethod
+    def _distance(a, b):
+        return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2) ** 0.5
@@ -0,0 +1,97 @@
+import system.lib.minescript as ms
+import os
+import re
+import time
+
+from berrycake_utils.chunkloader import SCAN_ERRORS
+from berrycake_utils.chunkstore import ChunkStore
+
+# cached chunks older than this are still used at startup, but rescanned in the background
+MAX_TRUST_AGE = 6 * 3600
+
+
+def world_key():
+    """
+    Name the current world + dimension for the cache file,
+    e.g. 'play.example.net_overworld' or 'My World_the_nether'.
+
+    Returns:
+        str | None: None when MineScript cannot say which world this is
+            (no warm start then, a cache shared between worlds would be wrong).
+    """
+    if not hasattr(ms, 'world_info'):
+        ms.echo('§4[§c§lBerryCake§c❤§4]§f no warm start: this MineScript has no world_info()')
+        return None
+    try:
+        info = ms.world_info()
+        name = getattr(info, 'address', None) or getattr(info, 'name', None)
+        dimension = getattr(info, 'dimension', None)
+        if dimension is None and hasattr(ms, 'player'):
+            dimension = getattr(ms.player(), 'dimension', None)
+    except SCAN_ERRORS as e:
+        ms.echo(f'§4[§c§lBerryCake§c❤§4]§f no warm start: world lookup failed ({e!r})')
+        return None
+    key = f'{name or "default"}_{dimension or "overworld"}'.replace('minecraft:', '')
+    return re.sub(r'[^A-Za-z0-9._ -]+', '_', key)
+
+
+class WarmStartCache:
+    """
+    Chunks kept on disk between sessions, one ChunkStore per world + dimension.
+
+    GOAL:
+        - Have the chunks around the player usable right after launch
+          instead of waiting for the first full rescan.
+        - Never trust the cache blindly: preloaded chunks are revalidated
+          in the background.
+
+    HOW IT WORKS:
+        - preload() reads the stored chunks within a radius of the player;
+          chunks stored with another height range or size are skipped.
+        - fresh() says whether the cache was written recently enough
+          (MAX_TRUST_AGE) for spot-checks to be enough, otherwise WorldDB
+          rescans the preloaded chunks in the background.
+        - save() writes chunks back (on unload and at exit); compact() at
+          close keeps the file from growing with stale records.
+    """
+
+    def __init__(self, directory, key):
+        """
+        Args:
+            directory (str): Folder holding the cache files.
+            key (str): World + dimension name, see world_key().
+        """
+        self.key = key
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'{self.key}.bcr')
+        self.age = time.time() - os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        self.store = ChunkStore(self.path)
+        self.written = 0
+
+    def fresh(self):
+        return self.age is not None and self.age <= MAX_TRUST_AGE
+
+    def preload(self, center, radius, x_size, y_min, y_max, z_size):
+        """
+        Stored chunks within radius blocks (XZ) of center that match the given layout.
+
+        Returns:
+            dict: {chunk_origin: Chunk}
+        """
+        chunks = {}
+        for origin, chunk in self.store.read_near(center, radius, x_size).items():
+            if (chunk.x_size, chunk.y_min, chunk.y_max, chunk.z_size) == (x_size, y_min, y_max, z_size):
+                chunks[origin] = chunk
+        return chunks
+
+    def save(self, chunk, chunk_origin):
+        self.store.write(chunk, chunk_origin)
+        self.written += 1
+
+    def close(self):
+        if self.store is None:
+            return
+        if self.written:
+            self.store.compact()
+        self.store.close()
+        self.store = None
@@ -1,11 +1,36 @@
 import system.lib.minescript as ms  # MineScript API for interacting with Minecraft
+import atexit
 import time
-import keyboard
-import json
 import os
+import random
 import berrycake_utils.pathfinder as pf
+from berrycake_utils import search
 from berrycake_utils.walker import Walker
+from berrycake_utils.camctrl import CameraControl
+from berrycake_utils.blocks import is_support
+from berrycake_utils.chunk import Chunk, NO_SURFACE
+from berrycake_utils.chunkloader import ChunkStreamer
+from berrycake_utils.chunkstore import ChunkStore, migrate_json
+from berrycake_utils.chunkcache import ChunkCache, UNLOAD_MARGIN
+from berrycake_utils.worldview import WorldView
+from berrycake_utils.hpa import ClusterGraph
+from berrycake_utils.dstar import IncrementalPlanner
+from berrycake_utils.flowfield import FlowField
+from berrycake_utils.smoothing import smooth_path
+from berrycake_utils.worldevents import ChangeJournal, MinescriptEvents, BLOCK_UPDATE, CHUNK
+from berrycake_utils.verifier import SectionVerifier
+from berrycake_utils.batchedit import BatchEditor
+from berrycake_utils.metrics import METRICS, MetricsExporter, instrument_minescript
+from berrycake_utils.tracing import TraceRecorder
+from berrycake_utils.warmstart import WarmStartCache, world_key
 
+# local offsets probed in every 16-high section before deciding to fetch it in full
+SECTION_PROBE_XZ = (0, 5, 10, 15)
+SECTION_PROBE_Y = (0, 7, 15)
+# nearest-target searches consider at most this many candidates (straight-line nearest first)
+NEAREST_CANDIDATES = 64
+# probed-only sections find_nearest() may fetch in full per call (4096 blocks each)
+REFINE_SECTION_BUDGET = 16
 
 class WorldDB:
     """
@@ -14,16 +39,58 @@ class WorldDB:
     GOAL:
         - Keep track of all non-air blocks around the player.
         - Continuously load chunks around the player into memory.
-        - Unload chunks that are too far away to save memory.
+        - Unload chunks that are too far away to save memory, without
+          throwing away the ones the player is likely to come back to.
         - Optionally modify or query these stored blocks.
 
     HOW IT WORKS:
         - Divides the world into chunks (16x16 columns, full height).
-        - Each chunk is stored as a dictionary of coordinates -> block type.
+        - Each chunk is stored as a palette-compressed Chunk (see chunk.py)
+          that still behaves like a dictionary of coordinates -> block type.
         - A set number of chunks around the player are kept loaded in memory.
+        - Chunks are scanned section by section: a sparse probe first, then
+          a full fetch only for sections that are mixed or sit on a surface.
+          Sections whose probes all return the same block are stored as that
+          block; find_nearest() fetches the solid ones in full (within a
+          per-call budget) in chunks where the scan already saw the type, so
+          ores of a vein between the probes are still found.
+        - Missing chunks are streamed in nearest-first by a ChunkStreamer,
+          so run() only spends tick_budget seconds per cycle on loading.
+        - Loaded chunks are managed by a ChunkCache (chunkcache.py): chunks
+          stay loaded unload_margin chunks past the render distance, and
+          further out until max_chunks / max_memory_mb is reached, least
+          recently visited first. With spill=True (or warm_start) evicted
+          chunks go to disk and are restored from there instead of rescanned.
+        - Loaded chunks feed a ClusterGraph (hpa.py) so long routes are
+          planned chunk-to-chunk and refined while walking.
+        - Routes inside one chunk keep an IncrementalPlanner (dstar.py), so
+          a "stuck" repath repairs the old search instead of starting over.
+        - path_to_nearest() / walk_to_nearest() pick the closest reachable of
+          many blocks or entities and path there in one multi-goal search.
+        - add_destination() keeps a flow field (flowfield.py) toward a place
+          visited often; walk_to_destination() then reads every step from it
+          instead of searching, and changed chunks only repair part of it.
+        - request_path() searches in a worker process (pathservice.py);
+          run() keeps streaming chunks and walks the path once it is found.
+        - After the first scan, chunks are kept up to date from MineScript
+          block-update events (worldevents.py) instead of rescans; every
+          change goes to a ChangeJournal that consumers can read.
+        - A SectionVerifier (verifier.py) spot-checks loaded sections at a
+          fixed MineScript call rate and rescans only sections that changed.
+        - With metrics=True, run(), chunk scans, path searches, the Walker
+          and every MineScript call report to METRICS (metrics.py); a
+          MetricsExporter writes the HUD panel file and a JSON-lines log.
+        - With warm_start=True, chunks are cached on disk per world +
+          dimension (warmstart.py); the ones around the player are loaded
+          at startup and revalidated in the background, so the first path
+          can be planned before anything was scanned.
     """
 
-    def __init__(self, world_center=[0, 128, 0], xsize=16, y_bottom=-64, y_top=150, zsize=16, render_distance=8):
+    def __init__(self, world_center=[0, 128, 0], xsize=16, y_bottom=-64, y_top=150, zsize=16, render_distance=8,
+                 stream=True, tick_budget=0.05, adaptive_scan=True, event_source=None, track_events=True,
+                 verify_rpc_rate=2.0, metrics=False, trace_file=None, seed=None, warm_start=False,
+                 launched_at=None, max_chunks=None, max_memory_mb=None, unload_margin=UNLOAD_MARGIN,
+                 spill=False):
         """
         Initialize the database.
         
@@ -32,6 +99,27 @@ class WorldDB:
             xsize (int): Chunk size in X axis (default = 16).
             ysize (int): Half the chunk height scanned up/down from center.
             zsize (int): Chunk size in Z axis (default = 16).
+            stream (bool): Scan chunks on a background thread instead of inside run().
+            tick_budget (float): Seconds run() may spend handing over / scanning chunks.
+            adaptive_scan (bool): Probe 16-high sections and only fetch the ones that matter.
+            event_source: Object with poll(limit) -> events (see worldevents.EventFeed);
+                defaults to MineScript's EventQueue when track_events is set.
+            track_events (bool): Apply block-update / chunk events to the loaded chunks.
+            verify_rpc_rate (float): getblocklist calls per second for section spot-checks (0 = off).
+            metrics (bool): Record runtime metrics and export them to hud_metrics.txt / metrics.jsonl.
+            trace_file (str): Record every MineScript call to this trace for offline replay
+                (see tracing.py and bench/replay.py).
+            seed (int): Seed for the randomised parts (probe offsets, camera jitter); picked
+                at random when recording, and stored in the trace so a replay makes the same choices.
+            warm_start (bool | str): Preload cached chunks around the player and cache chunks on
+                unload / exit; a string names the cache folder (default 'cache' next to this file).
+            launched_at (float): time.time() the script started, for the startup metrics (defaults to now).
+            max_chunks (int): Chunks kept in memory, including ones past the render distance
+                (None = twice the chunks within render distance + unload_margin).
+            max_memory_mb (float): Approximate MB of chunk data kept in memory (None = no limit).
+            unload_margin (int): Chunks kept loaded past the render distance before they can be evicted.
+            spill (bool | str): Write evicted chunks to a session file (default 'cache/spill.bcr')
+                and restore them from it; with warm_start they go to the warm-start cache instead.
         """
         self.running = True
 
@@ -47,15 +135,110 @@ class WorldDB:
 
         # render distance for loading and unloading
         self.render_distance = render_distance
+        # (x_size, y_min, y_max, z_size) of the chunks this WorldDB scans (chunk origins sit at y=128)
+        self.chunk_layout = (xsize, 128 + self.y_search[0], 128 + self.y_search[-1] + 1, zsize)
 
         # Set of chunk origin positions currently tracked
         self.chunk_origins_coll = set()
 
-        # Main database: {chunk_origin: {block_coord: block_type}}
+        # Main database: {chunk_origin: Chunk}
         self.world_db = {}
 
+        # chunk scanning
+        self.adaptive_scan = adaptive_scan
+        self.scan_stats = {'chunks': 0, 'fetched_blocks': 0, 'volume': 0}
+
+        # chunk streaming
+        self.tick_budget = tick_budget
+        self.chunk_streamer = ChunkStreamer(self.scan_chunk, threaded=stream, chunk_size=xsize,
+                                            on_error=self._scan_failed)
+        # callbacks called as listener(chunk_origin) whenever a chunk is added / unloaded
+        self.chunk_ready_listeners = []
+        self.chunk_unload_listeners = []
+
+        # hierarchical pathfinding over chunk clusters
+        self.cluster_graph = ClusterGraph(self, chunk_size=xsize)
+        self.chunk_ready_listeners.append(self.cluster_graph.mark_dirty)
+        self.chunk_unload_listeners.append(self.cluster_graph.remove_chunk)
+
         # pathing variables
         self.repath_times = 0
+        # D* Lite search kept between repaths of a direct (non-hierarchical) route
+        self.planner = None
+        # background searches: [(goal, PathFuture)], handled by poll_paths();
+        # the PathService itself starts on first use (see path_service)
+        self._path_service = None
+        self.chunk_ready_listeners.append(self._invalidate_paths)
+        self.chunk_unload_listeners.append(self._invalidate_paths)
+        self.path_requests = []
+        # journal.seq when self.planner was (re)planned, changes after it are fed to repairs
+        self.planner_seq = 0
+        # flow fields toward named destinations {name: FlowField}; journal.seq of the last change fed to them
+        self.flow_fields = {}
+        self.fields_seq = 0
+        self.chunk_ready_listeners.append(self._invalidate_fields)
+        self.chunk_unload_listeners.append(self._invalidate_fields)
+
+        # which loaded chunks stay in memory, and where evicted ones go
+        # (with warm_start, evicted chunks are spilled to the warm-start cache, see below)
+        spill_path = None
+        if spill and not warm_start:
+            spill_path = self._data_path(spill if isinstance(spill, str) else 'cache/spill.bcr')
+        self.chunk_cache = ChunkCache(chunk_size=xsize, max_chunks=max_chunks,
+                                      max_bytes=max_memory_mb * 2 ** 20 if max_memory_mb else None,
+                                      unload_margin=unload_margin, layout=self.chunk_layout,
+                                      spill_path=spill_path)
+        if spill_path:
+            atexit.register(self.chunk_cache.close)
+        self.chunk_ready_listeners.append(self.chunk_cache.loaded)
+        self.chunk_unload_listeners.append(self.chunk_cache.unloaded)
+
+        # block / chunk events
+        self.journal = ChangeJournal(chunk_size=xsize)
+        # callbacks called as listener(chunk_origin) whenever blocks in a loaded chunk change
+        self.chunk_change_listeners = [self.cluster_graph.mark_dirty, self._invalidate_paths,
+                                       self.chunk_cache.changed]
+        # loaded chunks the client reloaded (changes may have been missed), rescanned in the background
+        self.stale_chunks = set()
+        if event_source is None and track_events and hasattr(ms, 'EventQueue'):
+            event_source = MinescriptEvents()
+        self.event_source = event_source
+        if seed is None and trace_file:
+            seed = random.randrange(2 ** 32)
+        if seed is not None:
+            random.seed(seed)
+        self.verifier = SectionVerifier(self, rpc_per_second=verify_rpc_rate, seed=seed)
+
+        # runtime metrics (disabled unless asked for: every hook is then a flag check)
+        if metrics:
+            METRICS.enable()
+            instrument_minescript(ms)
+        self.metrics_exporter = MetricsExporter(METRICS,
+                                                hud_path=self._data_path('hud_metrics.txt'),
+                                                log_path=self._data_path('metrics.jsonl'))
+
+        # session recording; the settings go in the trace so a replay can rebuild this WorldDB
+        self.trace_recorder = None
+        if trace_file:
+            settings = {'world_center': self.world_center, 'xsize': xsize, 'y_bottom': y_bottom, 'y_top': y_top,
+                        'zsize': zsize, 'render_distance': render_distance, 'stream': stream,
+                        'tick_budget': tick_budget, 'adaptive_scan': adaptive_scan,
+                        'verify_rpc_rate': verify_rpc_rate, 'seed': seed}
+            self.trace_recorder = TraceRecorder(ms, self._data_path(trace_file), meta={'worlddb': settings})
+            self.trace_recorder.start()
+
+        # startup timings {'first_chunk': secs, 'first_path': secs} since launch
+        self.launched_at = launched_at if launched_at is not None else time.time()
+        self.startup = {}
+
+        # warm start from the on-disk chunk cache of this world + dimension
+        self.cache = None
+        key = world_key() if warm_start else None
+        if key is not None:
+            self.cache = WarmStartCache(self._data_path(warm_start if isinstance(warm_start, str) else 'cache'), key)
+            self.chunk_cache.store = self.cache.store
+            atexit.register(self.close_cache)
+            self.preload_cache()
 
     # ---------------------------------------------------
     # CHUNK HANDLING
@@ -88,6 +271,81 @@ class WorldDB:
                 coord = (int(x * 16), 128, int(z * 16))
                 self.chunk_origins_coll.add(coord)
 
+    def chunk_origin_of(self, pos):
+        """Return the WorldDB key of the chunk containing block position pos."""
+        return (int(pos[0] // 16 * 16), 128, int(pos[2] // 16 * 16))
+
+    @METRICS.timed('chunk.scan_ms')
+    def scan_chunk(self, chunk_center):
+        """
+        Scan a single chunk through MineScript without touching the database.
+        Safe to call from the chunk streamer's worker thread.
+
+        Args:
+            chunk_center (tuple): (x, y, z) origin of the chunk.
+
+        Returns:
+            Chunk: the scanned chunk.
+        """
+        x0, y0, z0 = chunk_center
+        chunk = Chunk((x0, y0, z0),
+                      x_size=len(self.x_search),
+                      y_min=y0 + self.y_search[0],
+                      y_max=y0 + self.y_search[-1] + 1,
+                      z_size=len(self.z_search))
+        chunk.scanned_at = time.time()
+
+        if not self.adaptive_scan:
+            # Query every block type from MineScript, in the chunk's storage order
+            chunk.fill(ms.getblocklist(chunk.scan_coords()))
+            chunk.fetched_blocks = chunk.volume()
+            METRICS.count('chunks.fetched_blocks', chunk.fetched_blocks)
+            return chunk
+
+        sections = range(chunk.section_count())
+
+        # Pass 1: one sparse probe per section, all in a single request
+        probes = [chunk.section_coords(s, SECTION_PROBE_XZ, SECTION_PROBE_Y, SECTION_PROBE_XZ) for s in sections]
+        probed = ms.getblocklist([coord for probe in probes for coord in probe])
+
+        # A section counts as uniform only when every probe returned the same block;
+        # solid sections mixing stone, dirt and ores can still hold caves between the probes
+        uniform = []
+        start = 0
+        for probe in probes:
+            sample = set(probed[start:start + len(probe)])
+            start += len(probe)
+            uniform.append(sample.pop() if len(sample) == 1 else None)
+
+        # Pass 2: fetch mixed sections and passable sections resting on something
+        # that is not passable (the surface, where trees and walkable cells live)
+        to_fetch = []
+        for s in sections:
+            if uniform[s] is None:
+                to_fetch.append(s)
+            elif s > 0 and uniform[s] in pf.PASSABLE_BLOCKS and uniform[s - 1] not in pf.PASSABLE_BLOCKS:
+                to_fetch.append(s)
+            else:
+                chunk.set_section(s, uniform[s])
+                chunk.sampled.add(s)
+
+        full_coords = [chunk.section_coords(s) for s in to_fetch]
+        fetched = ms.getblocklist([coord for coords in full_coords for coord in coords]) if to_fetch else []
+
+        start = 0
+        for s, coords in zip(to_fetch, full_coords):
+            chunk.set_section(s, fetched[start:start + len(coords)])
+            start += len(coords)
+
+        chunk.fetched_blocks = len(probed) + len(fetched)
+        METRICS.count('chunks.fetched_blocks', chunk.fetched_blocks)
+        return chunk
+
+    def _scan_failed(self, chunk_origin, error):
+        """ChunkStreamer on_error: report the failed scan (the chunk is queued again)."""
+        ms.echo(f'§4[§c§lBerryCake§c❤§4]§f scan of chunk {chunk_origin} failed: {error!r}')
+
+    @METRICS.timed('chunk.generate_ms')
     def generate_chunk(self, chunk_center):
         """
         Scan a single chunk, storing all non-air blocks into the database.
@@ -95,54 +353,142 @@ class WorldDB:
         Args:
             chunk_center (tuple): (x, y, z) origin of the chunk.
         """
-        coords = []
-
-        x0, y0, z0 = chunk_center
+        self.add_chunk(self.scan_chunk(chunk_center), tuple(chunk_center))
 
-        # Generate a list of every block coordinate in this chunk
-        for x in self.x_search:
-            for y in self.y_search:
-                for z in self.z_search:
-                    coords.append([x0 + x, y0 + y, z0 + z])
+    def add_chunk(self, chunk, chunk_start_pos, scanned=True):
+        """Add a scanned (or cached, scanned=False) chunk to the database and notify listeners."""
+        # block events that arrived while the chunk was being scanned
+        if chunk.scanned_at is not None:
+            for change in self.journal.in_chunk(chunk_start_pos, after=chunk.scanned_at):
+                try:
+                    chunk[change.position] = change.new
+                except KeyError:
+                    pass  # outside the scanned height range
+        chunk.build_walkability()
+        chunk.build_type_index()
+        self.world_db[chunk_start_pos] = chunk
+        self.stale_chunks.discard(chunk_start_pos)
+        if scanned:
+            self.scan_stats['chunks'] += 1
+            METRICS.count('chunks.scanned')
+            self.scan_stats['fetched_blocks'] += chunk.fetched_blocks
+            self.scan_stats['volume'] += chunk.volume()
+        self.startup_mark('first_chunk')
+        for listener in self.chunk_ready_listeners:
+            listener(chunk_start_pos)
 
-        # Query block types from MineScript
-        block_types = ms.getblocklist(coords)
-        chunk_dict = dict(zip([tuple(i) for i in coords], block_types))
+    def scan_report(self):
+        """Average blocks fetched per chunk compared to a full column scan."""
+        chunks = self.scan_stats['chunks']
+        if not chunks:
+            return 'no chunks scanned yet'
+        fetched = self.scan_stats['fetched_blocks'] / chunks
+        volume = self.scan_stats['volume'] / chunks
+        return f'{fetched:.0f} blocks fetched per chunk ({fetched / volume:.1%} of a full {volume:.0f} block scan)'
 
-        ## Remove air blocks to save memory
-        #chunk_dict = {coord: btype for coord, btype in chunk_dict.items() if btype != 'minecraft:air'}
-    
-        self.add_chunk(chunk_dict, (x0, y0, z0))
-    
-    def add_chunk(self, chunk_dict, chunk_start_pos):
-        """Add a scanned chunk's data to the database."""
-        self.world_db[chunk_start_pos] = chunk_dict
+    def missing_chunks(self):
+        """Tracked chunk origins that are not loaded yet (or stale and due for a rescan)."""
+        return [origin for origin in self.chunk_origins_coll
+                if origin not in self.world_db or origin in self.stale_chunks]
 
     def generate_world(self):
-        """Generate all chunks in self.chunk_origins_coll that are not already loaded."""
-        for chunk_origin in self.chunk_origins_coll:
-            if chunk_origin not in self.world_db:
-                self.generate_chunk(chunk_origin)
+        """Synchronously generate every missing chunk, nearest to the player first."""
+        player_pos = ms.player_position()
+        missing = self.missing_chunks()
+        missing.sort(key=lambda o: (o[0] + 8 - player_pos[0]) ** 2 + (o[2] + 8 - player_pos[2]) ** 2)
+        for chunk_origin in missing:
+            self.generate_chunk(chunk_origin)
 
-    def unload_chunks(self):
+    def stream_world(self, budget=None):
         """
-        Unload chunks too far from the player.
-        
-        Args:
-            max_distance (int): Max chunk distance to keep in memory.
+        Queue missing chunks for the streamer and add the ones that finished,
+        spending at most ~budget seconds (defaults to self.tick_budget).
+        """
+        if budget is None:
+            budget = self.tick_budget
+        player_pos = ms.player_position()
+        missing = self.restore_chunks(self.missing_chunks(), player_pos, budget / 2)
+        self.chunk_streamer.update(missing, player_pos)
+        for chunk_origin, chunk in self.chunk_streamer.collect(budget):
+            if chunk_origin in self.chunk_origins_coll:
+                self.add_chunk(chunk, chunk_origin)
+
+    def restore_chunks(self, chunk_origins, player_pos, budget):
+        """
+        Load spilled chunks back from disk instead of rescanning them, nearest
+        first, for at most ~budget seconds. The journal is replayed since each
+        chunk's eviction; a chunk whose changes were not all kept is used but
+        also rescanned in the background.
+
+        Returns:
+            list: the chunk origins that still need a scan.
+        """
+        to_scan = []
+        restorable = []
+        for chunk_origin in chunk_origins:
+            if chunk_origin not in self.world_db and self.chunk_cache.can_restore(chunk_origin):
+                restorable.append(chunk_origin)
+            else:
+                to_scan.append(chunk_origin)
+        restorable.sort(key=lambda o: self.chunk_cache.distance(o, player_pos))
+
+        deadline = time.perf_counter() + budget
+        for chunk_origin in restorable:
+            if time.perf_counter() > deadline:
+                break  # next cycle, a disk read still beats a scan
+            chunk, evicted_at = self.chunk_cache.restore(chunk_origin)
+            if chunk is None:
+                to_scan.append(chunk_origin)
+                continue
+            # add_chunk replays the journal changes made after scanned_at
+            chunk.scanned_at = evicted_at
+            self.add_chunk(chunk, chunk_origin, scanned=False)
+            METRICS.count('chunks.restored')
+            if evicted_at is None or not self.journal.covers(evicted_at):
+                self.stale_chunks.add(chunk_origin)
+                to_scan.append(chunk_origin)
+        return to_scan
+
+    def wait_for_chunks(self, chunk_origins, timeout=5.0):
+        """
+        Block until every chunk in chunk_origins is loaded (or timeout passes).
+        Chunks finished in the meantime are added to the database as they arrive.
+
+        Returns:
+            bool: True if all chunks are loaded.
         """
-        max_distance = self.render_distance
+        chunk_origins = [tuple(o) for o in chunk_origins]
+        for origin in chunk_origins:
+            self.chunk_origins_coll.add(origin)
 
-        self.chunks_to_remove = []
+        deadline = time.time() + timeout
+        while True:
+            if all(origin in self.world_db for origin in chunk_origins):
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            self.stream_world(budget=min(remaining, self.tick_budget))
+            if self.chunk_streamer.threaded:
+                self.chunk_streamer.wait_for_any(min(remaining, 0.1))
+
+    def unload_chunks(self):
+        """
+        Unload chunks the ChunkCache no longer keeps in memory.
+
+        Chunks within render_distance // 2 + unload_margin chunks of the player
+        always stay; further ones stay until the cache is over budget, then
+        the least recently visited (weighted by distance) go first. Evicted
+        chunks are spilled to disk when spilling or warm start is on.
+        """
+        load_radius = self.render_distance // 2
         player_pos = ms.player_position()
-        current_chunk = (player_pos[0] // 16, player_pos[2] // 16)
 
-        for chunk in list(self.world_db.keys()):
-            x_dist = abs(chunk[0] // 16 - current_chunk[0])
-            z_dist = abs(chunk[2] // 16 - current_chunk[1])
+        # chunks still waiting for a scan that are now past the band are not wanted anymore
+        for chunk in self.chunk_cache.outside_band(list(self.chunk_origins_coll), player_pos, load_radius):
+            self.chunk_origins_coll.discard(chunk)
 
-            if x_dist > max_distance // 2 or z_dist > max_distance // 2:
-                self.chunks_to_remove.append(chunk)
+        self.chunks_to_remove = self.chunk_cache.evictions(self.world_db, player_pos, load_radius)
 
         '''
         for showcase - /fill chunk coord minecraft:air
@@ -152,8 +498,71 @@ class WorldDB:
             # remove this line to remove visualisation
             #ms.execute(f'/fill {chunk[0]} {chunk[1]} {chunk[2]} {chunk[0] + 15} {chunk[1]} {chunk[2] + 15} minecraft:air')
 
+            self.chunk_cache.spill(chunk, self.world_db[chunk])
+            METRICS.count('chunks.evicted')
             del self.world_db[chunk]
-            self.chunk_origins_coll.remove(chunk)
+            self.chunk_origins_coll.discard(chunk)
+            self.stale_chunks.discard(chunk)
+            for listener in self.chunk_unload_listeners:
+                listener(chunk)
+
+    # ---------------------------------------------------
+    # BLOCK EVENTS
+    # ---------------------------------------------------
+
+    def set_block(self, pos, block_type, old=None, when=None):
+        """
+        Apply one block change to the loaded chunk holding pos and log it in the journal.
+
+        Args:
+            pos (tuple): (x, y, z) block position.
+            block_type (str): New block id.
+            old (str): Previous block id if known (defaults to what WorldDB had).
+            when (float): time.time() of the change (defaults to now).
+
+        Returns:
+            bool: True if a loaded chunk was updated.
+        """
+        pos = tuple(int(c) for c in pos)
+        chunk_origin = self.chunk_origin_of(pos)
+        chunk = self.world_db.get(chunk_origin)
+        if old is None and chunk is not None:
+            old = chunk.get(pos)
+        self.journal.append(pos, old, block_type, when)
+        if chunk is None:
+            return False
+        try:
+            chunk[pos] = block_type  # also patches the chunk's standable bitmap
+        except KeyError:
+            return False  # outside the scanned height range
+        for listener in self.chunk_change_listeners:
+            listener(chunk_origin)
+        return True
+
+    def apply_events(self, limit=1000):
+        """
+        Apply pending block-update / chunk events from the event source.
+
+        Block updates are written into the loaded chunks; a chunk the client
+        (re)loads while it is in the database is marked stale and rescanned
+        in the background, since changes made while it was unloaded were missed.
+
+        Returns:
+            int: number of events handled.
+        """
+        if self.event_source is None:
+            return 0
+        events = self.event_source.poll(limit)
+        for event in events:
+            if event.type == BLOCK_UPDATE:
+                self.set_block(event.position, event.new_state, event.old_state)
+            elif event.type == CHUNK and event.loaded:
+                chunk_origin = self.chunk_origin_of((event.x_min, 0, event.z_min))
+                if chunk_origin in self.world_db:
+                    self.stale_chunks.add(chunk_origin)
+                else:
+                    self.chunk_cache.distrust(chunk_origin)
+        return len(events)
 
     # ---------------------------------------------------
     # DATA TOOLS
@@ -161,7 +570,8 @@ class WorldDB:
 
     def filter_top_blocks(self, db):
         """
-        Get the highest block for each X/Z coordinate.
+        Get the highest solid (non-air, non-passable) block for each X/Z coordinate.
+        Read straight from the chunk heightmaps (see Chunk.build_walkability).
         
         Args:
             db (dict): World database to process.
@@ -171,26 +581,122 @@ class WorldDB:
         """
         topdb = {}
         for chunk in db.values():
-            for coord in chunk.keys():
-                coordxz = (coord[0], coord[2])
-                coordy = coord[1]
-                if coordxz not in topdb or coordy > topdb[coordxz][1]:
-                    topdb[coordxz] = coord
+            if chunk.standable_layers is None:
+                chunk.build_walkability()
+            x0, _, z0 = chunk.origin
+            for i, y in enumerate(chunk.solid_heights):
+                if y != NO_SURFACE:
+                    lz, lx = divmod(i, chunk.x_size)
+                    topdb[(x0 + lx, z0 + lz)] = (x0 + lx, y, z0 + lz)
         return topdb
 
+    def surface_at(self, x, z, walkable=False):
+        """Highest solid y (or standable feet y with walkable) of column (x, z) in O(1); None if unknown."""
+        return self.world_view().surface_at(int(x), int(z), walkable)
+
+    def find_nearest(self, block_types, pos=None, k=1, radius=None, refine_budget=REFINE_SECTION_BUDGET):
+        """
+        Nearest loaded blocks of the given type(s) to pos (defaults to the player).
+        See WorldView.find_nearest.
+
+        Ores hide between the probes of sections the adaptive scan stored as
+        one block: chunks the search visits whose scan already found one of
+        the types get those sections fetched first (see refine_sections),
+        at most refine_budget sections per call.
+
+        Returns:
+            list: [(x, y, z), ...] nearest first.
+        """
+        if pos is None:
+            pos = ms.player_position()
+        if isinstance(block_types, str):
+            block_types = (block_types,)
+        budget = [refine_budget]
+
+        def prepare(origin):
+            chunk = self.world_db[origin]
+            if budget[0] > 0 and chunk.sampled and any(chunk.count_of(t) for t in block_types):
+                budget[0] -= self.refine_sections(origin, block_types, limit=budget[0], pos=pos)
+
+        return self.world_view().find_nearest(block_types, pos, k=k, radius=radius, prepare=prepare)
+
+    def refine_sections(self, chunk_origin, block_types=(), limit=None, pos=None):
+        """
+        Fetch in full the solid sections of a loaded chunk that the adaptive
+        scan stored from its probes alone, so blocks between the probes (ores,
+        small caves) are known. Sections stored as one of block_types already
+        count every block of that type and are left alone.
+
+        Args:
+            chunk_origin (tuple): Chunk to refine.
+            block_types (iterable): Block ids being looked for.
+            limit (int): Fetch at most this many sections (None = all).
+            pos (tuple): Fetch the sections nearest to this height first.
+
+        Returns:
+            int: number of sections fetched.
+        """
+        chunk = self.world_db.get(chunk_origin)
+        if chunk is None or not chunk.sampled:
+            return 0
+        sections = []
+        for s in chunk.sampled:
+            data = chunk.sections[s]
+            if isinstance(data, int) and (not is_support(chunk.palette[data]) or chunk.palette[data] in block_types):
+                continue  # air / water, or already all of a wanted type
+            sections.append(s)
+        if pos is not None:
+            sections.sort(key=lambda s: abs(sum(chunk.section_bounds(s)) / 2 - pos[1]))
+        else:
+            sections.sort()
+        sections = sections[:limit]
+        if not sections:
+            return 0
+
+        if chunk.standable_layers is None:
+            chunk.build_walkability()
+        walkable = chunk.standable_layers
+        all_coords = [chunk.section_coords(s) for s in sections]
+        fetched = ms.getblocklist([coord for coords in all_coords for coord in coords])
+        start = 0
+        for s, coords in zip(sections, all_coords):
+            chunk.set_section(s, fetched[start:start + len(coords)])
+            start += len(coords)
+        chunk.build_walkability()
+        METRICS.count('chunks.refined_sections', len(sections))
+        METRICS.count('chunks.fetched_blocks', len(fetched))
+
+        # the world did not change, only what is known about it: no journal entries, and
+        # the path caches / cluster graph / flow fields only hear of it if walkability changed
+        if chunk.standable_layers != walkable:
+            for listener in self.chunk_change_listeners:
+                listener(chunk_origin)
+            self._invalidate_fields(chunk_origin)
+        else:
+            self.chunk_cache.changed(chunk_origin)
+        return len(sections)
+
     def fill_blocks_from_dict(self, block_dict, type='minecraft:diamond_block'):
         """
-        Fill specific block locations with diamond blocks.
+        Fill specific block locations with one block type (diamond blocks by default).
+        Neighbouring blocks are merged into cuboid /fill commands (see batchedit.py).
         
         Args:
-            block_dict (dict): Dictionary of coordinates to replace.
+            block_dict (dict): Dictionary whose values are the coordinates to replace.
+            type (str): Block id to place.
+
+        Returns:
+            dict: BatchEditor stats (blocks, commands, seconds).
         """
-        for coord in block_dict.values():
-            ms.execute(f'/fill {coord[0]} {coord[1]} {coord[2]} {coord[0]} {coord[1]} {coord[2]} minecraft:diamond_block')
+        editor = BatchEditor()
+        editor.add_many((coord, type) for coord in block_dict.values())
+        editor.flush()
+        return editor.stats
 
     def flattend(self):
         """
         Combine all chunks into a single dictionary of blocks.
+        Copies every block; use world_view() for lookups.
 
         Returns:
             dict: {block_coord: block_type}
@@ -200,10 +706,20 @@ class WorldDB:
             for coord, block_type in chunk.items():
                 flat[coord] = block_type
         return flat
+
+    def world_view(self):
+        """
+        Zero-copy lookup view over the loaded chunks for the pathfinder.
+
+        Returns:
+            WorldView: .get((x, y, z)) reads straight from the stored chunks.
+        """
+        return WorldView(self.world_db)
     
 
 
     def save_to_json(self, filename="world_data.json"):
+        import json
         script_dir = os.path.dirname(os.path.abspath(__file__))  # folder where the script is
         file_path = os.path.join(script_dir, filename)
 
@@ -221,6 +737,7 @@ class WorldDB:
 
     def load_from_json(self, filename="world_data.json"):
         """Load the JSON file and convert all keys back to tuples."""
+        import json
         with open(filename, "r") as f:
             data = json.load(f)
 
@@ -234,32 +751,423 @@ class WorldDB:
                 for b_key, block_type in blocks.items()
             }
 
-            deserialized[chunk_origin] = block_dict
+            deserialized[chunk_origin] = Chunk.from_dict(chunk_origin, block_dict)
 
-        self.world_db = deserialized    
+        self.load_chunks(deserialized, replace=True)
 
-    
-    def pathfind_walk_to(self, goal=[1163, 88, 532], sprinting=False, briding=False, repath_attempts=6):
+    def load_chunks(self, chunks, replace=False):
+        """
+        Put chunks read from disk into the database and notify the listeners.
+        world_db is updated in place: WorldView and the PathService snapshot
+        hold a reference to it.
+
+        Args:
+            chunks (dict): {chunk_origin: Chunk}.
+            replace (bool): Unload every chunk not in chunks first.
+        """
+        if replace:
+            for chunk_origin in [origin for origin in self.world_db if origin not in chunks]:
+                del self.world_db[chunk_origin]
+                self.stale_chunks.discard(chunk_origin)
+                for listener in self.chunk_unload_listeners:
+                    listener(chunk_origin)
+        for chunk_origin, chunk in chunks.items():
+            self.add_chunk(chunk, chunk_origin, scanned=False)
+
+    def _data_path(self, filename):
+        """Resolve relative file names against this script's folder (like save_to_json)."""
+        if os.path.isabs(filename):
+            return filename
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+
+    def save_to_store(self, filename="world_data.bcr", compress=True):
+        """
+        Save every loaded chunk into the binary chunk store (see chunkstore.py).
+        Chunks already in the store are overwritten, others are kept.
+        """
+        with ChunkStore(self._data_path(filename), compress=compress) as store:
+            for chunk_origin, chunk in self.world_db.items():
+                store.write(chunk, chunk_origin)
+
+    def load_from_store(self, filename="world_data.bcr", center=None, radius=None):
+        """
+        Load chunks from the binary chunk store.
+
+        Args:
+            filename (str): Store file name.
+            center (list): Optional [x, y, z]; only load chunks around it.
+            radius (int): Block radius around center to load (XZ).
+        """
+        with ChunkStore(self._data_path(filename)) as store:
+            if center is None:
+                chunks = {origin: store.read(origin) for origin in store.origins()}
+            else:
+                chunks = store.read_near(center, radius or self.render_distance * 8, len(self.x_search))
+        self.load_chunks(chunks)
+
+    def migrate_json_to_store(self, json_filename="world_data.json", filename="world_data.bcr"):
+        """Convert a save_to_json dump into the binary chunk store."""
+        with ChunkStore(self._data_path(filename)) as store:
+            count = migrate_json(self._data_path(json_filename), store)
+        ms.echo(f'§4[§c§lBerryCake§c❤§4]§f migrated {count} chunks to {filename}')
+
+    # ---------------------------------------------------
+    # WARM START
+    # ---------------------------------------------------
+
+    def preload_cache(self):
+        """
+        Load the cached chunks in range of the player and queue them for revalidation:
+        spot-checks first when the cache is recent, a background rescan otherwise.
+
+        Returns:
+            int: number of chunks preloaded.
+        """
+        center = ms.player_position()
+        chunks = self.cache.preload(center, self.render_distance * 8, *self.chunk_layout)
+        for chunk_origin, chunk in chunks.items():
+            self.add_chunk(chunk, chunk_origin, scanned=False)
+            self.chunk_origins_coll.add(chunk_origin)
+        if self.cache.fresh() and self.verifier.enabled:
+            self.verifier.check_first(chunks)
+        else:
+            self.stale_chunks.update(chunks)
+        METRICS.gauge('startup.preloaded_chunks', len(chunks))
+        if chunks:
+            age = f'{self.cache.age / 60:.0f} min old' if self.cache.age is not None else 'new'
+            ms.echo(f'§4[§c§lBerryCake§c❤§4]§f warm start: {len(chunks)} chunks from cache ({age})')
+        return len(chunks)
+
+    def close_cache(self):
+        """Write every loaded chunk to the warm-start cache and close it (runs at exit)."""
+        if self.cache is None:
+            return
+        for chunk_origin, chunk in self.world_db.items():
+            self.cache.save(chunk, chunk_origin)
+        self.chunk_cache.detach()
+        self.cache.close()
+        self.cache = None
+
+    def startup_mark(self, name):
+        """Record the first time name happened, in seconds since launch (startup.<name>_s metric)."""
+        if name in self.startup:
+            return
+        elapsed = time.time() - self.launched_at
+        self.startup[name] = elapsed
+        METRICS.gauge(f'startup.{name}_s', elapsed)
+        if name == 'first_path':
+            ms.echo(f'§4[§c§lBerryCake§c❤§4]§f first path planned {elapsed:.2f} s after launch')
+
+    # ---------------------------------------------------
+    # PATHING
+    # ---------------------------------------------------
+
+    @property
+    def path_service(self):
+        """The background PathService, started (and multiprocessing imported) on first use."""
+        if self._path_service is None:
+            from berrycake_utils.pathservice import PathService
+            self._path_service = PathService(self.world_db, chunk_size=len(self.x_search))
+        return self._path_service
+
+    def _invalidate_paths(self, chunk_origin=None):
+        if self._path_service is not None:
+            self._path_service.invalidate(chunk_origin)
+
+    def _invalidate_fields(self, chunk_origin):
+        for field in self.flow_fields.values():
+            field.mark_dirty(chunk_origin)
+
+    def _sync_fields(self):
+        """Feed the block changes journaled since the last call to the flow fields."""
+        changes = self.journal.since(self.fields_seq)
+        self.fields_seq = self.journal.seq
+        for field in self.flow_fields.values():
+            if changes is None:
+                field.build()  # too many changes missed
+                continue
+            for change in changes:
+                field.mark_changed(change.position)
+
+    def plan_route(self, goal, hierarchical=True):
+        """
+        Plan from the player to goal.
+
+        Uses the chunk cluster graph when the goal is in another loaded chunk
+        and the graph has caught up with the loaded chunks, so only the first
+        segment is refined up front; otherwise (short routes, or right after
+        startup) starts an IncrementalPlanner that repair_route() can reuse.
+
+        Returns:
+            iterator: block paths to walk one after another.
+        """
+        start = ms.player_position()
+        view = self.world_view()
+        self.planner = None
+        if (hierarchical and self.cluster_graph.ready() and view.chunk_at(goal) is not None
+                and view.chunk_origin(start) != view.chunk_origin(goal)):
+            route = self.cluster_graph.plan(start, goal)
+            if route is not None:
+                self.startup_mark('first_path')
+                return route.segments()
+
+        self.planner = IncrementalPlanner(goal, view.is_standable)
+        self.planner_seq = self.journal.seq
+        path = self.planner.plan(start)
+        METRICS.count('path.nodes', self.planner.nodes_expanded)
+        if not path:
+            ms.echo('§4[§c§lBerryCake§c❤§4]§f No path found')
+        else:
+            self.startup_mark('first_path')
+        return iter([path])
+
+    def repair_route(self, goal, stuck_at=None, changed=()):
+        """
+        Replan after the Walker got stuck.
+
+        Repairs the kept IncrementalPlanner when there is one for this goal,
+        treating stuck_at as blocked and feeding it the journal's block
+        changes since the last plan; otherwise plans again with plan_route().
+
+        Args:
+            goal (list): Same goal as the route being repaired.
+            stuck_at (tuple): First path cell the Walker could not reach.
+            changed (iterable): Extra cells whose blocks changed since the last plan.
+
+        Returns:
+            iterator: block paths to walk one after another.
+        """
+        planner = self.planner
+        if planner is None or planner.goal != tuple(map(int, goal)):
+            return self.plan_route(goal)
+        journaled = self.journal.since(self.planner_seq)
+        if journaled is None:
+            return self.plan_route(goal)  # too many changes missed, start over
+        self.planner_seq = self.journal.seq
+        changed = list(changed) + [change.position for change in journaled]
+        blocked = [tuple(map(int, stuck_at))] if stuck_at is not None else []
+        path = planner.replan(ms.player_position(), changed=changed, blocked=blocked)
+        METRICS.count('path.nodes', planner.nodes_expanded)
+        if not path:
+            ms.echo('§4[§c§lBerryCake§c❤§4]§f No path found')
+        return iter([path])
+
+    def path_to_nearest(self, blocks=None, entity=None, radius=48, reach=1, first_hit=False):
+        """
+        Pick the target that is cheapest to walk to and plan there, in one search.
+
+        Candidates are the NEAREST_CANDIDATES closest matches in a straight line:
+        blocks from the loaded chunks' type index, or entities by name (like
+        CameraControl.target_entity). One multi-goal A* then finds the one with
+        the shortest walk; the search may detour up to 2 * radius from the player.
+
+        Args:
+            blocks (str | iterable): Block id(s) to go to, e.g. 'minecraft:chest'.
+            entity (str): Entity name to go to instead, e.g. 'Iron Golem'.
+            radius (float): Only consider targets this close (blocks).
+            reach (int): Stop this many blocks (horizontally) from the target.
+            first_hit (bool): Take the first target the search reaches, not the proven nearest.
+
+        Returns:
+            tuple: (target, path) or (None, []) when nothing is reachable.
+        """
+        start = ms.player_position()
+        if entity is not None:
+            targets = [tuple(position) for position in CameraControl.target_entities(entity)
+                       if sum((a - b) ** 2 for a, b in zip(position, start)) <= radius * radius]
+            targets.sort(key=lambda t: sum((a - b) ** 2 for a, b in zip(t, start)))
+            targets = targets[:NEAREST_CANDIDATES]
+        else:
+            targets = self.find_nearest(blocks, start, k=NEAREST_CANDIDATES, radius=radius)
+        if not targets:
+            ms.echo(f'§4[§c§lBerryCake§c❤§4]§f no {entity or blocks} within {radius} blocks')
+            return None, []
+
+        target, path = pf.find_path_to_nearest(start, targets, self.world_view(), reach=reach,
+                                               radius=2 * radius, first_hit=first_hit)
+        if path:
+            self.startup_mark('first_path')
+        return target, path
+
+    def walk_to_nearest(self, blocks=None, entity=None, radius=48, reach=1, first_hit=False, sprinting=False):
+        """
+        Walk to the nearest reachable block / entity (see path_to_nearest) and look at it.
+
+        Returns:
+            tuple: the target reached, or None.
+        """
+        target, path = self.path_to_nearest(blocks, entity, radius, reach, first_hit)
+        if not path:
+            return None
+        self.pathfind_walk_to(list(path[-1]), sprinting=sprinting, path=path)
+        # blocks are aimed at their centre, entities at their position
+        aim = target if entity is not None else tuple(c + 0.5 for c in target)
+        CameraControl.lock_target(CameraControl.calculate_orientation(aim))
+        return target
+
+    def add_destination(self, name, pos, reach=1, radius=None):
+        """
+        Compute a flow field toward pos over the loaded area and keep it under name.
+
+        Every cell that can reach pos gets its cost and next step, so later trips
+        there (walk_to_destination) need no search from any start. The field is
+        repaired when chunks load, unload or change. A destination that is not
+        loaded yet fills in once its chunk is.
+
+        Args:
+            name (str): Destination name, e.g. 'farm'.
+            pos (tuple): Block or position to go to.
+            reach (int): Arrive this many blocks (horizontally) from pos.
+            radius (float): Only cover cells this far from pos (None = the whole loaded area).
+
+        Returns:
+            FlowField: the field (see flowfield.py).
+        """
+        self._sync_fields()
+        start_time = time.time()
+        # every cell next to pos, standable or not: the field picks up the ones that become standable
+        goals = pf.approach_cells([pos], lambda x, y, z: True, reach)
+        field = FlowField(goals, self.world_view().is_standable, radius=radius,
+                          center=tuple(map(int, pos)), chunk_size=len(self.x_search))
+        self.flow_fields[name] = field
+        METRICS.count('path.nodes', field.stats['nodes'])
+        ms.echo(f'§4[§c§lBerryCake§c❤§4]§f destination {name}: {len(field)} cells in {time.time() - start_time:.2f} s')
+        return field
+
+    def remove_destination(self, name):
+        self.flow_fields.pop(name, None)
+
+    def destination(self, name):
+        """The flow field of a destination, brought up to date, or None."""
+        field = self.flow_fields.get(name)
+        if field is not None:
+            self._sync_fields()
+            if field.repair():
+                METRICS.count('path.field_repairs')
+        return field
+
+    def walk_to_destination(self, name, sprinting=False, repath_attempts=6):
+        """
+        Walk to a destination added with add_destination(), following its flow field.
+        Getting stuck or pushed off course re-reads the path from the field.
+
+        Returns:
+            bool: False if the destination is unknown or not reachable from here.
+        """
+        field = self.destination(name)
+        if field is None:
+            ms.echo(f'§4[§c§lBerryCake§c❤§4]§f unknown destination {name}')
+            return False
+        path = field.path_from(ms.player_position())
+        if not path:
+            ms.echo(f'§4[§c§lBerryCake§c❤§4]§f {name} is not reachable from here')
+            return False
+        self.startup_mark('first_path')
+
+        def replan(stuck_at):
+            if stuck_at is not None:
+                field.block(stuck_at)
+            self.destination(name)
+            return iter([field.path_from(ms.player_position())])
+
+        self.pathfind_walk_to(list(path[-1]), sprinting=sprinting, repath_attempts=repath_attempts, path=path,
+                              replan=replan)
+        return True
+
+    def request_path(self, goal):
+        """
+        Start searching for a path to goal in the background.
+        run() walks it once found; requesting the same goal twice is a no-op.
+
+        Returns:
+            PathFuture: cancel() / progress() / result() of the search.
+        """
+        goal = tuple(map(int, goal))
+        for pending_goal, future in self.path_requests:
+            if pending_goal == goal:
+                return future
+        ms.echo('§4[§c§lBerryCake§c❤§4]§f Pathfinding (background)...')
+        future = self.path_service.submit(ms.player_position(), goal, timeout=pf.NODE_TIMEOUT_SEC)
+        self.path_requests.append((goal, future))
+        return future
+
+    def cancel_paths(self):
+        """Cancel every background search that has not finished yet."""
+        for _, future in self.path_requests:
+            future.cancel()
+
+    def poll_paths(self):
+        """Walk the background searches that finished since the last call."""
+        for goal, future in [request for request in self.path_requests if request[1].done()]:
+            self.path_requests.remove((goal, future))
+            status, path, nodes = future.result()
+            METRICS.count('path.nodes', nodes)
+            if status == search.FOUND:
+                self.startup_mark('first_path')
+                ms.echo(f'§4[§c§lBerryCake§c❤§4]§f nodes processed:  {nodes}, {len(path)} path length')
+                self.pathfind_walk_to(list(goal), path=path)
+            elif status != search.CANCELLED:
+                ms.echo(f'§4[§c§lBerryCake§c❤§4]§f No path found ({status}) :( TERMINATING PATHFINDER')
+
+    def pathfind_walk_to(self, goal=[1163, 88, 532], sprinting=False, briding=False, repath_attempts=6, path=None,
+                         smooth=True, replan=None):
         ms.echo('§4[§c§lBerryCake§c❤§4]§f Pathfinding...')
-        path = pf.find_path(ms.player_position(), goal, self.flattend())
-        walker = Walker(path, self.world_db)
+        self.wait_for_chunks([self.chunk_origin_of(ms.player_position())])
+        self.repath_times = 0
+        if path is not None:
+            self.planner = None
+            segments = iter([path])
+        else:
+            segments = self.plan_route(goal)
 
         while True:
-            result = walker.walk()
+            result = "done"
+            stuck_at = None
+            for path in segments:
+                if not path:
+                    result = "stuck"
+                    break
+                raw_path = path
+                if smooth:
+                    # string-pull into straight runs + jump / drop points
+                    path = smooth_path(path, self.world_view().is_standable)
+                walker = Walker(path, self.world_db, raw_path=raw_path)
+                walker.tick_listeners.append(self.metrics_exporter.update)
+                result = walker.walk()
+                if result == "stuck":
+                    stuck_at = walker.stuck_at
+                    break
             if result != "stuck":
                 break  # done walking
             if self.repath_times >= repath_attempts:
                 ms.echo(f'§4[§c§lBerryCake§c❤§4]§f tried {self.repath_times}: limit reached... TERMINATING PATHFINDER')
-            
+                break
+
             ms.echo('§4[§c§lBerryCake§c❤§4]§f REPATHING...')
             self.repath_times += 1
-            path = pf.find_path(ms.player_position(), goal, self.flattend())
-            walker = Walker(path, self.world_db)
+            # replan(stuck_at) -> paths, for routes that do not come from plan_route (flow fields)
+            segments = replan(stuck_at) if replan is not None else self.repair_route(goal, stuck_at)
 
 
         ms.echo('§4[§c§lBerryCake§c❤§4]§f Pathfinding DONE')
 
 
+    def publish_metrics(self):
+        """Copy the current sizes / stats of the loaded world into METRICS gauges."""
+        METRICS.gauge('chunks.loaded', len(self.world_db))
+        METRICS.gauge('chunks.pending', self.chunk_streamer.pending())
+        METRICS.gauge('chunks.stale', len(self.stale_chunks))
+        METRICS.gauge('render_distance', self.render_distance)
+        METRICS.gauge('paths.requested', len(self.path_requests))
+        METRICS.gauge('paths.field_cells', sum(len(field) for field in self.flow_fields.values()))
+        METRICS.gauge('journal.seq', self.journal.seq)
+        for name, value in self.chunk_streamer.stats.items():
+            METRICS.gauge(f'streamer.{name}', value)
+        for name, value in self.verifier.stats.items():
+            METRICS.gauge(f'verifier.{name}', value)
+        for name, value in self.chunk_cache.stats.items():
+            METRICS.gauge(f'cache.{name}', value)
+
     # ---------------------------------------------------
     # MAIN LOOP - wil be run in the berrycake client main loop
     # ---------------------------------------------------
@@ -267,42 +1175,38 @@ class WorldDB:
     def run(self):
         """Main loop: load nearby chunks, unload far ones, repeat forever."""
 
-        start_time_cycle = time.time()
-        # Step 1: Identify which chunks should be loaded
-        self.generate_chunk_origins()
-        #for chunk in [i for i in self.world_db.keys()]:
-        #    ms.execute(f'/fill {chunk[0]} {chunk[1]} {chunk[2]} {chunk[0] + 15} {chunk[1]} {chunk[2] + 15} minecraft:diamond_block')
-        # Step 2: Remove chunks that are too far away
-        self.unload_chunks()
-        # Step 3: Load chunks not yet loaded
-        self.generate_world()
-        
+        with METRICS.timer('cycle.ms'):
+            # Step 1: Identify which chunks should be loaded
+            self.generate_chunk_origins()
+            #for chunk in [i for i in self.world_db.keys()]:
+            #    ms.execute(f'/fill {chunk[0]} {chunk[1]} {chunk[2]} {chunk[0] + 15} {chunk[1]} {chunk[2] + 15} minecraft:diamond_block')
+            # Step 2: Remove chunks that are too far away
+            self.unload_chunks()
+            # Step 3: Stream in chunks not yet loaded, nearest first, within the tick budget
+            with METRICS.timer('cycle.stream_ms'):
+                self.stream_world()
+            # Step 3b: Apply placed / broken blocks to the loaded chunks
+            with METRICS.timer('cycle.events_ms'):
+                self.apply_events()
+            # Step 3c: Spot-check loaded sections, rescan the ones that changed
+            with METRICS.timer('cycle.verify_ms'):
+                self.verifier.update(self.tick_budget)
+            # Step 4: Fold new chunks into the pathfinding cluster graph
+            with METRICS.timer('cycle.clusters_ms'):
+                self.cluster_graph.update(self.tick_budget)
+            # Step 5: Walk paths found by the background path service
+            self.poll_paths()
 
-        ## Step 4: Print debug info
-        #ms.echo(f'Done 1 cycle in {time.time() - start_time_cycle:.2f} secs')
-        #ms.echo(f'Loaded chunks: {len(self.world_db)}')
-        #ms.echo(self.render_distance)
-        # keyboard_input
+        # Step 6: Publish state and export metrics (HUD panel / log)
+        if METRICS.enabled:
+            self.publish_metrics()
+            self.metrics_exporter.update()
+        # keyboard_input (imported on first use, it hooks the OS keyboard)
+        import keyboard
         if keyboard.is_pressed('up'):
             self.render_distance += 1
         elif keyboard.is_pressed('down'):
             if self.render_distance > 0:
                 self.render_distance -= 1
         elif keyboard.is_pressed('p'):
-            ms.echo('§4[§c§lBerryCake§c❤§4]§f Pathfinding...')
-            path = pf.find_path(ms.player_position(), [1163, 88, 532], self.flattend())
-            walker = Walker(path, self.world_db)
-
-            while True:
-                result = walker.walk()
-                if result != "stuck":
-                    break  # done walking
-                
-                ms.echo('§4[§c§lBerryCake§c❤§4]§f REPATHING...')
-                path = pf.find_path(ms.player_position(), [1163, 88, 532], self.flattend())
-                walker = Walker(path, self.world_db)
-
-
-            ms.echo('§4[§c§lBerryCake§c❤§4]§f Pathfinding DONE')
-
-
+            self.request_path([1163, 88, 532])
@@ -0,0 +1,131 @@
+import system.lib.minescript as ms
+import queue
+import time
+from collections import deque, namedtuple
+
+# event types, same strings as ms.EventType
+BLOCK_UPDATE = 'block_update'
+CHUNK = 'chunk'
+
+# shapes of the MineScript events this module reads
+BlockUpdateEvent = namedtuple('BlockUpdateEvent', 'type time position old_state new_state')
+ChunkEvent = namedtuple('ChunkEvent', 'type time loaded x_min z_min x_max z_max')
+
+# one entry of the ChangeJournal
+BlockChange = namedtuple('BlockChange', 'seq time position old new')
+
+
+class ChangeJournal:
+    """
+    Append-only log of block changes with sequence numbers.
+
+    Consumers remember the last seq they handled and ask for everything
+    after it with since(). Only the newest maxlen changes are kept; a
+    consumer that fell further behind gets None and has to resync
+    (replan, rebuild its index...). The kept changes are also bucketed
+    by chunk column, so in_chunk() only looks at that chunk's changes.
+    """
+
+    def __init__(self, maxlen=4096, chunk_size=16):
+        self.changes = deque(maxlen=maxlen)
+        self.seq = 0  # seq of the newest change (0 = none yet)
+        self.chunk_size = chunk_size
+        # {(chunk x, chunk z): deque of the kept changes in that chunk, oldest first}
+        self._by_chunk = {}
+
+    def _chunk_key(self, position):
+        size = self.chunk_size
+        return int(position[0] // size * size), int(position[2] // size * size)
+
+    def append(self, position, old, new, when=None):
+        self.seq += 1
+        change = BlockChange(self.seq, time.time() if when is None else when, tuple(position), old, new)
+        if len(self.changes) == self.changes.maxlen:
+            # the oldest change is about to drop out; it is also the oldest of its bucket
+            dropped = self.changes[0]
+            key = self._chunk_key(dropped.position)
+            bucket = self._by_chunk[key]
+            bucket.popleft()
+            if not bucket:
+                del self._by_chunk[key]
+        self.changes.append(change)
+        self._by_chunk.setdefault(self._chunk_key(change.position), deque()).append(change)
+        return change
+
+    def in_chunk(self, chunk_origin, after=None):
+        """
+        Kept changes inside the chunk at chunk_origin (x, y, z), oldest first.
+
+        Args:
+            chunk_origin (tuple): Chunk key; only x and z are used.
+            after (float): Only changes with time >= after (None = all).
+        """
+        bucket = self._by_chunk.get(self._chunk_key(chunk_origin), ())
+        if after is None:
+            return list(bucket)
+        return [change for change in bucket if change.time >= after]
+
+    def covers(self, when):
+        """True if every change made after time when is still in the journal."""
+        return len(self.changes) < self.changes.maxlen or self.changes[0].time <= when
+
+    def since(self, seq):
+        """
+        Changes newer than seq, oldest first.
+
+        Returns:
+            list | None: [BlockChange, ...] or None if some were already dropped.
+        """
+        if seq >= self.seq:
+            return []
+        if not self.changes or self.changes[0].seq > seq + 1:
+            return None
+        skip = seq + 1 - self.changes[0].seq
+        return [self.changes[i] for i in range(skip, len(self.changes))]
+
+
+class MinescriptEvents:
+    """Block-update and chunk events from an ms.EventQueue, read without blocking."""
+
+    def __init__(self):
+        self.queue = ms.EventQueue()
+        self.queue.register_block_update_listener()
+        self.queue.register_chunk_listener()
+
+    def poll(self, limit=1000):
+        """Up to limit pending events, oldest first."""
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self.queue.get(block=False))
+            except queue.Empty:
+                break
+        return events
+
+    def close(self):
+        self.queue.unregister_all()
+
+
+class EventFeed:
+    """
+    Stand-in event source with the same poll() interface, for tests,
+    benchmarks and replays: push events in, WorldDB reads them out.
+    """
+
+    def __init__(self):
+        self.events = deque()
+
+    def push_block(self, position, new_state, old_state=None):
+        self.events.append(BlockUpdateEvent(BLOCK_UPDATE, time.time(), list(position), old_state, new_state))
+
+    def push_chunk(self, x_min, z_min, x_max, z_max, loaded=True):
+        self.events.append(ChunkEvent(CHUNK, time.time(), loaded, x_min, z_min, x_max, z_max))
+
+    def poll(self, limit=1000):
+        events = []
+        while self.events and len(events) < limit:
+            events.append(self.events.popleft())
+        return events
+
+    def close(self):
+        self.events.clear()
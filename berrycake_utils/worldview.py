@@ -0,0 +1,168 @@
+import heapq
+
+from berrycake_utils.chunk import NO_SURFACE
+
+
+class WorldView:
+    """
+    Read-only, zero-copy view over WorldDB.world_db.
+
+    Answers point lookups like the dict returned by WorldDB.flattend(), but
+    works out the chunk from the coordinate and indexes straight into the
+    stored Chunk instead of copying every block first.
+    """
+
+    def __init__(self, world_db, chunk_size=16, chunk_y=128):
+        """
+        Args:
+            world_db (dict): {chunk_origin: Chunk}, used by reference.
+            chunk_size (int): Chunk width along X and Z.
+            chunk_y (int): Y component of every chunk key in world_db.
+        """
+        self.world_db = world_db
+        self.chunk_size = chunk_size
+        self.chunk_y = chunk_y
+
+    def chunk_origin(self, pos):
+        """WorldDB key of the chunk holding block position pos."""
+        size = self.chunk_size
+        return (int(pos[0] // size * size), self.chunk_y, int(pos[2] // size * size))
+
+    def chunk_at(self, pos):
+        """The loaded Chunk holding pos, or None."""
+        return self.world_db.get(self.chunk_origin(pos))
+
+    def get(self, pos, default=None):
+        chunk = self.world_db.get(self.chunk_origin(pos))
+        if chunk is None:
+            return default
+        return chunk.get(pos, default)
+
+    def is_standable(self, x, y, z):
+        """Walkability bit test against the chunk's standable bitmap (unloaded = False)."""
+        size = self.chunk_size
+        chunk = self.world_db.get((x // size * size, self.chunk_y, z // size * size))
+        if chunk is None:
+            return False
+        return chunk.is_standable(x, y, z)
+
+    def surface_at(self, x, z, walkable=False):
+        """Highest solid y (or standable feet y with walkable) of column (x, z); None if unknown."""
+        size = self.chunk_size
+        chunk = self.world_db.get((x // size * size, self.chunk_y, z // size * size))
+        if chunk is None:
+            return None
+        return chunk.surface(x, z, walkable)
+
+    def surface_region(self, x0, z0, x1, z1, walkable=False):
+        """
+        Heights of every column in [x0, x1] x [z0, z1] (inclusive), copied
+        chunk row by chunk row out of the heightmaps.
+
+        Returns:
+            list: rows[z - z0][x - x0] -> y or None (unloaded / no surface).
+        """
+        size = self.chunk_size
+        width = x1 - x0 + 1
+        rows = [[None] * width for _ in range(z1 - z0 + 1)]
+        for cz in range(z0 // size * size, z1 + 1, size):
+            for cx in range(x0 // size * size, x1 + 1, size):
+                chunk = self.world_db.get((cx, self.chunk_y, cz))
+                if chunk is None:
+                    continue
+                if chunk.standable_layers is None:
+                    chunk.build_walkability()
+                heights = chunk.walkable_heights if walkable else chunk.solid_heights
+                lx0 = max(x0, cx) - cx
+                lx1 = min(x1, cx + chunk.x_size - 1) - cx
+                for z in range(max(z0, cz), min(z1, cz + chunk.z_size - 1) + 1):
+                    start = (z - cz) * chunk.x_size
+                    row = heights[start + lx0:start + lx1 + 1]
+                    rows[z - z0][cx + lx0 - x0:cx + lx1 + 1 - x0] = [None if y == NO_SURFACE else y for y in row]
+        return rows
+
+    def fill_surface(self, columns, out=None, walkable=False):
+        """
+        Heights for many (x, z) columns at once.
+
+        Args:
+            columns (iterable): (x, z) pairs.
+            out (list): Optional list to write into (same length as columns).
+
+        Returns:
+            list: y or None per column, in order.
+        """
+        columns = list(columns)
+        if out is None:
+            out = [None] * len(columns)
+        size = self.chunk_size
+        world_db = self.world_db
+        chunk_y = self.chunk_y
+        for i, (x, z) in enumerate(columns):
+            chunk = world_db.get((x // size * size, chunk_y, z // size * size))
+            out[i] = None if chunk is None else chunk.surface(x, z, walkable)
+        return out
+
+    def find_nearest(self, block_types, pos, k=1, radius=None, prepare=None):
+        """
+        Nearest blocks of the given type(s), using the per-chunk type index.
+
+        Chunks are visited by their distance to pos and skipped when they
+        hold none of the types; the search stops once the next chunk is
+        further away than the k-th match (or than radius).
+
+        Args:
+            block_types (str | iterable): Block id or several ids ('minecraft:chest', ...).
+            pos (tuple): (x, y, z) to measure from.
+            k (int): Number of matches wanted (None = all within radius).
+            radius (float): Only return matches at most this far away.
+            prepare (callable): prepare(chunk_origin) called before a chunk is
+                searched (WorldDB.refine_sections fetches probed-only sections there).
+
+        Returns:
+            list: [(x, y, z), ...] nearest first.
+        """
+        if isinstance(block_types, str):
+            block_types = (block_types,)
+        px, py, pz = pos
+        limit = float('inf') if radius is None else radius * radius
+
+        # (squared horizontal distance from pos to the chunk's column, origin)
+        order = []
+        for origin, chunk in self.world_db.items():
+            dx = max(origin[0] - px, 0, px - (origin[0] + chunk.x_size - 1))
+            dz = max(origin[2] - pz, 0, pz - (origin[2] + chunk.z_size - 1))
+            box = dx * dx + dz * dz
+            if box <= limit:
+                order.append((box, origin))
+        order.sort()
+
+        best = []  # max-heap of (-distance_sq, coord) holding the k best so far
+        for box, origin in order:
+            if k is not None and len(best) >= k and box > -best[0][0]:
+                break
+            if prepare is not None:
+                prepare(origin)
+            chunk = self.world_db[origin]
+            for block_type in block_types:
+                for coord in chunk.positions_of(block_type):
+                    d = (coord[0] - px) ** 2 + (coord[1] - py) ** 2 + (coord[2] - pz) ** 2
+                    if d > limit:
+                        continue
+                    if k is None or len(best) < k:
+                        heapq.heappush(best, (-d, coord))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, coord))
+        return [coord for _, coord in sorted(best, reverse=True)]
+
+    def __getitem__(self, pos):
+        block_type = self.get(pos)
+        if block_type is None:
+            raise KeyError(pos)
+        return block_type
+
+    def __contains__(self, pos):
+        return self.get(pos) is not None
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.world_db.values())
@@ -0,0 +1,45 @@
+"""
+Shared test setup: the repo root and bench/ on sys.path, and one FakeGame
+installed as system.lib.minescript before any BerryCake module is imported.
+Modules keep the module they imported, so the game is installed once and
+reset for every test that asks for it.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+import fakeminescript  # noqa: E402
+from synthworld import Terrain  # noqa: E402
+
+GAME = fakeminescript.FakeGame(Terrain('flat', 0), spawn=(8, 8))
+fakeminescript.install(GAME)
+
+
+@pytest.fixture
+def game():
+    """The fake game on fresh flat terrain, player on (8, 8)."""
+    GAME.terrain = Terrain('flat', 0)
+    GAME.edits.clear()
+    GAME.teleport(GAME.terrain.standing_cell(8, 8))
+    return GAME
+
+
+@pytest.fixture
+def new_world(game):
+    """new_world(**options) -> WorldDB around the player with every chunk loaded."""
+    from berrycake_utils.worlddb import WorldDB
+
+    def make(**options):
+        settings = dict(world_center=game.position, render_distance=2, stream=False,
+                        track_events=False, verify_rpc_rate=0)
+        settings.update(options)
+        world = WorldDB(**settings)
+        world.generate_chunk_origins()
+        world.generate_world()
+        return world
+    return make
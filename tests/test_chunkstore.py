@@ -0,0 +1,66 @@
+"""
+ChunkStore: records written and read back through the index and mmap
+(python -m pytest tests).
+"""
+import os
+
+from berrycake_utils.chunk import Chunk
+from berrycake_utils.chunkstore import ChunkStore, decode_chunk, encode_chunk
+
+
+def blocks(chunk):
+    """Every block id of a chunk in storage order."""
+    return [chunk.palette[i] for s in range(chunk.section_count()) for i in chunk.section_ids(s)]
+
+
+def mixed_chunk(origin=(0, 128, 0), kinds=3):
+    """Stone floor section, a mixed section of `kinds` block types, and a partial air top."""
+    chunk = Chunk(origin, y_min=0, y_max=40)
+    chunk.set_section(0, 'minecraft:stone')
+    volume = chunk.section_volume(1)
+    chunk.set_section(1, [f'test:block_{i % kinds}' for i in range(volume)])
+    chunk.set_section(2, 'minecraft:air')
+    return chunk
+
+
+def test_encode_decode_round_trip():
+    for kinds in (3, 300):  # one byte per block, then two once the palette outgrows a byte
+        chunk = mixed_chunk(kinds=kinds)
+        decoded = decode_chunk(encode_chunk(chunk))
+        assert (decoded.origin, decoded.y_min, decoded.y_max) == (chunk.origin, 0, 40)
+        assert blocks(decoded) == blocks(chunk)
+        # uniform sections may have been probed only, so they come back as sampled
+        assert decoded.sampled == {0, 2}
+
+
+def test_store_round_trip_rewrite_and_compact(tmp_path):
+    path = str(tmp_path / 'world.bcr')
+    first, second = mixed_chunk(), mixed_chunk((16, 128, 0), kinds=5)
+    with ChunkStore(path, compress=False) as store:
+        store.write(first)
+        store.write(second)
+        second[(17, 20, 1)] = 'minecraft:gold_block'
+        store.compress = True
+        store.write(second)  # appended, the index moves to the new record
+        assert blocks(store.read((16, 128, 0))) == blocks(second)
+
+    with ChunkStore(path) as store:
+        assert sorted(store.origins()) == [(0, 128, 0), (16, 128, 0)]
+        size = os.path.getsize(path)
+        store.compact()
+        assert os.path.getsize(path) < size
+        assert blocks(store.read((0, 128, 0))) == blocks(first)
+        assert store.read((16, 128, 0)).get((17, 20, 1)) == 'minecraft:gold_block'
+        assert store.read((32, 128, 0)) is None
+
+
+def test_read_near_measures_from_the_chunk_centre(tmp_path):
+    with ChunkStore(str(tmp_path / 'near.bcr')) as store:
+        for x in (0, 8, 16):
+            store.write(Chunk((x, 128, 0), x_size=8, z_size=8, y_min=0, y_max=16))
+        # centres of 8 wide chunks are at x = 4, 12, 20 and z = 4 (not origin + 8)
+        assert sorted(store.read_near((13, 0, 4), 1, chunk_size=8)) == [(8, 128, 0)]
+        assert sorted(store.read_near((16, 0, 4), 4, chunk_size=8)) == [(8, 128, 0), (16, 128, 0)]
+        # the default width is CHUNK_SIZE: centre (40, 8)
+        store.write(Chunk((32, 128, 0), y_min=0, y_max=16))
+        assert sorted(store.read_near((42, 0, 8), 2)) == [(32, 128, 0)]
@@ -0,0 +1,73 @@
+"""
+IncrementalPlanner.replan() must find routes as short as a fresh A* after
+block edits (python -m pytest tests).
+"""
+import math
+import random
+
+from berrycake_utils import search
+from berrycake_utils.dstar import IncrementalPlanner
+
+SIZE = 48
+
+
+def route_cost(path):
+    cost = 0.0
+    for (x, y, z), (nx, ny, nz) in zip(path, path[1:]):
+        cost += math.sqrt((nx - x) ** 2 + (ny - y) ** 2 + (nz - z) ** 2)
+        if ny > y:
+            cost += search.CLIMB_PENALTY
+    return cost
+
+
+class Blocks:
+    """Small random hill world: a floor with pillars, steps and holes."""
+
+    def __init__(self, rng):
+        self.solid = set()
+        for x in range(SIZE):
+            for z in range(SIZE):
+                height = 1 + (rng.random() < 0.15) + (rng.random() < 0.05)
+                for y in range(height):
+                    self.solid.add((x, y, z))
+
+    def standable(self, x, y, z):
+        if not (0 <= x < SIZE and 0 <= z < SIZE):
+            return False
+        return ((x, y - 1, z) in self.solid and (x, y, z) not in self.solid
+                and (x, y + 1, z) not in self.solid)
+
+    def toggle(self, cell):
+        if cell in self.solid:
+            self.solid.discard(cell)
+        else:
+            self.solid.add(cell)
+
+
+def test_replan_matches_fresh_astar():
+    mismatches = []
+    for seed in range(40):
+        rng = random.Random(seed)
+        blocks = Blocks(rng)
+        cells = [(x, y, z) for x in range(SIZE) for z in range(SIZE) for y in range(1, 4)
+                 if blocks.standable(x, y, z)]
+        start, goal = rng.sample(cells, 2)
+        planner = IncrementalPlanner(goal, blocks.standable)
+        route = planner.plan(start)
+        for step in range(20):
+            # walk a step or two along the route, then edit blocks around the world
+            if len(route) > 3:
+                start = route[rng.randrange(1, 3)]
+            edits = [(rng.randrange(SIZE), rng.randrange(1, 4), rng.randrange(SIZE)) for _ in range(8)]
+            for cell in edits:
+                blocks.toggle(cell)
+            if not blocks.standable(*start):
+                break
+            route = planner.replan(start, changed=edits)
+            status, fresh, _ = search.astar(start, goal, blocks.standable)
+            if status != search.FOUND:
+                assert route == [], (seed, step)
+                continue
+            if not route or abs(route_cost(route) - route_cost(fresh)) > 1e-6:
+                mismatches.append((seed, step, route_cost(route) if route else None, route_cost(fresh)))
+    assert not mismatches
@@ -0,0 +1,55 @@
+"""
+WorldDB.find_nearest must see blocks hidden between the probes of sections
+the adaptive scan stored as one block, without fetching whole chunks for
+types that are not there (python -m pytest tests).
+"""
+# local offsets of the hidden ore inside its section, off the probe grid (see SECTION_PROBE_*)
+HIDDEN_OFFSET = (2, 3, 2)
+DIAMOND = 'minecraft:diamond_ore'
+
+
+def stone_sections(world):
+    chunk = world.world_db[(0, 128, 0)]
+    return sorted(s for s in chunk.sampled if chunk.palette[chunk.sections[s]] == 'minecraft:stone')
+
+
+def plant_vein(game, new_world):
+    """A diamond on a probe of the lowest stone section (seen by the scan) and one hidden higher up."""
+    sections = stone_sections(new_world())
+    chunk = new_world().world_db[(0, 128, 0)]
+    low, _ = chunk.section_bounds(sections[0])
+    high, _ = chunk.section_bounds(sections[-1])
+    seen = (0, low, 0)
+    hidden = (HIDDEN_OFFSET[0], high + HIDDEN_OFFSET[1], HIDDEN_OFFSET[2])
+    game.terrain.set(seen, DIAMOND)
+    game.terrain.set(hidden, DIAMOND)
+    return seen, hidden, sections[-1]
+
+
+def test_ore_inside_solid_section(game, new_world):
+    seen, hidden, section = plant_vein(game, new_world)
+    world = new_world()
+    chunk = world.world_db[(0, 128, 0)]
+    assert section in chunk.sampled and chunk.get(hidden) == 'minecraft:stone'
+    # the type index alone only knows what was scanned
+    assert world.world_view().find_nearest(DIAMOND, game.position) == [seen]
+
+    assert world.find_nearest(DIAMOND, game.position) == [hidden]
+    assert section not in chunk.sampled
+    assert chunk.get(hidden) == DIAMOND
+
+
+def test_absent_type_fetches_nothing(game, new_world):
+    world = new_world()
+    calls = game.calls['getblocklist']
+    assert world.find_nearest('minecraft:emerald_ore', game.position) == []
+    assert game.calls['getblocklist'] == calls
+
+
+def test_refine_budget(game, new_world):
+    seen, hidden, _ = plant_vein(game, new_world)
+    world = new_world()
+    calls = game.calls['getblocklist']
+    assert world.find_nearest(DIAMOND, game.position, refine_budget=0) == [seen]
+    assert game.calls['getblocklist'] == calls
+    assert world.find_nearest(DIAMOND, game.position, refine_budget=1) == [hidden]
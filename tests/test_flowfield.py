@@ -0,0 +1,61 @@
+"""
+FlowField: blocking around the goal, and repairs matching fresh builds
+(python -m pytest tests).
+"""
+import random
+
+from berrycake_utils.flowfield import FlowField
+
+SIZE = 32
+
+
+class Floor:
+    """Flat floor at y=0 with solid pillars; standable cells are at y=1."""
+
+    def __init__(self, pillars=()):
+        self.solid = {(x, 0, z) for x in range(SIZE) for z in range(SIZE)}
+        for x, z in pillars:
+            self.solid.update({(x, 1, z), (x, 2, z)})
+
+    def standable(self, x, y, z):
+        if not (0 <= x < SIZE and 0 <= z < SIZE):
+            return False
+        return ((x, y - 1, z) in self.solid and (x, y, z) not in self.solid
+                and (x, y + 1, z) not in self.solid)
+
+
+def test_stuck_next_to_goal_keeps_destination_reachable():
+    floor = Floor()
+    goal = (20, 1, 20)
+    field = FlowField([goal], floor.standable)
+    # stuck on the last step: the Walker reports the goal and the cell before it
+    field.block(goal)
+    field.block((19, 1, 20))
+
+    path = field.path_from((5, 1, 5))
+    assert path and path[-1] == goal
+    assert (19, 1, 20) not in path
+    assert field.cost_from(goal) == 0.0
+
+
+def test_repair_matches_fresh_build():
+    rng = random.Random(3)
+    floor = Floor(pillars=[(rng.randrange(SIZE), rng.randrange(SIZE)) for _ in range(80)])
+    goal = (16, 1, 16)
+    floor.solid.difference_update({(16, 1, 16), (16, 2, 16)})
+    field = FlowField([goal], floor.standable)
+    for _ in range(10):
+        for _ in range(6):
+            x, z = rng.randrange(SIZE), rng.randrange(SIZE)
+            if (x, z) == goal[::2]:
+                continue
+            cell = (x, 1, z)
+            if cell in floor.solid:
+                floor.solid.discard(cell)
+            else:
+                floor.solid.add(cell)
+            field.mark_changed(cell)
+        field.repair()
+        fresh = FlowField([goal], floor.standable)
+        assert set(field.cost) == set(fresh.cost)
+        assert all(abs(field.cost[key] - fresh.cost[key]) < 1e-9 for key in fresh.cost)
@@ -0,0 +1,34 @@
+"""
+ChangeJournal per-chunk buckets and the replay of changes made while a
+chunk was being scanned (python -m pytest tests).
+"""
+from berrycake_utils.worldevents import ChangeJournal
+
+
+def test_buckets_follow_the_kept_changes():
+    journal = ChangeJournal(maxlen=3)
+    journal.append((1, 64, 1), 'a', 'b', when=1.0)
+    journal.append((17, 64, 1), 'a', 'b', when=2.0)
+    journal.append((2, 64, -3), 'a', 'b', when=3.0)
+    journal.append((3, 64, 3), 'a', 'b', when=4.0)  # drops the first change
+
+    assert [c.seq for c in journal.in_chunk((0, 128, 0))] == [4]
+    assert [c.seq for c in journal.in_chunk((16, 128, 0))] == [2]
+    assert [c.seq for c in journal.in_chunk((0, 128, -16))] == [3]
+    assert journal.in_chunk((0, 128, 0), after=5.0) == []
+    journal.append((40, 64, 40), 'a', 'b')
+    assert journal.in_chunk((16, 128, 0)) == [] and (16, 0) not in journal._by_chunk
+
+
+def test_add_chunk_replays_changes_made_during_its_scan(new_world):
+    world = new_world()
+    chunk = world.world_db[(0, 128, 0)]
+    chunk.scanned_at = 100.0
+    world.journal.append((3, 70, 3), 'minecraft:air', 'minecraft:gold_block', when=99.0)
+    world.journal.append((4, 70, 4), 'minecraft:air', 'minecraft:gold_block', when=101.0)
+    world.journal.append((-12, 70, 4), 'minecraft:air', 'minecraft:gold_block', when=101.0)
+
+    world.add_chunk(chunk, (0, 128, 0), scanned=False)
+    assert chunk.get((4, 70, 4)) == 'minecraft:gold_block'
+    assert chunk.get((3, 70, 3)) != 'minecraft:gold_block'
+    assert world.world_db[(-16, 128, 0)].get((-12, 70, 4)) != 'minecraft:gold_block'
@@ -0,0 +1,55 @@
+"""
+smooth_path waypoints and where a smoothed run reports getting stuck
+(python -m pytest tests).
+"""
+from berrycake_utils.smoothing import smooth_path, first_unreached, line_of_walk, JUMP
+from berrycake_utils.walker import Walker
+
+
+def open_floor(x, y, z):
+    return y == 1
+
+
+def straight(length, y=1):
+    return [(x, y, 0) for x in range(length)]
+
+
+def test_waypoints_are_path_cells_in_order():
+    path = straight(30) + [(29, 2, 1), (29, 2, 2)]
+    waypoints = smooth_path(path, open_floor)
+    cells = [tuple(w[:3]) for w in waypoints]
+    assert cells[0] == path[0] and cells[-1] == path[-1]
+    assert [path.index(c) for c in cells] == sorted(path.index(c) for c in cells)
+    assert any(w.action == JUMP for w in waypoints)
+    # no run is longer than max_run
+    indices = [path.index(c) for c in cells]
+    assert max(b - a for a, b in zip(indices, indices[1:])) <= 24
+
+
+def test_runs_do_not_cut_through_unstandable_cells():
+    hole = {(5, 1, 1)}
+    standable = lambda x, y, z: y == 1 and (x, y, z) not in hole  # noqa: E731
+    path = [(0, 1, 0), (1, 1, 1), (2, 1, 2), (3, 1, 2), (4, 1, 2), (5, 1, 2), (6, 1, 2), (7, 1, 1), (8, 1, 0)]
+    waypoints = smooth_path(path, standable)
+    for a, b in zip(waypoints, waypoints[1:]):
+        assert line_of_walk(tuple(a[:3]), tuple(b[:3]), standable)
+
+
+def test_first_unreached_is_next_to_the_player():
+    path = straight(24)
+    # the player stopped in front of x=8 while heading for the waypoint at x=23
+    assert first_unreached(path, (7.5, 1.0, 0.5), 0, 23) == (8, 1, 0)
+    # at the waypoint the run ends: the waypoint itself
+    assert first_unreached(path, (23.5, 1.0, 0.5), 0, 23) == (23, 1, 0)
+    assert first_unreached([], (0, 0, 0)) is None
+
+
+def test_walker_reports_the_raw_cell_not_the_waypoint():
+    raw = straight(40)
+    waypoints = smooth_path(raw, open_floor)
+    walker = Walker(waypoints, raw_path=raw)
+    # stuck at x=30 while walking to the second run's waypoint
+    index = next(i for i, w in enumerate(waypoints) if w.x > 30)
+    assert walker._stuck_cell(index, (29.5, 1.0, 0.5)) == (30, 1, 0)
+    # without the raw path only the waypoint is known
+    assert Walker(waypoints)._stuck_cell(index, (29.5, 1.0, 0.5)) == tuple(waypoints[index][:3])
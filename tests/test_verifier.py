@@ -0,0 +1,57 @@
+"""
+SectionVerifier: what counts as a change in sections the adaptive scan
+stored from its probes alone (python -m pytest tests).
+"""
+from berrycake_utils.verifier import SectionVerifier
+
+
+def stone_section(world):
+    chunk = world.world_db[(0, 128, 0)]
+    section = min(s for s in chunk.sampled if chunk.palette[chunk.sections[s]] == 'minecraft:stone')
+    return chunk, section
+
+
+def verify(world, origin, section):
+    verifier = SectionVerifier(world, rpc_per_second=1000)
+    verifier._probe([(origin, section)])
+    while verifier._rescan:
+        verifier._rescan_section(*verifier._rescan.popleft())
+    return verifier.stats
+
+
+def test_sampled_stone_turned_to_water_is_a_change(game, new_world):
+    world = new_world()
+    chunk, section = stone_section(world)
+    for x, y, z in chunk.section_coords(section):
+        game.edits[(x, y, z)] = 'minecraft:water'
+
+    stats = verify(world, (0, 128, 0), section)
+    assert stats['sections_rescanned'] == 1 and stats['blocks_changed'] == chunk.section_volume(section)
+    y0, _ = chunk.section_bounds(section)
+    assert chunk.get((3, y0 + 4, 3)) == 'minecraft:water'
+    assert section not in chunk.sampled
+    assert world.journal.seq >= chunk.section_volume(section)
+
+
+def test_ore_between_probes_is_not_a_change(game, new_world):
+    world = new_world()
+    chunk, section = stone_section(world)
+    for x, y, z in chunk.section_coords(section):
+        game.edits[(x, y, z)] = 'minecraft:iron_ore'
+
+    stats = verify(world, (0, 128, 0), section)
+    assert stats['mismatches'] == 0 and stats['blocks_changed'] == 0
+    assert world.journal.seq == 0
+
+
+def test_exact_sections_report_any_difference(game, new_world):
+    world = new_world(adaptive_scan=False)
+    chunk = world.world_db[(0, 128, 0)]
+    section = next(s for s in range(chunk.section_count())
+                   if chunk.get(tuple(chunk.section_coords(s)[0])) == 'minecraft:stone')
+    assert not chunk.sampled
+    for x, y, z in chunk.section_coords(section):
+        game.edits[(x, y, z)] = 'minecraft:diamond_ore'
+
+    stats = verify(world, (0, 128, 0), section)
+    assert stats['blocks_changed'] == chunk.section_volume(section)
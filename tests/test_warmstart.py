@@ -0,0 +1,21 @@
+"""
+Warm-start cache key: which world the cache belongs to, and no warm start
+when MineScript cannot say (python -m pytest tests).
+"""
+from berrycake_utils import warmstart
+
+
+def test_world_key_names_world_and_dimension(game):
+    assert warmstart.world_key() == 'BenchWorld_overworld'
+
+
+def test_failed_world_lookup_means_no_warm_start(game, new_world, monkeypatch, tmp_path):
+    def world_info():
+        raise RuntimeError('not in a world')
+    monkeypatch.setattr(warmstart.ms, 'world_info', world_info)
+    game.messages.clear()
+
+    assert warmstart.world_key() is None
+    assert 'no warm start' in game.messages[-1]
+    world = new_world(warm_start=str(tmp_path))
+    assert world.cache is None and not any(tmp_path.iterdir())